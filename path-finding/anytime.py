@@ -0,0 +1,233 @@
+"""
+Busca anytime com prazo (ARA*, Anytime Repairing A*).
+Uma primeira busca com a heurística inflada por um peso (A* ponderado)
+encontra rapidamente um caminho cujo custo é no máximo peso vezes o ótimo.
+Enquanto houver tempo, o peso é reduzido e a busca é reparada, reaproveitando
+os valores de g já calculados: só os nós cujo g melhorou depois de fechados
+(os inconsistentes) voltam para a fila. Cada solução vem com um limite de
+subotimalidade comprovado, e a busca para de forma limpa no prazo dado,
+devolvendo a melhor solução encontrada até ali.
+"""
+from time import perf_counter
+
+from busca import ResultadoBusca
+from filas import FilaHeap
+from grade import INFINITO
+from heuristicas import heuristica_admissivel, heuristica_por_indice
+
+# Expansões entre duas consultas ao relógio:
+INTERVALO_RELOGIO = 64
+
+
+class ResultadoAnytime(ResultadoBusca):
+    '''
+    Resultado da busca anytime: o da melhor solução encontrada, mais o
+    histórico de soluções.
+    Atributos (além dos de ResultadoBusca):
+        limite_subotimo (float): o custo é no máximo limite_subotimo vezes
+            o ótimo (1.0 quando comprovadamente ótimo; infinito quando o
+            prazo acabou antes de a primeira busca terminar).
+        solucoes (list): (segundos, custo, limite_subotimo) de cada
+            solução, na ordem em que foram encontradas.
+        interrompida (bool): se a busca parou por causa do prazo.
+    '''
+
+    def __init__(self, encontrado, custo, caminho, lista_abertos,
+                 lista_fechados, iteracoes, operacoes_fila, limite_subotimo,
+                 solucoes, interrompida):
+        super().__init__(encontrado, custo, caminho, lista_abertos,
+                         lista_fechados, iteracoes, operacoes_fila)
+        self.limite_subotimo = limite_subotimo
+        self.solucoes = solucoes
+        self.interrompida = interrompida
+
+
+def busca_ara(grade, pos_inicio, pos_fim, heuristica=None, campo=False,
+              peso_inicial=3.0, decremento=0.5, prazo=None,
+              ao_solucao=None, ao_abrir=None, ao_fechar=None,
+              ao_iterar=None, instrumentos=None):
+    '''
+    Busca anytime: devolve logo um caminho do A* ponderado e o melhora até
+    o ótimo ou até o prazo acabar.
+    Parâmetros:
+        grade (Grade): grade sobre a qual a busca é feita.
+        pos_inicio (tuple): posição (linha, coluna) da qual parte-se.
+        pos_fim (tuple): posição (linha, coluna) na qual pretende-se chegar.
+        heuristica (function): heurística h(p1, p2); precisa ser
+            consistente para que os limites de subotimalidade valham.
+            Por padrão, manhattan (ou chebyshev em grades com diagonais).
+        campo (bool): usar o campo de heurística pré-calculado.
+        peso_inicial (float): peso da heurística na primeira busca (>= 1).
+        decremento (float): quanto o peso diminui a cada melhoria.
+        prazo (float): opcional, tempo máximo em segundos; a busca para na
+            primeira consulta ao relógio depois dele.
+        ao_solucao (function): opcional, chamada a cada solução com
+            (custo, caminho, limite_subotimo).
+        ao_abrir, ao_fechar, ao_iterar (function): callbacks opcionais,
+            como em busca_A_estrela.
+        instrumentos (Instrumentos): opcional, como em busca_A_estrela;
+            'reaberturas' conta os nós inconsistentes devolvidos à fila.
+    Retorno:
+        ResultadoAnytime: a melhor solução e o histórico.
+    '''
+    comeco = perf_counter()
+    limite_tempo = comeco + prazo if prazo is not None else None
+    if instrumentos is not None:
+        instrumentos.iniciar()
+    amostragem = instrumentos.amostragem if instrumentos is not None else 0
+
+    if heuristica is None:
+        heuristica = heuristica_admissivel(grade.diagonais)
+
+    inicio = grade.indice(*pos_inicio)
+    fim = grade.indice(*pos_fim)
+
+    grade.limpar_busca()
+    g = grade.g_plano
+    pai = grade.pai_plano
+    custo = grade.custo_plano
+    vizinhos = grade.vizinhos
+    h = heuristica_por_indice(heuristica, pos_fim, grade.qtd_linhas,
+                              grade.qtd_colunas, campo)
+
+    peso = max(peso_inicial, 1.0)
+    fila = FilaHeap()
+    lista_abertos = set()
+    lista_fechados = set()   # Fechados na iteração atual.
+    inconsistentes = set()   # Melhoraram depois de fechados.
+    expandidos = set()       # Fechados em qualquer iteração.
+    alcancados = set()       # Todos os pontos com g escrito.
+    # Um obstáculo não é início nem fim de caminho (como em busca.py):
+    if not grade.is_obstaculo(*pos_inicio) \
+            and not grade.is_obstaculo(*pos_fim):
+        g[inicio] = 0
+        fila.inserir(peso * h(inicio), inicio)
+        lista_abertos.add(inicio)
+        alcancados.add(inicio)
+
+    if instrumentos is not None:
+        instrumentos.marcar('preparacao')
+
+    def caminho_ate_fim():
+        # Um ponto fechado que melhora (inconsistente) troca de pai, mas o
+        # g dos seus descendentes só é corrigido quando são expandidos de
+        # novo: o caminho pelos pais pode custar menos que g[fim].
+        caminho = grade.reconstruir_caminho(fim)
+        return sum(custo[grade.indice(*p)] for p in caminho[1:]), caminho
+
+    solucoes = []
+    melhor = None  # (custo, caminho, limite_subotimo)
+    iterador = 0
+    insercoes = 0
+    obsoletas = 0
+    reaberturas = 0
+    interrompida = False
+    while True:
+        # Melhora o caminho até o f do fim ser o menor da fila:
+        while fila:
+            f_topo, atual = fila.consultar()
+            if atual not in lista_abertos:
+                fila.remover()
+                obsoletas += 1
+                continue
+            if g[fim] <= f_topo:
+                break
+
+            if limite_tempo is not None \
+                    and iterador % INTERVALO_RELOGIO == 0 \
+                    and perf_counter() >= limite_tempo:
+                interrompida = True
+                break
+
+            fila.remover()
+            iterador += 1
+            lista_abertos.remove(atual)
+            lista_fechados.add(atual)
+            expandidos.add(atual)
+            if ao_fechar is not None:
+                ao_fechar(atual)
+
+            g_atual = g[atual]
+            for vizinho in vizinhos(atual):
+                temp_g = g_atual + custo[vizinho]
+                if temp_g < g[vizinho]:
+                    g[vizinho] = temp_g
+                    pai[vizinho] = atual
+                    alcancados.add(vizinho)
+                    if vizinho in lista_fechados:
+                        inconsistentes.add(vizinho)
+                        continue
+                    fila.inserir(temp_g + peso * h(vizinho), vizinho)
+                    if vizinho not in lista_abertos:
+                        lista_abertos.add(vizinho)
+                        if ao_abrir is not None:
+                            ao_abrir(vizinho)
+
+            if amostragem and iterador % amostragem == 0:
+                instrumentos.emitir('iteracao', iteracao=iterador,
+                                    lista_abertos=lista_abertos,
+                                    lista_fechados=lista_fechados)
+
+            if ao_iterar is not None:
+                ao_iterar(iterador, lista_abertos, lista_fechados)
+
+        if interrompida or g[fim] >= INFINITO:
+            break
+
+        # Limite comprovado: nenhum caminho custa menos que o menor g + h
+        # entre os nós ainda abertos ou inconsistentes.
+        pendentes = lista_abertos | inconsistentes
+        cota = min((g[n] + h(n) for n in pendentes), default=g[fim])
+        custo_fim, caminho = caminho_ate_fim()
+        limite = min(peso, custo_fim / cota) if cota > 0 else 1.0
+        if melhor is None or custo_fim < melhor[0] or limite < melhor[2]:
+            melhor = (custo_fim, caminho, limite)
+            solucoes.append((perf_counter() - comeco, custo_fim, limite))
+            if ao_solucao is not None:
+                ao_solucao(*melhor)
+
+        if limite <= 1.0 or peso <= 1.0:
+            break
+        if limite_tempo is not None and perf_counter() >= limite_tempo:
+            interrompida = True
+            break
+
+        # Próxima iteração: peso menor, inconsistentes de volta à fila e
+        # lista de fechados vazia.
+        peso = max(1.0, min(peso - decremento, limite))
+        reaberturas += len(inconsistentes)
+        lista_abertos = pendentes
+        inconsistentes = set()
+        lista_fechados = set()
+        insercoes += fila.insercoes()
+        fila = FilaHeap()
+        for n in lista_abertos:
+            fila.inserir(g[n] + peso * h(n), n)
+
+    if instrumentos is not None:
+        instrumentos.marcar('busca')
+
+    grade.registrar_busca(alcancados)
+    operacoes_fila = 2 * (insercoes + fila.insercoes()) - len(fila)
+    if melhor is None and g[fim] < INFINITO:
+        # O prazo acabou antes do fim da primeira busca, mas o fim já foi
+        # alcançado: o caminho vale, sem limite comprovado.
+        melhor = caminho_ate_fim() + (float('inf'),)
+        solucoes.append((perf_counter() - comeco, melhor[0], float('inf')))
+
+    if melhor is None:
+        resultado = ResultadoAnytime(False, float("inf"), [], lista_abertos,
+                                     expandidos, iterador, operacoes_fila,
+                                     float('inf'), solucoes, interrompida)
+    else:
+        resultado = ResultadoAnytime(True, melhor[0], melhor[1],
+                                     lista_abertos, expandidos, iterador,
+                                     operacoes_fila, melhor[2], solucoes,
+                                     interrompida)
+
+    if instrumentos is not None:
+        instrumentos.marcar('caminho')
+        instrumentos.finalizar(expansoes=iterador,
+                               insercoes=insercoes + fila.insercoes(),
+                               obsoletas=obsoletas, reaberturas=reaberturas)
+    return resultado
@@ -0,0 +1,310 @@
+"""
+Suíte de benchmarks reproduzível dos buscadores e heurísticas.
+Gera grades aleatórias e labirintos a partir de sementes fixas, roda cada
+combinação de buscador e heurística sobre as mesmas consultas e mede tempo,
+nós expandidos, operações na fila, pico de memória e o quanto o custo
+encontrado fica acima do ótimo. O relatório é gravado em JSON, e um
+relatório anterior pode ser informado para apontar regressões.
+Uso:
+    python benchmark.py --saida resultados.json
+    python benchmark.py --rapido --comparar resultados.json
+"""
+import argparse
+import json
+import platform
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from busca import busca_A_estrela
+from grade import Grade
+from heuristicas import heuristica_admissivel
+from jps import busca_jps
+from motores import HEURISTICAS, MOTORES
+
+# Cenários: tipo da grade, lado, densidade de obstáculos e vizinhança.
+CENARIOS = [
+    {'tipo': 'aleatoria', 'tamanho': 64, 'densidade': 0.1},
+    {'tipo': 'aleatoria', 'tamanho': 64, 'densidade': 0.3},
+    {'tipo': 'aleatoria', 'tamanho': 256, 'densidade': 0.1},
+    {'tipo': 'aleatoria', 'tamanho': 256, 'densidade': 0.3},
+    {'tipo': 'aleatoria', 'tamanho': 256, 'densidade': 0.2,
+     'diagonais': True},
+    {'tipo': 'labirinto', 'tamanho': 65},
+    {'tipo': 'labirinto', 'tamanho': 257},
+]
+
+CENARIOS_RAPIDOS = [
+    {'tipo': 'aleatoria', 'tamanho': 32, 'densidade': 0.2},
+    {'tipo': 'aleatoria', 'tamanho': 32, 'densidade': 0.2,
+     'diagonais': True},
+    {'tipo': 'labirinto', 'tamanho': 33},
+]
+
+
+# -----------------------------------------------------------------------
+# GERAÇÃO DE GRADES E CONSULTAS
+# -----------------------------------------------------------------------
+def nome_cenario(cenario):
+    nome = f"{cenario['tipo']}-{cenario['tamanho']}"
+    if 'densidade' in cenario:
+        nome += f"-{cenario['densidade']}"
+    if cenario.get('diagonais'):
+        nome += '-diagonais'
+    return nome
+
+
+def grade_aleatoria(tamanho, densidade, semente, diagonais=False):
+    '''
+    Grade com obstáculos sorteados independentemente em cada ponto.
+    '''
+    grade = Grade(tamanho, diagonais=diagonais)
+    gerador = np.random.default_rng(semente)
+    grade.obstaculo[:] = gerador.random((tamanho, tamanho)) < densidade
+    grade.recalcular_movimentos()
+    return grade
+
+
+def labirinto(tamanho, semente, diagonais=False):
+    '''
+    Labirinto perfeito (um único caminho entre dois pontos quaisquer)
+    gerado por busca em profundidade. Corredores e paredes têm largura 1,
+    então o tamanho efetivo é sempre ímpar.
+    '''
+    celulas = (tamanho - 1) // 2
+    tamanho = 2 * celulas + 1
+    grade = Grade(tamanho, diagonais=diagonais)
+    grade.obstaculo.fill(1)
+    gerador = random.Random(semente)
+
+    visitadas = {(0, 0)}
+    pilha = [(0, 0)]
+    grade.obstaculo[1, 1] = 0
+    while pilha:
+        linha, coluna = pilha[-1]
+        candidatas = [(linha + dl, coluna + dc)
+                      for dl, dc in ((1, 0), (-1, 0), (0, 1), (0, -1))
+                      if 0 <= linha + dl < celulas
+                      and 0 <= coluna + dc < celulas
+                      and (linha + dl, coluna + dc) not in visitadas]
+        if not candidatas:
+            pilha.pop()
+            continue
+        proxima = gerador.choice(candidatas)
+        visitadas.add(proxima)
+        # Abre a célula nova e a parede entre as duas:
+        grade.obstaculo[2 * proxima[0] + 1, 2 * proxima[1] + 1] = 0
+        grade.obstaculo[linha + proxima[0] + 1, coluna + proxima[1] + 1] = 0
+        pilha.append(proxima)
+    grade.recalcular_movimentos()
+    return grade
+
+
+def gerar_grade(cenario, semente):
+    diagonais = cenario.get('diagonais', False)
+    if cenario['tipo'] == 'labirinto':
+        return labirinto(cenario['tamanho'], semente, diagonais)
+    return grade_aleatoria(cenario['tamanho'], cenario['densidade'],
+                           semente, diagonais)
+
+
+def sortear_consultas(grade, quantidade, semente):
+    '''
+    Sorteia pares (início, fim) de pontos livres.
+    '''
+    livres = np.flatnonzero(grade.obstaculo.ravel() == 0).tolist()
+    gerador = random.Random(semente)
+    return [(grade.posicao(gerador.choice(livres)),
+             grade.posicao(gerador.choice(livres)))
+            for _ in range(quantidade)]
+
+
+# -----------------------------------------------------------------------
+# MEDIÇÃO
+# -----------------------------------------------------------------------
+def medir(grade, consultas, motor, heuristica, otimos):
+    '''
+    Roda um buscador com uma heurística sobre todas as consultas. O tempo é
+    medido em uma execução sem o tracemalloc (que deixa a busca bem mais
+    lenta) e o pico de memória em uma segunda execução.
+    Parâmetros:
+        grade (Grade): grade do cenário.
+        consultas (list): pares (início, fim).
+        motor (function): buscador, como busca_A_estrela.
+        heuristica (function): heurística h(p1, p2).
+        otimos (list): custo ótimo de cada consulta.
+    Retorno:
+        dict: métricas agregadas.
+    '''
+    tempos = []
+    expandidos = 0
+    operacoes_fila = 0
+    razoes = []
+    for (pos_inicio, pos_fim), otimo in zip(consultas, otimos):
+        comeco = time.perf_counter()
+        resultado = motor(grade, pos_inicio, pos_fim, heuristica=heuristica)
+        tempos.append(time.perf_counter() - comeco)
+        expandidos += resultado.iteracoes
+        operacoes_fila += resultado.operacoes_fila
+        if resultado and otimo:
+            razoes.append(resultado.custo / otimo)
+
+    pico_memoria = 0
+    for pos_inicio, pos_fim in consultas:
+        tracemalloc.start()
+        motor(grade, pos_inicio, pos_fim, heuristica=heuristica)
+        pico_memoria = max(pico_memoria, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+
+    return {
+        'tempo_total': sum(tempos),
+        'tempo_mediano': statistics.median(tempos),
+        'expandidos': expandidos,
+        'operacoes_fila': operacoes_fila,
+        'pico_memoria': pico_memoria,
+        'subotimalidade_media': statistics.mean(razoes) if razoes else 1.0,
+        'subotimalidade_maxima': max(razoes, default=1.0),
+    }
+
+
+def executar(cenarios, qtd_consultas, semente, motores=None,
+             heuristicas=None, progresso=None):
+    '''
+    Roda todos os cenários e devolve o relatório.
+    Parâmetros:
+        cenarios (list): descrições dos cenários (ver CENARIOS).
+        qtd_consultas (int): consultas sorteadas por cenário.
+        semente (int): semente de grades e consultas.
+        motores (dict): nome -> buscador. Por padrão, MOTORES.
+        heuristicas (dict): nome -> heurística. Por padrão, HEURISTICAS.
+        progresso (function): opcional, chamada com cada resultado.
+    Retorno:
+        dict: relatório com o ambiente e uma lista de resultados.
+    '''
+    motores = motores or MOTORES
+    heuristicas = heuristicas or HEURISTICAS
+    resultados = []
+    for cenario in cenarios:
+        grade = gerar_grade(cenario, semente)
+        consultas = sortear_consultas(grade, qtd_consultas, semente)
+        admissivel = heuristica_admissivel(grade.diagonais)
+        otimos = [busca_A_estrela(grade, pos_inicio, pos_fim,
+                                  heuristica=admissivel).custo
+                  for pos_inicio, pos_fim in consultas]
+
+        for nome_motor, motor in motores.items():
+            if motor is busca_jps and not grade.custo_uniforme():
+                continue
+            for nome_heuristica, heuristica in heuristicas.items():
+                resultado = {'cenario': nome_cenario(cenario),
+                             'motor': nome_motor,
+                             'heuristica': nome_heuristica,
+                             'consultas': len(consultas)}
+                resultado.update(
+                    medir(grade, consultas, motor, heuristica, otimos))
+                resultados.append(resultado)
+                if progresso is not None:
+                    progresso(resultado)
+
+    return {
+        'ambiente': {
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'plataforma': platform.platform(),
+            'data': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        },
+        'semente': semente,
+        'consultas_por_cenario': qtd_consultas,
+        'resultados': resultados,
+    }
+
+
+def comparar(atual, anterior, tolerancia=0.2):
+    '''
+    Compara dois relatórios. Tempo e memória só contam como regressão
+    acima da tolerância (há ruído entre execuções); já expansões e custos
+    são determinísticos, então qualquer mudança é apontada.
+    Parâmetros:
+        atual, anterior (dict): relatórios gerados por executar().
+        tolerancia (float): aumento relativo aceito em tempo e memória.
+    Retorno:
+        list: descrições das regressões encontradas.
+    '''
+    def chave(resultado):
+        return (resultado['cenario'], resultado['motor'],
+                resultado['heuristica'])
+
+    anteriores = {chave(r): r for r in anterior['resultados']}
+    regressoes = []
+    for resultado in atual['resultados']:
+        antigo = anteriores.get(chave(resultado))
+        if antigo is None:
+            continue
+        nome = '/'.join(chave(resultado))
+        for metrica in ('tempo_mediano', 'pico_memoria'):
+            if resultado[metrica] > antigo[metrica] * (1 + tolerancia):
+                regressoes.append(
+                    f'{nome}: {metrica} {antigo[metrica]:.6g} -> '
+                    f'{resultado[metrica]:.6g}')
+        for metrica in ('expandidos', 'subotimalidade_maxima'):
+            if resultado[metrica] > antigo[metrica]:
+                regressoes.append(
+                    f'{nome}: {metrica} {antigo[metrica]:.6g} -> '
+                    f'{resultado[metrica]:.6g}')
+    return regressoes
+
+
+# -----------------------------------------------------------------------
+# LINHA DE COMANDO
+# -----------------------------------------------------------------------
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(
+        description='Benchmark dos buscadores e heurísticas.')
+    parser.add_argument('--saida', default='benchmark.json',
+                        help='arquivo JSON do relatório')
+    parser.add_argument('--comparar', metavar='ANTERIOR',
+                        help='relatório anterior para apontar regressões')
+    parser.add_argument('--tolerancia', type=float, default=0.2,
+                        help='aumento relativo aceito em tempo e memória')
+    parser.add_argument('--consultas', type=int, default=20,
+                        help='consultas por cenário')
+    parser.add_argument('--semente', type=int, default=0)
+    parser.add_argument('--rapido', action='store_true',
+                        help='usar apenas cenários pequenos')
+    parser.add_argument('--motores', nargs='+', choices=MOTORES,
+                        default=list(MOTORES))
+    parser.add_argument('--heuristicas', nargs='+', choices=HEURISTICAS,
+                        default=list(HEURISTICAS))
+    args = parser.parse_args(argumentos)
+
+    def progresso(resultado):
+        print(f"{resultado['cenario']:>28} {resultado['motor']:>12} "
+              f"{resultado['heuristica']:>12} "
+              f"{resultado['tempo_mediano'] * 1000:9.2f} ms "
+              f"{resultado['expandidos']:9} nós "
+              f"x{resultado['subotimalidade_maxima']:.3f}")
+
+    relatorio = executar(
+        CENARIOS_RAPIDOS if args.rapido else CENARIOS, args.consultas,
+        args.semente, {nome: MOTORES[nome] for nome in args.motores},
+        {nome: HEURISTICAS[nome] for nome in args.heuristicas}, progresso)
+
+    with open(args.saida, 'w') as arquivo:
+        json.dump(relatorio, arquivo, indent=2)
+
+    if args.comparar:
+        with open(args.comparar) as arquivo:
+            regressoes = comparar(relatorio, json.load(arquivo),
+                                  args.tolerancia)
+        for regressao in regressoes:
+            print('REGRESSÃO', regressao)
+        return 1 if regressoes else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
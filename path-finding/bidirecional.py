@@ -0,0 +1,212 @@
+"""
+Busca A* bidirecional.
+Duas buscas rodam ao mesmo tempo, uma partindo do início em direção ao fim
+e outra partindo do fim em direção ao início. Em corredores longos e
+labirintos as duas fronteiras juntas ficam bem menores que a fronteira de
+uma única busca.
+As duas usam a mesma heurística através do "potencial médio"
+p(n) = (h(n, fim) - h(n, inicio)) / 2, que é consistente nos dois sentidos
+ao mesmo tempo e permite um critério de parada simples e correto.
+"""
+from busca import ResultadoBusca
+from filas import nova_fila
+from grade import INFINITO, SEM_PAI
+from heuristicas import heuristica_admissivel, heuristica_inteira, \
+    heuristica_por_indice
+
+
+class _Sentido:
+    '''
+    Estruturas de uma das duas buscas: g e pai de cada nó alcançado (como o
+    dicionário 'caminho' do desenhar_melhor_caminho), fila e listas.
+    '''
+
+    def __init__(self, origem, potencial, para_frente, fila):
+        self.g = {origem: 0}
+        self.caminho = {}
+        self.fila = fila
+        self.fila.inserir(potencial(origem), origem)
+        self.lista_abertos = {origem}
+        self.lista_fechados = set()
+        self.potencial = potencial
+        self.para_frente = para_frente
+
+    def seguir_pais(self, indice):
+        '''
+        Lista os nós de 'indice' até a origem deste sentido.
+        '''
+        nos = [indice]
+        while indice in self.caminho:
+            indice = self.caminho[indice]
+            nos.append(indice)
+        return nos
+
+
+def busca_bidirecional(grade, pos_inicio, pos_fim, heuristica=None,
+                       campo=False, ao_abrir=None, ao_fechar=None,
+                       ao_iterar=None, instrumentos=None):
+    '''
+    Busca A* bidirecional. Recebe os mesmos parâmetros e devolve o mesmo
+    ResultadoBusca de busca_A_estrela.
+    A cada iteração é expandido o sentido com menos nós na fila. Sempre que
+    um nó é alcançado pelos dois sentidos, g_frente + g_tras é um caminho
+    candidato. As prioridades (em dobro, para continuarem inteiras) são
+    2 * g + h(n, fim) - h(n, inicio) na frente e o simétrico atrás; com
+    heurística consistente a busca termina quando a soma das menores
+    prioridades das duas filas alcança o dobro do melhor candidato.
+    Ao final, g e pai dos nós do caminho são gravados na grade.
+    Parâmetros:
+        grade (Grade): grade sobre a qual a busca é feita.
+        pos_inicio (tuple): posição (linha, coluna) da qual parte-se.
+        pos_fim (tuple): posição (linha, coluna) na qual pretende-se chegar.
+        heuristica (function): heurística h(p1, p2) entre duas posições.
+            Por padrão, manhattan (ou chebyshev em grades com diagonais).
+        campo (bool): usar os campos de heurística pré-calculados.
+        ao_abrir, ao_fechar, ao_iterar (function): callbacks opcionais,
+            como em busca_A_estrela.
+        instrumentos (Instrumentos): opcional, como em busca_A_estrela;
+            os contadores somam os dois sentidos.
+    Retorno:
+        ResultadoBusca: resultado da busca (verdadeiro se achou caminho).
+    '''
+    if instrumentos is not None:
+        instrumentos.iniciar()
+    amostragem = instrumentos.amostragem if instrumentos is not None else 0
+
+    if heuristica is None:
+        heuristica = heuristica_admissivel(grade.diagonais)
+
+    inicio = grade.indice(*pos_inicio)
+    fim = grade.indice(*pos_fim)
+    custo = grade.custo_plano
+    vizinhos = grade.vizinhos
+
+    # Um obstáculo nas pontas só seria alcançado pela busca que parte dele:
+    if grade.obstaculo_plano[inicio] or grade.obstaculo_plano[fim]:
+        if instrumentos is not None:
+            instrumentos.finalizar(expansoes=0, insercoes=0, obsoletas=0,
+                                   reaberturas=0)
+        return ResultadoBusca(False, float("inf"), [], set(), set(), 0)
+
+    h_fim = heuristica_por_indice(
+        heuristica, pos_fim, grade.qtd_linhas, grade.qtd_colunas, campo)
+    h_inicio = heuristica_por_indice(
+        heuristica, pos_inicio, grade.qtd_linhas, grade.qtd_colunas, campo,
+        reverso=True)
+
+    inteira = heuristica_inteira(heuristica)
+    frente = _Sentido(inicio, lambda n: h_fim(n) - h_inicio(n), True,
+                      nova_fila(inteira))
+    tras = _Sentido(fim, lambda n: h_inicio(n) - h_fim(n), False,
+                    nova_fila(inteira))
+
+    melhor = 0 if inicio == fim else INFINITO
+    encontro = inicio
+
+    if instrumentos is not None:
+        instrumentos.marcar('preparacao')
+
+    iterador = 0
+    obsoletas = 0
+    reaberturas = 0
+    while frente.fila and tras.fila:
+        if frente.fila.menor_prioridade() + tras.fila.menor_prioridade() \
+                >= 2 * melhor:
+            break
+
+        if len(frente.fila) <= len(tras.fila):
+            sentido, outro = frente, tras
+        else:
+            sentido, outro = tras, frente
+
+        atual = sentido.fila.remover()[1]
+        if atual in sentido.lista_fechados:
+            obsoletas += 1
+            continue
+
+        iterador += 1
+        g = sentido.g
+        g_outro = outro.g
+        g_atual = g[atual]
+        for ponto_vizinho in vizinhos(atual):
+            # No sentido de trás a aresta é percorrida ao contrário, então o
+            # custo é o de entrar no nó atual:
+            if sentido.para_frente:
+                temp_g = g_atual + custo[ponto_vizinho]
+            else:
+                temp_g = g_atual + custo[atual]
+
+            if temp_g < g.get(ponto_vizinho, INFINITO):
+                sentido.caminho[ponto_vizinho] = atual
+                g[ponto_vizinho] = temp_g
+                sentido.fila.inserir(
+                    2 * temp_g + sentido.potencial(ponto_vizinho),
+                    ponto_vizinho)
+
+                if ponto_vizinho not in sentido.lista_abertos:
+                    if ponto_vizinho in sentido.lista_fechados:
+                        sentido.lista_fechados.remove(ponto_vizinho)
+                        reaberturas += 1
+                    sentido.lista_abertos.add(ponto_vizinho)
+                    if ao_abrir is not None:
+                        ao_abrir(ponto_vizinho)
+
+                # Os dois sentidos se encontraram neste nó?
+                if ponto_vizinho in g_outro \
+                        and temp_g + g_outro[ponto_vizinho] < melhor:
+                    melhor = temp_g + g_outro[ponto_vizinho]
+                    encontro = ponto_vizinho
+
+        sentido.lista_abertos.remove(atual)
+        sentido.lista_fechados.add(atual)
+        if ao_fechar is not None:
+            ao_fechar(atual)
+
+        if amostragem and iterador % amostragem == 0:
+            instrumentos.emitir(
+                'iteracao', iteracao=iterador,
+                lista_abertos=frente.lista_abertos | tras.lista_abertos,
+                lista_fechados=frente.lista_fechados | tras.lista_fechados)
+
+        if ao_iterar is not None:
+            ao_iterar(iterador,
+                      frente.lista_abertos | tras.lista_abertos,
+                      frente.lista_fechados | tras.lista_fechados)
+
+    if instrumentos is not None:
+        instrumentos.marcar('busca')
+
+    lista_abertos = frente.lista_abertos | tras.lista_abertos
+    lista_fechados = frente.lista_fechados | tras.lista_fechados
+    operacoes_fila = frente.fila.operacoes() + tras.fila.operacoes()
+    if melhor == INFINITO:
+        resultado = ResultadoBusca(False, float("inf"), [],
+                                   lista_abertos, lista_fechados, iterador,
+                                   operacoes_fila)
+    else:
+        # Junta as duas metades do caminho no ponto de encontro:
+        nos = frente.seguir_pais(encontro)[::-1] \
+            + tras.seguir_pais(encontro)[1:]
+
+        grade.limpar_busca()
+        g = 0
+        anterior = SEM_PAI
+        for indice in nos:
+            if anterior != SEM_PAI:
+                g += custo[indice]
+            grade.g_plano[indice] = g
+            grade.pai_plano[indice] = anterior
+            anterior = indice
+        grade.registrar_busca(nos)
+
+        resultado = ResultadoBusca(
+            True, melhor, [grade.posicao(i) for i in nos],
+            lista_abertos, lista_fechados, iterador, operacoes_fila)
+
+    if instrumentos is not None:
+        instrumentos.marcar('caminho')
+        instrumentos.finalizar(
+            expansoes=iterador,
+            insercoes=frente.fila.insercoes() + tras.fila.insercoes(),
+            obsoletas=obsoletas, reaberturas=reaberturas)
+    return resultado
@@ -0,0 +1,241 @@
+"""
+Motor de busca A* independente da interface gráfica.
+Nenhuma função deste módulo desenha na tela ou escreve no console: a
+interface (main.py) acompanha a busca através de callbacks opcionais.
+Quando nenhum callback é informado a busca roda em modo headless, sem
+nenhum custo extra por iteração.
+"""
+from filas import nova_fila
+from heuristicas import heuristica_admissivel, heuristica_inteira, \
+    heuristica_mais_proxima, heuristica_por_indice
+
+
+# -----------------------------------------------------------------------
+# RESULTADO DA BUSCA
+# -----------------------------------------------------------------------
+class ResultadoBusca:
+    '''
+    Agrupa tudo o que a busca produziu. Avaliar o resultado como booleano
+    indica se um caminho foi encontrado, mantendo compatibilidade com o
+    antigo retorno True/False de busca_A_estrela.
+    Atributos:
+        encontrado (bool): se um caminho foi encontrado.
+        custo (int): custo real do caminho (infinito se não há).
+        caminho (list): posições (linha, coluna) do início até o fim.
+        lista_abertos (set): índices dos nós abertos ao final.
+        lista_fechados (set): índices dos nós fechados ao final.
+        iteracoes (int): quantidade de nós expandidos.
+        operacoes_fila (int): inserções e remoções feitas na fila de
+            prioridade (0 quando o buscador não informa).
+    '''
+
+    def __init__(self, encontrado, custo, caminho,
+                 lista_abertos, lista_fechados, iteracoes, operacoes_fila=0):
+        self.encontrado = encontrado
+        self.custo = custo
+        self.caminho = caminho
+        self.lista_abertos = lista_abertos
+        self.lista_fechados = lista_fechados
+        self.iteracoes = iteracoes
+        self.operacoes_fila = operacoes_fila
+
+    def __bool__(self):
+        return self.encontrado
+
+
+# -----------------------------------------------------------------------
+# Buscador de Caminhos com A*
+# -----------------------------------------------------------------------
+def busca_A_estrela(grade, pos_inicio, pos_fim, heuristica=None,
+                    campo=False, ao_abrir=None, ao_fechar=None,
+                    ao_iterar=None, instrumentos=None):
+    '''
+    Função central do projeto. É aqui que o algoritmo A* é definido,
+    todas as estruturas de dados são modificadas e a melhor decisão é tomada
+    com base em uma determinada função de avaliação.
+    F(n) = g(n) + h(n)
+    Os valores de g e o pai de cada nó ficam nos vetores da própria grade.
+    Parâmetros:
+        grade (Grade): grade sobre a qual a busca é feita.
+        pos_inicio (tuple): posição (linha, coluna) da qual parte-se.
+        pos_fim (tuple): posição (linha, coluna) na qual pretende-se chegar.
+        heuristica (function): heurística h(p1, p2) entre duas posições.
+            Por padrão, manhattan (ou chebyshev em grades com diagonais).
+        campo (bool): usar o campo de heurística pré-calculado para
+            pos_fim em vez de calculá-la sob demanda.
+        ao_abrir (function): opcional, chamada com o índice de cada nó aberto.
+        ao_fechar (function): opcional, chamada com o índice de cada nó
+            fechado.
+        ao_iterar (function): opcional, chamada ao fim de cada iteração
+            com (iterador, lista_abertos, lista_fechados).
+        instrumentos (Instrumentos): opcional, recebe contadores, tempos
+            das fases e eventos da busca (ver instrumentacao.py).
+    Retorno:
+        ResultadoBusca: resultado da busca (verdadeiro se achou caminho).
+    '''
+    if instrumentos is not None:
+        instrumentos.iniciar()
+
+    if heuristica is None:
+        heuristica = heuristica_admissivel(grade.diagonais)
+
+    h = heuristica_por_indice(heuristica, pos_fim, grade.qtd_linhas,
+                              grade.qtd_colunas, campo)
+    return _a_estrela(grade, grade.indice(*pos_inicio),
+                      {grade.indice(*pos_fim)}, h,
+                      heuristica_inteira(heuristica), ao_abrir, ao_fechar,
+                      ao_iterar, instrumentos)
+
+
+def busca_mais_proximo(grade, pos_inicio, posicoes_fim, heuristica=None,
+                       campo=False, ao_abrir=None, ao_fechar=None,
+                       ao_iterar=None, instrumentos=None):
+    '''
+    A* com vários fins: encontra, em uma única busca, o caminho ótimo até o
+    fim mais próximo (de menor custo) de pos_inicio. A heurística de cada
+    ponto é a menor entre as dos fins, que continua admissível e
+    consistente, e a busca para no primeiro fim retirado da fila.
+    Parâmetros:
+        grade (Grade): grade sobre a qual a busca é feita.
+        pos_inicio (tuple): posição (linha, coluna) da qual parte-se.
+        posicoes_fim (iterable): posições (linha, coluna) candidatas.
+        heuristica, campo, ao_abrir, ao_fechar, ao_iterar, instrumentos:
+            como em busca_A_estrela; com campo=True é usado o campo com o
+            mínimo sobre todos os fins.
+    Retorno:
+        ResultadoBusca: resultado da busca; o fim alcançado é o último
+        ponto do caminho.
+    '''
+    posicoes_fim = tuple(dict.fromkeys(tuple(p) for p in posicoes_fim))
+    if not posicoes_fim:
+        raise ValueError('busca_mais_proximo: nenhum fim informado.')
+    if instrumentos is not None:
+        instrumentos.iniciar()
+
+    if heuristica is None:
+        heuristica = heuristica_admissivel(grade.diagonais)
+
+    h = heuristica_mais_proxima(heuristica, posicoes_fim, grade.qtd_linhas,
+                                grade.qtd_colunas, campo)
+    return _a_estrela(grade, grade.indice(*pos_inicio),
+                      {grade.indice(*p) for p in posicoes_fim}, h,
+                      heuristica_inteira(heuristica), ao_abrir, ao_fechar,
+                      ao_iterar, instrumentos)
+
+
+def _a_estrela(grade, inicio, fins, h, inteira, ao_abrir, ao_fechar,
+               ao_iterar, instrumentos):
+    '''
+    Laço do A*, comum a busca_A_estrela e busca_mais_proximo.
+    Parâmetros:
+        inicio (int): índice do ponto de partida.
+        fins (set): índices dos fins; a busca para no primeiro alcançado.
+        h (function): heurística por índice.
+        inteira (bool): se a heurística só produz inteiros.
+    '''
+    amostragem = instrumentos.amostragem if instrumentos is not None else 0
+
+    # Parâmetros para função de avaliação, guardados na grade:
+    grade.limpar_busca()
+    g = grade.g_plano
+    caminho = grade.pai_plano
+    custo = grade.custo_plano
+    vizinhos = grade.vizinhos
+
+    # Estrutura de dados dos nós abertos e fechados. A fila retorna sempre
+    # o menor elemento; com custos e heurística inteiros é uma fila de
+    # baldes, senão um heap:
+    fila = nova_fila(inteira)
+    lista_abertos = set()
+    lista_fechados = set()
+
+    # Um obstáculo não é início nem fim de caminho: a busca só começa se
+    # o início e algum dos fins estão livres.
+    fins = {fim for fim in fins if not grade.is_obstaculo(*grade.posicao(fim))}
+    if fins and not grade.is_obstaculo(*grade.posicao(inicio)):
+        g[inicio] = 0
+        fila.inserir(0, inicio)
+        lista_abertos.add(inicio)
+
+    if instrumentos is not None:
+        instrumentos.marcar('preparacao')
+
+    iterador = 0
+    obsoletas = 0
+    reaberturas = 0
+    encontrado = False
+    while fila:
+        atual = fila.remover()[1]
+
+        # Entrada obsoleta: o nó já saiu da fila com um f menor.
+        if atual in lista_fechados:
+            obsoletas += 1
+            continue
+
+        iterador += 1
+
+        # Solução encontrada:
+        if atual in fins:
+            fim = atual
+            lista_abertos.remove(fim)
+            lista_fechados.add(fim)
+            encontrado = True
+            break
+
+        # Caso contrário:
+        g_atual = g[atual]
+        for ponto_vizinho in vizinhos(atual):
+            temp_g = g_atual + custo[ponto_vizinho]
+
+            if temp_g < g[ponto_vizinho]:
+                caminho[ponto_vizinho] = atual
+                g[ponto_vizinho] = temp_g
+
+                # Calcula f e (re)insere o nó com a nova prioridade:
+                fila.inserir(temp_g + h(ponto_vizinho), ponto_vizinho)
+
+                # Alteração de estado - Nó aberto (ou reaberto, quando uma
+                # heurística inconsistente fecha um nó cedo demais):
+                if ponto_vizinho not in lista_abertos:
+                    if ponto_vizinho in lista_fechados:
+                        lista_fechados.remove(ponto_vizinho)
+                        reaberturas += 1
+                    lista_abertos.add(ponto_vizinho)
+                    if ao_abrir is not None:
+                        ao_abrir(ponto_vizinho)
+
+        # Alteração de estado - Nó fechado:
+        lista_abertos.remove(atual)
+        lista_fechados.add(atual)
+        if ao_fechar is not None:
+            ao_fechar(atual)
+
+        if amostragem and iterador % amostragem == 0:
+            instrumentos.emitir('iteracao', iteracao=iterador,
+                                lista_abertos=lista_abertos,
+                                lista_fechados=lista_fechados)
+
+        if ao_iterar is not None:
+            ao_iterar(iterador, lista_abertos, lista_fechados)
+
+    if instrumentos is not None:
+        instrumentos.marcar('busca')
+
+    # Só os nós abertos e fechados tiveram g e pai escritos:
+    grade.registrar_busca(lista_abertos, lista_fechados)
+    if encontrado:
+        resultado = ResultadoBusca(True, g[fim],
+                                   grade.reconstruir_caminho(fim),
+                                   lista_abertos, lista_fechados, iterador,
+                                   fila.operacoes())
+    else:
+        resultado = ResultadoBusca(False, float("inf"), [],
+                                   lista_abertos, lista_fechados, iterador,
+                                   fila.operacoes())
+
+    if instrumentos is not None:
+        instrumentos.marcar('caminho')
+        instrumentos.finalizar(expansoes=iterador,
+                               insercoes=fila.insercoes(),
+                               obsoletas=obsoletas, reaberturas=reaberturas)
+    return resultado
@@ -0,0 +1,140 @@
+"""
+Cache de resultados de busca com descarte LRU.
+Consultas repetidas sobre a mesma grade viram uma consulta a dicionário.
+O cache acompanha as edições da grade: um obstáculo novo só invalida os
+caminhos que passam pelo ponto editado (os demais continuam ótimos),
+enquanto liberar um ponto ou mudar um custo pode abrir atalhos para
+qualquer caminho, então nesse caso o cache inteiro é descartado.
+"""
+from collections import OrderedDict
+from copy import copy
+
+from busca import busca_A_estrela
+from heuristicas import heuristica_admissivel
+
+
+def _copia(resultado):
+    '''
+    Cópia de um resultado guardado, com o caminho em uma lista nova.
+    '''
+    copia = copy(resultado)
+    copia.caminho = list(resultado.caminho)
+    copia.lista_abertos = set()
+    copia.lista_fechados = set()
+    return copia
+
+
+class CacheCaminhos:
+    '''
+    Cache LRU de consultas (início, fim, heurística) sobre uma Grade.
+    Fica registrado em grade.ao_alterar para invalidar os resultados
+    afetados pelas edições.
+    Atributos:
+        versao (int): incrementada sempre que o cache inteiro é descartado.
+        acertos (int): consultas respondidas pelo cache.
+        falhas (int): consultas que precisaram de uma busca.
+    '''
+
+    def __init__(self, grade, capacidade=1024, algoritmo=busca_A_estrela):
+        self.grade = grade
+        self.capacidade = capacidade
+        self.algoritmo = algoritmo
+        self.versao = 0
+        self.acertos = 0
+        self.falhas = 0
+        # Chave -> ResultadoBusca, do menos para o mais recentemente usado:
+        self._resultados = OrderedDict()
+        # Índice de cada ponto -> chaves dos caminhos que dependem dele:
+        self._por_ponto = {}
+
+        grade.ao_alterar.append(self.marcar_alteracao)
+
+    def desconectar(self):
+        '''
+        Deixa de acompanhar as alterações da grade.
+        '''
+        self.grade.ao_alterar.remove(self.marcar_alteracao)
+
+    def __len__(self):
+        return len(self._resultados)
+
+    def buscar(self, pos_inicio, pos_fim, heuristica=None):
+        '''
+        Devolve o resultado da busca de pos_inicio até pos_fim, do cache ou
+        de uma busca nova. Os resultados guardados não trazem as listas de
+        nós abertos e fechados. Cada chamada devolve uma cópia, que pode ser
+        alterada sem afetar o cache.
+        Parâmetros:
+            pos_inicio (tuple): posição (linha, coluna) da qual parte-se.
+            pos_fim (tuple): posição (linha, coluna) na qual pretende-se
+                chegar.
+            heuristica (function): heurística h(p1, p2) entre duas posições.
+        Retorno:
+            ResultadoBusca: resultado da busca.
+        '''
+        if heuristica is None:
+            heuristica = heuristica_admissivel(self.grade.diagonais)
+        chave = (tuple(pos_inicio), tuple(pos_fim), heuristica)
+
+        resultado = self._resultados.get(chave)
+        if resultado is not None:
+            self._resultados.move_to_end(chave)
+            self.acertos += 1
+            return _copia(resultado)
+
+        self.falhas += 1
+        resultado = self.algoritmo(self.grade, pos_inicio, pos_fim,
+                                   heuristica=heuristica)
+        # O caminho é guardado como tupla, e quem chama recebe cópias:
+        resultado.caminho = tuple(resultado.caminho)
+        resultado.lista_abertos = set()
+        resultado.lista_fechados = set()
+        self._resultados[chave] = resultado
+        for indice in self._pontos_usados(resultado.caminho):
+            self._por_ponto.setdefault(indice, set()).add(chave)
+
+        if len(self._resultados) > self.capacidade:
+            self._remover(next(iter(self._resultados)))
+        return _copia(resultado)
+
+    def _pontos_usados(self, caminho):
+        '''
+        Pontos que, se virarem obstáculo, invalidam o caminho: os do próprio
+        caminho e, nos passos diagonais, as duas quinas (não é permitido
+        cortar quina de obstáculo).
+        '''
+        indice = self.grade.indice
+        pontos = {indice(linha, coluna) for linha, coluna in caminho}
+        for (l1, c1), (l2, c2) in zip(caminho, caminho[1:]):
+            if l1 != l2 and c1 != c2:
+                pontos.add(indice(l1, c2))
+                pontos.add(indice(l2, c1))
+        return pontos
+
+    def _remover(self, chave):
+        resultado = self._resultados.pop(chave)
+        for indice in self._pontos_usados(resultado.caminho):
+            chaves = self._por_ponto[indice]
+            chaves.discard(chave)
+            if not chaves:
+                del self._por_ponto[indice]
+
+    def limpar(self):
+        '''
+        Descarta todos os resultados guardados.
+        '''
+        self._resultados.clear()
+        self._por_ponto.clear()
+        self.versao += 1
+
+    def marcar_alteracao(self, indice):
+        '''
+        Ouvinte de grade.ao_alterar. Um obstáculo novo invalida apenas os
+        caminhos que dependem do ponto; qualquer outra alteração (inclusive
+        a da grade inteira, indice None) descarta o cache inteiro.
+        '''
+        if indice is None or not self.grade.obstaculo_plano[indice]:
+            self.limpar()
+            return
+        for chave in list(self._por_ponto.get(indice, ())):
+            self._remover(chave)
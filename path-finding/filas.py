@@ -0,0 +1,208 @@
+"""
+Filas de prioridade utilizadas como lista de nós abertos pelos buscadores.
+"""
+from heapq import heappush, heappop
+
+
+# -----------------------------------------------------------------------
+# FILA DE PRIORIDADE COM HEAP BINÁRIO
+# -----------------------------------------------------------------------
+class FilaHeap:
+    '''
+    Lista de nós abertos baseada em heapq, sem as travas do
+    queue.PriorityQueue. Quando um nó melhora seu valor de f ele é
+    simplesmente inserido de novo (decrease-key preguiçoso): a entrada antiga
+    continua no heap e cabe ao buscador descartá-la ao removê-la (como ela
+    tem f maior, o nó já terá sido fechado pela entrada nova).
+    Empates de prioridade são desfeitos por um contador de inserção, de modo
+    que nós com o mesmo f saem na ordem em que entraram e os próprios nós
+    nunca precisam ser comparados.
+    '''
+
+    def __init__(self):
+        self._heap = []
+        self._contador = 0
+
+    def inserir(self, prioridade, item):
+        '''
+        Insere um item na fila.
+        Parâmetros:
+            prioridade (int): valor de f do item.
+            item: nó a ser inserido.
+        '''
+        self._contador += 1
+        heappush(self._heap, (prioridade, self._contador, item))
+
+    def remover(self):
+        '''
+        Remove o item de menor prioridade.
+        Retorno:
+            tuple: (prioridade, item).
+        '''
+        prioridade, _, item = heappop(self._heap)
+        return prioridade, item
+
+    def consultar(self):
+        '''
+        Consulta, sem remover, o item de menor prioridade.
+        Retorno:
+            tuple: (prioridade, item).
+        '''
+        prioridade, _, item = self._heap[0]
+        return prioridade, item
+
+    def menor_prioridade(self):
+        '''
+        Consulta, sem remover, a menor prioridade da fila. Pode ser a de uma
+        entrada obsoleta, que nunca é maior que a do menor item válido.
+        Retorno:
+            int: menor prioridade.
+        '''
+        return self._heap[0][0]
+
+    def insercoes(self):
+        '''
+        Total de inserções feitas na fila até agora.
+        '''
+        return self._contador
+
+    def operacoes(self):
+        '''
+        Total de inserções e remoções feitas na fila até agora.
+        '''
+        return 2 * self._contador - len(self._heap)
+
+    def __len__(self):
+        return len(self._heap)
+
+    def __bool__(self):
+        return bool(self._heap)
+
+
+# -----------------------------------------------------------------------
+# FILA DE BALDES (DIAL)
+# -----------------------------------------------------------------------
+class FilaBaldes:
+    '''
+    Lista de nós abertos para prioridades inteiras: um balde (lista) por
+    valor de f e um cursor no menor balde ocupado. Inserir e remover custam
+    O(1), já que em um A* com custos inteiros e heurística consistente o f
+    dos nós removidos nunca diminui e cresce em passos pequenos, e o cursor
+    só anda alguns baldes de cada vez. Se a distância até o próximo balde
+    ocupado for grande (heurísticas inconsistentes) o cursor salta direto
+    para a menor chave.
+    Mesma interface e o mesmo decrease-key preguiçoso da FilaHeap, mas os
+    empates de prioridade saem na ordem inversa da inserção, o que favorece
+    os nós mais próximos do fim.
+    '''
+
+    # Baldes vazios percorridos um a um antes de buscar a menor chave:
+    LIMITE_VARREDURA = 64
+
+    def __init__(self):
+        self._baldes = {}
+        # Nenhum balde ocupado tem prioridade menor que o cursor:
+        self._menor = 0
+        self._tamanho = 0
+        self._contador = 0
+
+    def inserir(self, prioridade, item):
+        '''
+        Insere um item na fila.
+        Parâmetros:
+            prioridade (int): valor de f do item.
+            item: nó a ser inserido.
+        '''
+        self._contador += 1
+        self._tamanho += 1
+        balde = self._baldes.get(prioridade)
+        if balde is None:
+            self._baldes[prioridade] = [item]
+            if prioridade < self._menor or self._tamanho == 1:
+                self._menor = prioridade
+        else:
+            balde.append(item)
+
+    def _avancar(self):
+        '''
+        Leva o cursor até o menor balde ocupado.
+        Retorno:
+            list: o balde.
+        '''
+        if not self._tamanho:
+            raise IndexError('fila vazia')
+        baldes = self._baldes
+        menor = self._menor
+        for _ in range(self.LIMITE_VARREDURA):
+            menor += 1
+            if menor in baldes:
+                break
+        else:
+            menor = min(baldes)
+        self._menor = menor
+        return baldes[menor]
+
+    def remover(self):
+        '''
+        Remove o item de menor prioridade.
+        Retorno:
+            tuple: (prioridade, item).
+        '''
+        balde = self._baldes.get(self._menor)
+        if balde is None:
+            balde = self._avancar()
+        prioridade = self._menor
+        item = balde.pop()
+        if not balde:
+            del self._baldes[prioridade]
+        self._tamanho -= 1
+        return prioridade, item
+
+    def consultar(self):
+        '''
+        Consulta, sem remover, o item de menor prioridade.
+        Retorno:
+            tuple: (prioridade, item).
+        '''
+        balde = self._baldes.get(self._menor)
+        if balde is None:
+            balde = self._avancar()
+        return self._menor, balde[-1]
+
+    def menor_prioridade(self):
+        '''
+        Consulta, sem remover, a menor prioridade da fila.
+        Retorno:
+            int: menor prioridade.
+        '''
+        return self.consultar()[0]
+
+    def insercoes(self):
+        '''
+        Total de inserções feitas na fila até agora.
+        '''
+        return self._contador
+
+    def operacoes(self):
+        '''
+        Total de inserções e remoções feitas na fila até agora.
+        '''
+        return 2 * self._contador - self._tamanho
+
+    def __len__(self):
+        return self._tamanho
+
+    def __bool__(self):
+        return self._tamanho > 0
+
+
+def nova_fila(prioridades_inteiras):
+    '''
+    Escolhe a lista de nós abertos de uma busca.
+    Parâmetro:
+        prioridades_inteiras (bool): se todos os valores de f serão
+            inteiros (custos e heurística inteiros).
+    Retorno:
+        FilaBaldes ou FilaHeap: fila vazia.
+    '''
+    return FilaBaldes() if prioridades_inteiras else FilaHeap()
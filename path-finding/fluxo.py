@@ -0,0 +1,315 @@
+"""
+Campos de fluxo para muitos agentes indo para o mesmo destino.
+Uma única busca de Dijkstra, feita do fim para trás, calcula a distância de
+cada ponto da grade até o fim e a direção do primeiro passo de um caminho
+ótimo. Cada agente só precisa seguir as direções a partir da sua posição,
+em tempo proporcional ao tamanho do caminho.
+Os campos ficam registrados em grade.ao_alterar e, quando obstáculos ou
+custos mudam, são reparados na consulta seguinte: apenas os pontos cujo
+caminho passava pela região alterada são recalculados.
+"""
+from array import array
+from collections import OrderedDict, deque
+from heapq import heappush, heappop
+
+import numpy as np
+
+from grade import INFINITO
+
+# Direção dos pontos sem próximo passo (o fim e os inalcançáveis). As
+# demais são os bits de movimento da grade: BAIXO = 0, CIMA = 1, ...
+SEM_DIRECAO = 255
+
+# Deslocamento (linha, coluna) de cada direção, na ordem dos bits:
+_PASSOS = ((1, 0), (-1, 0), (0, 1), (0, -1),
+           (1, 1), (1, -1), (-1, 1), (-1, -1))
+
+
+class CampoFluxo:
+    '''
+    Distâncias e direções de todos os pontos até um fim fixo.
+    Atributos:
+        pos_fim (tuple): posição do fim.
+        distancias (ndarray): LxC, custo do caminho ótimo de cada ponto até
+            o fim (INFINITO se inalcançável).
+        direcoes (ndarray): LxC (uint8), direção do primeiro passo de cada
+            ponto (SEM_DIRECAO no fim e nos inalcançáveis).
+    '''
+
+    def __init__(self, grade, pos_fim):
+        self.grade = grade
+        self.pos_fim = tuple(pos_fim)
+        self.fim = grade.indice(*pos_fim)
+        qtd_colunas = grade.qtd_colunas
+        self._deslocamentos = [dl * qtd_colunas + dc for dl, dc in _PASSOS]
+        # Direção pelo deslocamento (linha, coluna): em grades com até duas
+        # colunas os deslocamentos de índice se repetem entre direções.
+        self._direcao_de = {passo: k for k, passo in enumerate(_PASSOS)}
+
+        self._distancia = array('i', [INFINITO]) * grade.tamanho
+        self._direcao = bytearray([SEM_DIRECAO]) * grade.tamanho
+        formato = (grade.qtd_linhas, qtd_colunas)
+        self.distancias = np.frombuffer(
+            self._distancia, dtype=np.int32).reshape(formato)
+        self.direcoes = np.frombuffer(
+            self._direcao, dtype=np.uint8).reshape(formato)
+        self._alterados = set()
+
+        if not grade.obstaculo_plano[self.fim]:
+            self._distancia[self.fim] = 0
+            if grade.custo_uniforme():
+                self._largura()
+            else:
+                self._propagar([(0, self.fim)])
+
+        grade.ao_alterar.append(self.marcar_alteracao)
+
+    def desconectar(self):
+        '''
+        Deixa de acompanhar as alterações da grade.
+        '''
+        self.grade.ao_alterar.remove(self.marcar_alteracao)
+
+    def marcar_alteracao(self, indice):
+        '''
+        Ouvinte de grade.ao_alterar: anota o ponto alterado (todos, quando
+        indice é None) para o reparo feito na próxima consulta.
+        '''
+        if indice is None:
+            self._alterados.update(range(self.grade.tamanho))
+        else:
+            self._alterados.add(indice)
+
+    # -------------------------------------------------------------------
+    # Consultas
+    # -------------------------------------------------------------------
+    def distancia(self, pos):
+        '''
+        Retorno:
+            int: custo do caminho ótimo de pos até o fim (infinito se não
+            há caminho).
+        '''
+        self.atualizar()
+        distancia = self._distancia[self.grade.indice(*pos)]
+        return float("inf") if distancia == INFINITO else distancia
+
+    def proximo(self, pos):
+        '''
+        Retorno:
+            tuple: próxima posição de um caminho ótimo de pos até o fim, ou
+            None no fim e nos pontos sem caminho.
+        '''
+        self.atualizar()
+        direcao = self._direcao[self.grade.indice(*pos)]
+        if direcao == SEM_DIRECAO:
+            return None
+        dl, dc = _PASSOS[direcao]
+        return pos[0] + dl, pos[1] + dc
+
+    def caminho(self, pos_inicio):
+        '''
+        Segue as direções de pos_inicio até o fim.
+        Retorno:
+            list: posições (linha, coluna) do início até o fim, ou vazia se
+            não há caminho.
+        '''
+        self.atualizar()
+        grade = self.grade
+        indice = grade.indice(*pos_inicio)
+        if self._distancia[indice] == INFINITO:
+            return []
+        direcao = self._direcao
+        deslocamentos = self._deslocamentos
+        nos = [indice]
+        while indice != self.fim:
+            indice += deslocamentos[direcao[indice]]
+            nos.append(indice)
+        return [grade.posicao(i) for i in nos]
+
+    # -------------------------------------------------------------------
+    # Cálculo e reparo
+    # -------------------------------------------------------------------
+    def _largura(self):
+        '''
+        Cálculo inicial em grades de custo uniforme: uma busca em largura
+        a partir do fim dá as mesmas distâncias que o Dijkstra.
+        '''
+        distancia = self._distancia
+        direcao = self._direcao
+        direcao_de = self._direcao_de
+        vizinhos = self.grade.vizinhos
+        qtd_colunas = self.grade.qtd_colunas
+        fila = deque([self.fim])
+        while fila:
+            atual = fila.popleft()
+            linha, coluna = divmod(atual, qtd_colunas)
+            nova = distancia[atual] + 1
+            for vizinho in vizinhos(atual):
+                if distancia[vizinho] == INFINITO:
+                    distancia[vizinho] = nova
+                    linha_v, coluna_v = divmod(vizinho, qtd_colunas)
+                    direcao[vizinho] = direcao_de[linha - linha_v,
+                                                  coluna - coluna_v]
+                    fila.append(vizinho)
+
+    def _propagar(self, heap):
+        '''
+        Dijkstra para trás: ir de um vizinho v até o ponto atual custa o
+        custo de entrada do ponto atual. Só diminui distâncias.
+        Parâmetro:
+            heap (list): (distância, índice) dos pontos de partida.
+        '''
+        distancia = self._distancia
+        direcao = self._direcao
+        direcao_de = self._direcao_de
+        vizinhos = self.grade.vizinhos
+        custo = self.grade.custo_plano
+        qtd_colunas = self.grade.qtd_colunas
+        while heap:
+            d, atual = heappop(heap)
+            if d > distancia[atual]:
+                continue
+            linha, coluna = divmod(atual, qtd_colunas)
+            nova = d + custo[atual]
+            for vizinho in vizinhos(atual):
+                if nova < distancia[vizinho]:
+                    distancia[vizinho] = nova
+                    linha_v, coluna_v = divmod(vizinho, qtd_colunas)
+                    direcao[vizinho] = direcao_de[linha - linha_v,
+                                                  coluna - coluna_v]
+                    heappush(heap, (nova, vizinho))
+
+    def _filhos(self, indice):
+        '''
+        Pontos cuja direção aponta para indice.
+        '''
+        grade = self.grade
+        linha, coluna = grade.posicao(indice)
+        direcao = self._direcao
+        filhos = []
+        for k, (dl, dc) in enumerate(_PASSOS):
+            if grade.contem(linha - dl, coluna - dc):
+                filho = indice - self._deslocamentos[k]
+                if direcao[filho] == k:
+                    filhos.append(filho)
+        return filhos
+
+    def atualizar(self):
+        '''
+        Repara o campo após as alterações anotadas. Primeiro são descartados
+        os pontos cujo caminho usava um passo que deixou de existir ou que
+        entrava em um ponto alterado (e, com eles, todos os que dependiam
+        deles); depois esses pontos e os vizinhos dos alterados, que podem
+        ter ganhado passos novos, recalculam a distância a partir dos
+        vizinhos e as melhorias são propagadas.
+        '''
+        if not self._alterados:
+            return
+        grade = self.grade
+        movimentos = grade.movimentos_plano
+        obstaculo = grade.obstaculo_plano
+        custo = grade.custo_plano
+        distancia = self._distancia
+        direcao = self._direcao
+        alterados = self._alterados
+        self._alterados = set()
+
+        regiao = set()
+        for indice in alterados:
+            linha, coluna = grade.posicao(indice)
+            for dl in (-1, 0, 1):
+                for dc in (-1, 0, 1):
+                    if grade.contem(linha + dl, coluna + dc):
+                        regiao.add(grade.indice(linha + dl, coluna + dc))
+
+        # Raízes: passo inválido ou que entra em um ponto alterado.
+        invalidos = set()
+        pilha = []
+        for indice in regiao:
+            k = direcao[indice]
+            if k == SEM_DIRECAO:
+                if indice == self.fim and obstaculo[indice]:
+                    pilha.append(indice)
+                continue
+            if obstaculo[indice] or not movimentos[indice] >> k & 1 \
+                    or indice + self._deslocamentos[k] in alterados:
+                pilha.append(indice)
+        while pilha:
+            indice = pilha.pop()
+            if indice in invalidos:
+                continue
+            invalidos.add(indice)
+            pilha.extend(self._filhos(indice))
+        for indice in invalidos:
+            distancia[indice] = INFINITO
+            direcao[indice] = SEM_DIRECAO
+
+        # Cada ponto a recalcular busca o melhor vizinho ainda válido:
+        heap = []
+        if not obstaculo[self.fim] and distancia[self.fim] != 0:
+            distancia[self.fim] = 0
+            heap.append((0, self.fim))
+        direcao_de = self._direcao_de
+        for indice in invalidos | regiao:
+            if obstaculo[indice] or indice == self.fim:
+                continue
+            linha, coluna = grade.posicao(indice)
+            for vizinho in grade.vizinhos(indice):
+                if distancia[vizinho] == INFINITO:
+                    continue
+                nova = distancia[vizinho] + custo[vizinho]
+                if nova < distancia[indice]:
+                    distancia[indice] = nova
+                    linha_v, coluna_v = grade.posicao(vizinho)
+                    direcao[indice] = direcao_de[linha_v - linha,
+                                                 coluna_v - coluna]
+            if distancia[indice] != INFINITO:
+                heap.append((distancia[indice], indice))
+        # A fila também precisa dos pontos da região que já estavam certos,
+        # para oferecer os passos novos aos seus vizinhos:
+        heap.sort()
+        self._propagar(heap)
+
+
+class CacheCampos:
+    '''
+    Campos de fluxo dos últimos destinos usados, descartando o menos
+    recente quando a capacidade é atingida.
+    '''
+
+    def __init__(self, grade, capacidade=16):
+        self.grade = grade
+        self.capacidade = capacidade
+        self._campos = OrderedDict()
+
+    def campo(self, pos_fim):
+        '''
+        Retorno:
+            CampoFluxo: campo do destino, calculado se necessário.
+        '''
+        pos_fim = tuple(pos_fim)
+        campo = self._campos.get(pos_fim)
+        if campo is None:
+            if len(self._campos) >= self.capacidade:
+                self._campos.popitem(last=False)[1].desconectar()
+            campo = self._campos[pos_fim] = CampoFluxo(self.grade, pos_fim)
+        else:
+            self._campos.move_to_end(pos_fim)
+        return campo
+
+    def caminhos(self, posicoes, pos_fim):
+        '''
+        Caminhos de vários agentes até o mesmo destino.
+        Parâmetros:
+            posicoes (iterable): posições (linha, coluna) dos agentes.
+            pos_fim (tuple): destino comum.
+        Retorno:
+            list: um caminho (lista de posições) por agente.
+        '''
+        campo = self.campo(pos_fim)
+        return [campo.caminho(pos) for pos in posicoes]
+
+    def limpar(self):
+        for campo in self._campos.values():
+            campo.desconectar()
+        self._campos.clear()
@@ -0,0 +1,343 @@
+"""
+Grade compacta utilizada pelos buscadores.
+Em vez de um objeto Python por ponto, a grade guarda cada atributo em um
+vetor contíguo (estrutura de vetores): obstáculo, custo, g, pai e estado.
+Cada vetor existe em duas formas que compartilham a mesma memória: um
+buffer Python (bytearray/array), de acesso rápido item a item pelos laços
+dos buscadores, e uma visão NumPy LxC para operações vetorizadas.
+Os pontos são identificados pelo índice linha * qtd_colunas + coluna.
+A adjacência também fica guardada: cada ponto tem uma máscara de bits com
+os movimentos permitidos a partir dele, e a grade conta seus obstáculos e
+os pontos com custo diferente de 1.
+Ambos são atualizados localmente a cada edição feita pelos setters, de
+modo que nenhuma busca precisa percorrer a grade inteira para começar.
+"""
+from array import array
+
+import numpy as np
+
+# Código de cada estado guardado no vetor 'estado' da grade:
+VAZIO, FECHADO, ABERTO, INICIO, FIM, OBSTACULO, CAMINHO = range(7)
+
+# Valor de 'g' dos pontos ainda não alcançados e 'pai' dos pontos sem pai:
+INFINITO = 2 ** 31 - 1
+SEM_PAI = -1
+
+# Bits da máscara de movimentos de cada ponto, na ordem em que vizinhos()
+# devolve os pontos:
+(BAIXO, CIMA, DIREITA, ESQUERDA,
+ BAIXO_DIREITA, BAIXO_ESQUERDA, CIMA_DIREITA, CIMA_ESQUERDA) = \
+    (1 << bit for bit in range(8))
+
+# Abaixo desta fração da grade, limpar_busca restaura só os pontos tocados
+# pela busca anterior em vez de preencher os vetores inteiros:
+FRACAO_LIMPEZA_LOCAL = 1 / 16
+
+
+def mascaras_movimentos(obstaculo, diagonais):
+    '''
+    Calcula, com NumPy, a máscara de movimentos de cada ponto de uma
+    matriz de obstáculos, tratando o que está fora dela como obstáculo.
+    Parâmetros:
+        obstaculo (ndarray): matriz LxC, diferente de zero nos obstáculos.
+        diagonais (bool): incluir os movimentos diagonais.
+    Retorno:
+        ndarray: matriz LxC (uint8) com as máscaras.
+    '''
+    qtd_linhas, qtd_colunas = obstaculo.shape
+    # Borda de obstáculos em volta da matriz, para que os deslocamentos
+    # não precisem de testes de limite:
+    livre = np.zeros((qtd_linhas + 2, qtd_colunas + 2), bool)
+    livre[1:-1, 1:-1] = obstaculo == 0
+
+    def deslocado(dl, dc):
+        return livre[1 + dl:qtd_linhas + 1 + dl, 1 + dc:qtd_colunas + 1 + dc]
+
+    baixo, cima = deslocado(1, 0), deslocado(-1, 0)
+    direita, esquerda = deslocado(0, 1), deslocado(0, -1)
+    movimentos = [baixo, cima, direita, esquerda]
+    if diagonais:
+        movimentos += [baixo & direita & deslocado(1, 1),
+                       baixo & esquerda & deslocado(1, -1),
+                       cima & direita & deslocado(-1, 1),
+                       cima & esquerda & deslocado(-1, -1)]
+
+    mascara = np.zeros((qtd_linhas, qtd_colunas), np.uint8)
+    for bit, permitido in enumerate(movimentos):
+        mascara |= permitido.astype(np.uint8) << bit
+    return mascara
+
+
+def deslocamentos_por_mascara(qtd_colunas):
+    '''
+    Para cada máscara possível, os deslocamentos de índice dos movimentos
+    que ela permite, na ordem dos bits.
+    Retorno:
+        list: 256 tuplas de deslocamentos.
+    '''
+    deslocamentos = (qtd_colunas, -qtd_colunas, 1, -1,
+                     qtd_colunas + 1, qtd_colunas - 1,
+                     -qtd_colunas + 1, -qtd_colunas - 1)
+    return [tuple(d for bit, d in enumerate(deslocamentos)
+                  if mascara >> bit & 1)
+            for mascara in range(256)]
+
+
+class Grade:
+    '''
+    Grade MxN de pontos com obstáculos e custos de entrada por ponto.
+    Também guarda o estado (g e pai) da última busca feita sobre ela.
+    Com diagonais=True cada ponto também se liga aos 4 vizinhos diagonais,
+    desde que os dois vizinhos ortogonais do movimento estejam livres (não
+    é permitido "cortar quina" de obstáculo).
+    Estruturas derivadas da grade (abstrações, caches) podem registrar uma
+    função em ao_alterar para serem avisadas, com o índice do ponto, sempre
+    que um obstáculo ou custo for alterado pelos setters.
+    Quem escrever obstáculos ou custos diretamente nos vetores (por
+    exemplo, em bloco com NumPy) deve chamar recalcular_movimentos() em
+    seguida. Como nesse caso (e na troca de diagonais) qualquer ponto pode
+    ter mudado, os ouvintes recebem None no lugar do índice.
+    Atributos:
+        movimentos (ndarray): máscara de movimentos permitidos de cada ponto
+            (bits BAIXO, CIMA, ..., CIMA_ESQUERDA).
+        qtd_obstaculos (int): quantidade de obstáculos da grade.
+        qtd_custos_especiais (int): quantidade de pontos com custo
+            diferente de 1.
+        obstaculo_transposto_plano (bytearray): obstáculos coluna a coluna
+            (índice coluna * qtd_linhas + linha), para quem percorre as
+            colunas como trechos contíguos (ver jps.py).
+    '''
+
+    def __init__(self, qtd_linhas, qtd_colunas=None, diagonais=False):
+        if qtd_colunas is None:
+            qtd_colunas = qtd_linhas
+        self.qtd_linhas = qtd_linhas
+        self.qtd_colunas = qtd_colunas
+        self.tamanho = qtd_linhas * qtd_colunas
+        self.ao_alterar = []
+        # Pontos com g ou pai escritos pela última busca (None: desconhecido)
+        self._tocados = None
+
+        self._por_mascara = deslocamentos_por_mascara(qtd_colunas)
+
+        # Buffers planos, um item por ponto:
+        self.obstaculo_plano = bytearray(self.tamanho)
+        self.obstaculo_transposto_plano = bytearray(self.tamanho)
+        self.custo_plano = bytearray(b'\x01') * self.tamanho
+        self.estado_plano = bytearray(self.tamanho)
+        self.g_plano = array('i', [INFINITO]) * self.tamanho
+        self.pai_plano = array('i', [SEM_PAI]) * self.tamanho
+        self.movimentos_plano = bytearray(self.tamanho)
+
+        # Visões NumPy (LxC) sobre os mesmos buffers:
+        formato = (qtd_linhas, qtd_colunas)
+        self.obstaculo = np.frombuffer(
+            self.obstaculo_plano, dtype=np.uint8).reshape(formato)
+        self.obstaculo_transposto = np.frombuffer(
+            self.obstaculo_transposto_plano, dtype=np.uint8).reshape(
+                qtd_colunas, qtd_linhas)
+        self.custo = np.frombuffer(
+            self.custo_plano, dtype=np.uint8).reshape(formato)
+        self.estado = np.frombuffer(
+            self.estado_plano, dtype=np.uint8).reshape(formato)
+        self.g = np.frombuffer(self.g_plano, dtype=np.int32).reshape(formato)
+        self.pai = np.frombuffer(
+            self.pai_plano, dtype=np.int32).reshape(formato)
+        self.movimentos = np.frombuffer(
+            self.movimentos_plano, dtype=np.uint8).reshape(formato)
+
+        self._diagonais = diagonais
+        self.recalcular_movimentos()
+
+    @property
+    def diagonais(self):
+        return self._diagonais
+
+    @diagonais.setter
+    def diagonais(self, diagonais):
+        self._diagonais = diagonais
+        self.recalcular_movimentos()
+
+    # Conversões entre posição (linha, coluna) e índice:
+    def indice(self, linha, coluna):
+        return linha * self.qtd_colunas + coluna
+
+    def posicao(self, indice):
+        return divmod(indice, self.qtd_colunas)
+
+    def contem(self, linha, coluna):
+        return 0 <= linha < self.qtd_linhas and 0 <= coluna < self.qtd_colunas
+
+    # Getters:
+    def is_obstaculo(self, linha, coluna):
+        return bool(self.obstaculo_plano[self.indice(linha, coluna)])
+
+    def get_estado(self, indice):
+        return self.estado_plano[indice]
+
+    def get_g(self, indice):
+        return self.g_plano[indice]
+
+    def custo_uniforme(self):
+        return self.qtd_custos_especiais == 0
+
+    # Setters:
+    def set_estado(self, indice, estado):
+        '''
+        Altera o estado de um ponto. Apenas o estado OBSTACULO bloqueia a
+        passagem; qualquer outro estado libera o ponto.
+        Parâmetros:
+            indice (int): índice do ponto.
+            estado (int): um dos códigos VAZIO, FECHADO, ABERTO, ...
+        '''
+        self.estado_plano[indice] = estado
+        obstaculo = estado == OBSTACULO
+        if self.obstaculo_plano[indice] != obstaculo:
+            self.obstaculo_plano[indice] = obstaculo
+            linha, coluna = divmod(indice, self.qtd_colunas)
+            self.obstaculo_transposto_plano[
+                coluna * self.qtd_linhas + linha] = obstaculo
+            self.qtd_obstaculos += 1 if obstaculo else -1
+            self._atualizar_movimentos(indice)
+            self._avisar_alteracao(indice)
+
+    def set_obstaculo(self, linha, coluna):
+        self.set_estado(self.indice(linha, coluna), OBSTACULO)
+
+    def set_vazio(self, linha, coluna):
+        self.set_estado(self.indice(linha, coluna), VAZIO)
+
+    def set_custo(self, linha, coluna, custo):
+        indice = self.indice(linha, coluna)
+        anterior = self.custo_plano[indice]
+        if anterior != custo:
+            self.custo_plano[indice] = custo
+            self.qtd_custos_especiais += (custo != 1) - (anterior != 1)
+            self._avisar_alteracao(indice)
+
+    def _avisar_alteracao(self, indice):
+        for ouvinte in self.ao_alterar:
+            ouvinte(indice)
+
+    # Adjacência:
+    def recalcular_movimentos(self):
+        '''
+        Recalcula, com NumPy, as máscaras de movimentos de todos os pontos e
+        as contagens de obstáculos e de custos especiais, e a cópia
+        transposta dos obstáculos. Necessário apenas depois de escrever os
+        obstáculos ou custos diretamente nos vetores. Os ouvintes de
+        ao_alterar são avisados com None: a grade inteira pode ter mudado.
+        '''
+        self.obstaculo_transposto[:] = self.obstaculo.T
+        self.movimentos[:] = mascaras_movimentos(self.obstaculo,
+                                                 self.diagonais)
+        self.qtd_obstaculos = int(np.count_nonzero(self.obstaculo))
+        self.qtd_custos_especiais = int(np.count_nonzero(self.custo != 1))
+        self._avisar_alteracao(None)
+
+    def _mascara(self, indice):
+        '''
+        Máscara de movimentos permitidos a partir de um ponto.
+        '''
+        obstaculo = self.obstaculo_plano
+        qtd_colunas = self.qtd_colunas
+        linha, coluna = divmod(indice, qtd_colunas)
+
+        baixo = linha < self.qtd_linhas - 1 \
+            and not obstaculo[indice + qtd_colunas]
+        cima = linha > 0 and not obstaculo[indice - qtd_colunas]
+        direita = coluna < qtd_colunas - 1 and not obstaculo[indice + 1]
+        esquerda = coluna > 0 and not obstaculo[indice - 1]
+        mascara = (baixo and BAIXO) | (cima and CIMA) \
+            | (direita and DIREITA) | (esquerda and ESQUERDA)
+
+        if self.diagonais:
+            if baixo and direita \
+                    and not obstaculo[indice + qtd_colunas + 1]:
+                mascara |= BAIXO_DIREITA
+            if baixo and esquerda \
+                    and not obstaculo[indice + qtd_colunas - 1]:
+                mascara |= BAIXO_ESQUERDA
+            if cima and direita and not obstaculo[indice - qtd_colunas + 1]:
+                mascara |= CIMA_DIREITA
+            if cima and esquerda and not obstaculo[indice - qtd_colunas - 1]:
+                mascara |= CIMA_ESQUERDA
+
+        return mascara
+
+    def _atualizar_movimentos(self, indice):
+        '''
+        Um ponto que vira (ou deixa de ser) obstáculo só muda os movimentos
+        dos pontos da sua vizinhança 3x3: os que entram nele e, com
+        diagonais, os que passam rente a ele.
+        '''
+        linha, coluna = divmod(indice, self.qtd_colunas)
+        for linha_vizinha in range(max(linha - 1, 0),
+                                   min(linha + 2, self.qtd_linhas)):
+            for coluna_vizinha in range(max(coluna - 1, 0),
+                                        min(coluna + 2, self.qtd_colunas)):
+                vizinho = linha_vizinha * self.qtd_colunas + coluna_vizinha
+                self.movimentos_plano[vizinho] = self._mascara(vizinho)
+
+    # Outros Métodos:
+    def vizinhos(self, indice):
+        '''
+        Lista os pontos vizinhos (baixo, cima, direita, esquerda e, se
+        habilitadas, as diagonais) que existem e não são obstáculos, a
+        partir da máscara de movimentos guardada do ponto.
+        Parâmetro:
+            indice (int): índice do ponto em questão.
+        Retorno:
+            list: índices dos vizinhos livres.
+        '''
+        return [indice + deslocamento for deslocamento
+                in self._por_mascara[self.movimentos_plano[indice]]]
+
+    def limpar_busca(self):
+        '''
+        Descarta o g e o pai deixados pela busca anterior. Se ela registrou
+        os pontos que tocou (ver registrar_busca), só esses pontos são
+        restaurados; caso contrário os vetores inteiros são preenchidos.
+        '''
+        tocados = self._tocados
+        self._tocados = None
+        if tocados is not None:
+            g = self.g_plano
+            pai = self.pai_plano
+            for indice in tocados:
+                g[indice] = INFINITO
+                pai[indice] = SEM_PAI
+        else:
+            self.g.fill(INFINITO)
+            self.pai.fill(SEM_PAI)
+
+    def registrar_busca(self, *pontos):
+        '''
+        Informa os únicos pontos cujo g ou pai a busca atual escreveu desde
+        limpar_busca(), para que a próxima limpeza seja local. Uma busca que
+        não registra nada faz a próxima limpeza preencher a grade inteira.
+        Parâmetro:
+            pontos (iterable): coleções de índices (por exemplo, as listas
+                de abertos e fechados).
+        '''
+        # Muitos pontos: preencher os vetores inteiros sai mais barato.
+        if sum(map(len, pontos)) < self.tamanho * FRACAO_LIMPEZA_LOCAL:
+            self._tocados = [indice for grupo in pontos for indice in grupo]
+        else:
+            self._tocados = None
+
+    def reconstruir_caminho(self, indice):
+        '''
+        Segue o vetor de pais a partir de um ponto até o início da busca.
+        Parâmetro:
+            indice (int): índice do ponto final.
+        Retorno:
+            list: posições (linha, coluna) do início até o ponto final.
+        '''
+        pai = self.pai_plano
+        caminho = []
+        while indice != SEM_PAI:
+            caminho.append(self.posicao(indice))
+            indice = pai[indice]
+        caminho.reverse()
+        return caminho
@@ -0,0 +1,368 @@
+"""
+Grade guardada em disco para mapas maiores que a memória.
+Os obstáculos ficam em um arquivo mapeado em memória (mmap), um bit por
+ponto, divididos em ladrilhos quadrados gravados um após o outro. Um
+ladrilho só é lido (desempacotado para um byte por ponto, junto com as
+máscaras de movimentos dos seus pontos) quando a busca chega nele, e apenas
+os últimos ladrilhos usados ficam em memória.
+O estado da busca também é esparso: g e pai são dicionários com apenas os
+pontos alcançados, então a memória cresce com a área explorada e não com o
+tamanho do mapa. A GradeMapeada oferece a mesma interface que o
+busca_A_estrela usa da Grade, e pode ser passada diretamente para ele; os
+demais buscadores dependem dos vetores completos da Grade.
+Formato do arquivo: um cabeçalho de 64 bytes (assinatura, versão, linhas,
+colunas, lado do ladrilho e diagonais) seguido dos ladrilhos, em ordem de
+linha, cada um com lado * lado bits (1 = obstáculo). Os pontos dos
+ladrilhos da borda que ficam fora do mapa são gravados como obstáculos.
+"""
+from collections import OrderedDict
+import struct
+
+import numpy as np
+
+from grade import INFINITO, SEM_PAI, deslocamentos_por_mascara, \
+    mascaras_movimentos
+from terrenos import OBSTACULO_POR_BYTE, ler_dimensoes
+
+ASSINATURA = b'GRDM'
+VERSAO = 1
+_CABECALHO = struct.Struct('<4sHIIHB')
+TAMANHO_CABECALHO = 64
+
+
+class _Esparso(dict):
+    '''
+    Dicionário que devolve um valor padrão para chaves ausentes sem
+    guardá-las, usado como g e pai esparsos da busca.
+    '''
+
+    def __init__(self, padrao):
+        super().__init__()
+        self.padrao = padrao
+
+    def __missing__(self, chave):
+        return self.padrao
+
+
+class _CustoUniforme:
+    '''
+    Custo de entrada 1 em todos os pontos (o arquivo não guarda custos).
+    '''
+
+    def __getitem__(self, indice):
+        return 1
+
+
+class GradeMapeada:
+    '''
+    Grade de obstáculos apoiada em um arquivo de ladrilhos empacotados.
+    Atributos:
+        qtd_linhas, qtd_colunas (int): dimensões do mapa.
+        lado (int): lado de cada ladrilho, múltiplo de 8.
+        diagonais (bool): se os movimentos diagonais estão habilitados.
+        g_plano, pai_plano (dict): estado esparso da última busca.
+        ladrilhos_lidos (int): ladrilhos desempacotados até agora.
+    '''
+
+    def __init__(self, arquivo, gravavel=False, capacidade=256):
+        '''
+        Abre um arquivo criado por criar(), de_grade() ou de_mapa().
+        Parâmetros:
+            arquivo (str): caminho do arquivo.
+            gravavel (bool): permitir set_obstaculo e set_vazio.
+            capacidade (int): ladrilhos mantidos em memória ao mesmo tempo.
+        '''
+        with open(arquivo, 'rb') as entrada:
+            cabecalho = entrada.read(TAMANHO_CABECALHO)
+        assinatura, versao, qtd_linhas, qtd_colunas, lado, diagonais = \
+            _CABECALHO.unpack_from(cabecalho)
+        if assinatura != ASSINATURA or versao != VERSAO:
+            raise ValueError(f'{arquivo}: não é uma grade mapeada.')
+
+        self.qtd_linhas = qtd_linhas
+        self.qtd_colunas = qtd_colunas
+        self.tamanho = qtd_linhas * qtd_colunas
+        self.lado = lado
+        self.diagonais = bool(diagonais)
+        self.capacidade = capacidade
+        self.ladrilhos_lidos = 0
+
+        self._ladrilhos_por_linha = -(-qtd_colunas // lado)
+        self._bytes_ladrilho = lado * lado // 8
+        self._bits = np.memmap(arquivo, dtype=np.uint8,
+                               mode='r+' if gravavel else 'r',
+                               offset=TAMANHO_CABECALHO)
+        self._cache = OrderedDict()
+        self._por_mascara = deslocamentos_por_mascara(qtd_colunas)
+
+        self.custo_plano = _CustoUniforme()
+        self.g_plano = _Esparso(INFINITO)
+        self.pai_plano = _Esparso(SEM_PAI)
+
+    # -------------------------------------------------------------------
+    # Criação
+    # -------------------------------------------------------------------
+    @classmethod
+    def criar(cls, arquivo, qtd_linhas, qtd_colunas=None, lado=256,
+              diagonais=False):
+        '''
+        Cria um arquivo de grade sem obstáculos. O arquivo é esparso no
+        disco: só ocupa espaço à medida que os ladrilhos são escritos.
+        Retorno:
+            GradeMapeada: a grade aberta para escrita.
+        '''
+        if qtd_colunas is None:
+            qtd_colunas = qtd_linhas
+        _criar_arquivo(arquivo, qtd_linhas, qtd_colunas, lado, diagonais)
+        grade = cls(arquivo, gravavel=True)
+        grade._bloquear_bordas()
+        return grade
+
+    @classmethod
+    def de_grade(cls, grade, arquivo, lado=256):
+        '''
+        Grava os obstáculos de uma Grade em um arquivo de grade mapeada.
+        '''
+        _criar_arquivo(arquivo, grade.qtd_linhas, grade.qtd_colunas, lado,
+                       grade.diagonais)
+        mapeada = cls(arquivo, gravavel=True)
+        for inicio in range(0, grade.qtd_linhas, lado):
+            mapeada._gravar_faixa(inicio,
+                                  grade.obstaculo[inicio:inicio + lado])
+        mapeada._bits.flush()
+        return mapeada
+
+    @classmethod
+    def de_mapa(cls, arquivo_mapa, arquivo, lado=256, diagonais=True):
+        '''
+        Converte um .map do MovingAI lendo uma faixa de 'lado' linhas por
+        vez, de modo que o mapa inteiro nunca fica em memória.
+        '''
+        with open(arquivo_mapa, 'rb') as entrada:
+            cabecalho = []
+            for linha in entrada:
+                if linha.strip() == b'map':
+                    break
+                cabecalho.append(linha)
+            else:
+                raise ValueError(f'{arquivo_mapa}: seção "map" não '
+                                 f'encontrada.')
+            qtd_linhas, qtd_colunas = ler_dimensoes(cabecalho, arquivo_mapa)
+
+            _criar_arquivo(arquivo, qtd_linhas, qtd_colunas, lado, diagonais)
+            mapeada = cls(arquivo, gravavel=True)
+            for inicio in range(0, qtd_linhas, lado):
+                faixa = [entrada.readline().rstrip(b'\r\n')[:qtd_colunas]
+                         for _ in range(min(lado, qtd_linhas - inicio))]
+                if any(len(linha) < qtd_colunas for linha in faixa):
+                    raise ValueError(f'{arquivo_mapa}: mapa menor que '
+                                     f'{qtd_linhas}x{qtd_colunas}.')
+                pontos = np.frombuffer(b''.join(faixa), dtype=np.uint8)
+                mapeada._gravar_faixa(inicio, OBSTACULO_POR_BYTE[
+                    pontos].reshape(len(faixa), qtd_colunas))
+        mapeada._bits.flush()
+        return mapeada
+
+    def _gravar_faixa(self, linha_inicio, obstaculos):
+        '''
+        Empacota e grava uma faixa de linhas que começa no início de uma
+        linha de ladrilhos. As partes fora do mapa viram obstáculos.
+        '''
+        lado = self.lado
+        faixa = np.ones((lado, self._ladrilhos_por_linha * lado), np.uint8)
+        faixa[:obstaculos.shape[0], :self.qtd_colunas] = obstaculos
+        linha_ladrilho = linha_inicio // lado
+        for coluna_ladrilho in range(self._ladrilhos_por_linha):
+            bloco = faixa[:, coluna_ladrilho * lado:
+                          (coluna_ladrilho + 1) * lado]
+            inicio = self._inicio_ladrilho(linha_ladrilho, coluna_ladrilho)
+            self._bits[inicio:inicio + self._bytes_ladrilho] = \
+                np.packbits(bloco)
+        self._cache.clear()
+
+    def _bloquear_bordas(self):
+        '''
+        Marca como obstáculo a parte dos ladrilhos da borda que fica fora
+        do mapa.
+        '''
+        lado = self.lado
+        ultima_linha = (self.qtd_linhas - 1) // lado
+        ultima_coluna = self._ladrilhos_por_linha - 1
+        bordas = {(ultima_linha, tc) for tc in range(ultima_coluna + 1)} \
+            | {(tl, ultima_coluna) for tl in range(ultima_linha + 1)}
+        for tl, tc in bordas:
+            bloco = np.unpackbits(self._ler(tl, tc)).reshape(lado, lado)
+            bloco[self.qtd_linhas - tl * lado:, :] = 1
+            bloco[:, self.qtd_colunas - tc * lado:] = 1
+            inicio = self._inicio_ladrilho(tl, tc)
+            self._bits[inicio:inicio + self._bytes_ladrilho] = \
+                np.packbits(bloco)
+        self._bits.flush()
+        self._cache.clear()
+
+    # -------------------------------------------------------------------
+    # Ladrilhos
+    # -------------------------------------------------------------------
+    def _inicio_ladrilho(self, linha_ladrilho, coluna_ladrilho):
+        return (linha_ladrilho * self._ladrilhos_por_linha
+                + coluna_ladrilho) * self._bytes_ladrilho
+
+    def _ler(self, linha_ladrilho, coluna_ladrilho):
+        inicio = self._inicio_ladrilho(linha_ladrilho, coluna_ladrilho)
+        return self._bits[inicio:inicio + self._bytes_ladrilho]
+
+    def _ladrilho(self, linha_ladrilho, coluna_ladrilho):
+        '''
+        Obstáculos e máscaras de movimentos de um ladrilho, um byte por
+        ponto. As máscaras só valem para os pontos que não estão na beirada
+        do ladrilho, cuja vizinhança está inteira nele. Os ladrilhos
+        desempacotados ficam em uma cache LRU de 'capacidade' itens.
+        Retorno:
+            tuple: (obstaculos, mascaras), dois bytearray.
+        '''
+        chave = (linha_ladrilho, coluna_ladrilho)
+        ladrilho = self._cache.get(chave)
+        if ladrilho is None:
+            obstaculos = np.unpackbits(
+                self._ler(linha_ladrilho, coluna_ladrilho))
+            mascaras = mascaras_movimentos(
+                obstaculos.reshape(self.lado, self.lado), self.diagonais)
+            ladrilho = (bytearray(obstaculos.tobytes()),
+                        bytearray(mascaras.tobytes()))
+            self.ladrilhos_lidos += 1
+            if len(self._cache) >= self.capacidade:
+                self._cache.popitem(last=False)
+            self._cache[chave] = ladrilho
+        else:
+            self._cache.move_to_end(chave)
+        return ladrilho
+
+    def ladrilhos_em_memoria(self):
+        return len(self._cache)
+
+    # -------------------------------------------------------------------
+    # Interface da Grade
+    # -------------------------------------------------------------------
+    def indice(self, linha, coluna):
+        return linha * self.qtd_colunas + coluna
+
+    def posicao(self, indice):
+        return divmod(indice, self.qtd_colunas)
+
+    def contem(self, linha, coluna):
+        return 0 <= linha < self.qtd_linhas and 0 <= coluna < self.qtd_colunas
+
+    def is_obstaculo(self, linha, coluna):
+        linha_ladrilho, linha_local = divmod(linha, self.lado)
+        coluna_ladrilho, coluna_local = divmod(coluna, self.lado)
+        return bool(self._ladrilho(linha_ladrilho, coluna_ladrilho)[0][
+            linha_local * self.lado + coluna_local])
+
+    def _livre(self, linha, coluna):
+        return self.contem(linha, coluna) \
+            and not self.is_obstaculo(linha, coluna)
+
+    def set_obstaculo(self, linha, coluna):
+        self._gravar(linha, coluna, 1)
+
+    def set_vazio(self, linha, coluna):
+        self._gravar(linha, coluna, 0)
+
+    def _gravar(self, linha, coluna, obstaculo):
+        lado = self.lado
+        linha_ladrilho, linha_local = divmod(linha, lado)
+        coluna_ladrilho, coluna_local = divmod(coluna, lado)
+        byte, bit = divmod(linha_local * lado + coluna_local, 8)
+        posicao = self._inicio_ladrilho(linha_ladrilho, coluna_ladrilho) \
+            + byte
+        if obstaculo:
+            self._bits[posicao] |= 0x80 >> bit
+        else:
+            self._bits[posicao] &= ~(0x80 >> bit) & 0xFF
+        # As máscaras do ladrilho mudam: ele é relido no próximo acesso.
+        self._cache.pop((linha_ladrilho, coluna_ladrilho), None)
+
+    def salvar(self):
+        '''
+        Garante que as alterações foram escritas no arquivo.
+        '''
+        self._bits.flush()
+
+    def vizinhos(self, indice):
+        '''
+        Lista os pontos vizinhos livres, na mesma ordem e com as mesmas
+        regras de Grade.vizinhos. Quando o ponto não está na beirada do seu
+        ladrilho, basta a máscara de movimentos guardada no ladrilho.
+        '''
+        qtd_colunas = self.qtd_colunas
+        lado = self.lado
+        linha, coluna = divmod(indice, qtd_colunas)
+        linha_ladrilho, linha_local = divmod(linha, lado)
+        coluna_ladrilho, coluna_local = divmod(coluna, lado)
+
+        if 0 < linha_local < lado - 1 and 0 < coluna_local < lado - 1:
+            mascaras = self._ladrilho(linha_ladrilho, coluna_ladrilho)[1]
+            mascara = mascaras[linha_local * lado + coluna_local]
+            return [indice + deslocamento
+                    for deslocamento in self._por_mascara[mascara]]
+
+        def livre(dl, dc):
+            return self._livre(linha + dl, coluna + dc)
+
+        vizinhos = []
+        baixo = livre(1, 0)
+        if baixo:
+            vizinhos.append(indice + qtd_colunas)
+        cima = livre(-1, 0)
+        if cima:
+            vizinhos.append(indice - qtd_colunas)
+        direita = livre(0, 1)
+        if direita:
+            vizinhos.append(indice + 1)
+        esquerda = livre(0, -1)
+        if esquerda:
+            vizinhos.append(indice - 1)
+
+        if self.diagonais:
+            if baixo and direita and livre(1, 1):
+                vizinhos.append(indice + qtd_colunas + 1)
+            if baixo and esquerda and livre(1, -1):
+                vizinhos.append(indice + qtd_colunas - 1)
+            if cima and direita and livre(-1, 1):
+                vizinhos.append(indice - qtd_colunas + 1)
+            if cima and esquerda and livre(-1, -1):
+                vizinhos.append(indice - qtd_colunas - 1)
+
+        return vizinhos
+
+    def limpar_busca(self):
+        self.g_plano.clear()
+        self.pai_plano.clear()
+
+    def registrar_busca(self, *pontos):
+        '''
+        O estado esparso já é limpo por inteiro em limpar_busca.
+        '''
+
+    def reconstruir_caminho(self, indice):
+        pai = self.pai_plano
+        caminho = []
+        while indice != SEM_PAI:
+            caminho.append(self.posicao(indice))
+            indice = pai[indice]
+        caminho.reverse()
+        return caminho
+
+
+def _criar_arquivo(arquivo, qtd_linhas, qtd_colunas, lado, diagonais):
+    '''
+    Cria o arquivo com o cabeçalho e espaço (esparso) para os ladrilhos.
+    '''
+    if lado % 8:
+        raise ValueError('O lado do ladrilho deve ser múltiplo de 8.')
+    qtd_ladrilhos = -(-qtd_linhas // lado) * -(-qtd_colunas // lado)
+    with open(arquivo, 'wb') as saida:
+        saida.write(_CABECALHO.pack(ASSINATURA, VERSAO, qtd_linhas,
+                                    qtd_colunas, lado, int(diagonais))
+                    .ljust(TAMANHO_CABECALHO, b'\0'))
+        saida.truncate(TAMANHO_CABECALHO + qtd_ladrilhos * lado * lado // 8)
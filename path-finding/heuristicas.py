@@ -0,0 +1,247 @@
+"""
+Heurísticas utilizadas pelo buscador de caminhos.
+Este módulo não depende do pygame e pode ser importado tanto pela
+interface gráfica quanto por processos sem tela (headless).
+"""
+from array import array
+from functools import lru_cache
+
+import numpy as np
+
+
+# -----------------------------------------------------------------------
+# HEURÍSTICAS
+# -----------------------------------------------------------------------
+def manhattan(p1, p2):  # -> Admissível
+    '''
+    Heurística 01: Manhattan. Será utilizada a distância de Manhattan como
+    uma das heurísticas adimissíveis.
+    Parâmetros:
+        p1 (tuple): posição inicial, de onde quer sair.
+        p2 (tuple): posição final, para onde quer ir.
+    Retorno:
+        int: distância 'Manhattan' entre p1 e p2.
+    '''
+    x1, y1 = p1
+    x2, y2 = p2
+    return abs(x1 - x2) + abs(y1 - y2)
+
+
+def chebyshev(p1, p2):  # -> Admissível
+    '''
+    Heurística 02: Chebyshev. Retona a maior entre as diferenças
+    de X e Y de dois pontos.
+    Parâmetros:
+        p1 (tuple): posição inicial, de onde quer sair.
+        p2 (tuple): posição final, para onde quer ir.
+    Retorno:
+        int: distância 'Chebyshev' entre p1 e p2.
+    '''
+    x1, y1 = p1
+    x2, y2 = p2
+    return max(abs(x1 - x2), abs(y1 - y2))
+
+
+def heuristica_inadmissivel(p1, p2):  # -> Inadmissível
+    '''
+    Heurística 03: Multiplica a distância de manhattan pela
+    distância de chebyshev.
+    Parâmetros:
+        p1 (tuple): posição inicial, de onde quer sair.
+        p2 (tuple): posição final, para onde quer ir.
+    Retorno:
+        int: distância "inventada" entre p1 e p2.
+    '''
+
+    return manhattan(p1, p2) * chebyshev(p1, p2)
+
+
+def heuristica_admissivel(diagonais):
+    '''
+    Escolhe a heurística admissível adequada à vizinhança da grade: com
+    movimentos diagonais de custo 1 a distância de Manhattan superestima,
+    e a de Chebyshev passa a ser a exata em uma grade sem obstáculos.
+    Parâmetro:
+        diagonais (bool): se a grade permite movimentos diagonais.
+    Retorno:
+        function: manhattan ou chebyshev.
+    '''
+    return chebyshev if diagonais else manhattan
+
+
+# -----------------------------------------------------------------------
+# VERSÕES EM LOTE (NUMPY)
+# -----------------------------------------------------------------------
+def manhattan_lote(linhas, colunas, p2):
+    '''
+    Versão em lote da heurística de Manhattan.
+    Parâmetros:
+        linhas (ndarray): linhas dos pontos de origem.
+        colunas (ndarray): colunas dos pontos de origem (mesmo formato).
+        p2 (tuple): posição final, para onde quer ir.
+    Retorno:
+        ndarray: distância 'Manhattan' de cada ponto até p2.
+    '''
+    x2, y2 = p2
+    return np.abs(linhas - x2) + np.abs(colunas - y2)
+
+
+def chebyshev_lote(linhas, colunas, p2):
+    '''
+    Versão em lote da heurística de Chebyshev.
+    Parâmetros:
+        linhas (ndarray): linhas dos pontos de origem.
+        colunas (ndarray): colunas dos pontos de origem (mesmo formato).
+        p2 (tuple): posição final, para onde quer ir.
+    Retorno:
+        ndarray: distância 'Chebyshev' de cada ponto até p2.
+    '''
+    x2, y2 = p2
+    return np.maximum(np.abs(linhas - x2), np.abs(colunas - y2))
+
+
+def heuristica_inadmissivel_lote(linhas, colunas, p2):
+    '''
+    Versão em lote da heurística inadmissível.
+    Parâmetros:
+        linhas (ndarray): linhas dos pontos de origem.
+        colunas (ndarray): colunas dos pontos de origem (mesmo formato).
+        p2 (tuple): posição final, para onde quer ir.
+    Retorno:
+        ndarray: distância "inventada" de cada ponto até p2.
+    '''
+    return manhattan_lote(linhas, colunas, p2) \
+        * chebyshev_lote(linhas, colunas, p2)
+
+
+# Versão em lote de cada heurística escalar:
+VERSOES_LOTE = {
+    manhattan: manhattan_lote,
+    chebyshev: chebyshev_lote,
+    heuristica_inadmissivel: heuristica_inadmissivel_lote,
+}
+
+
+def heuristica_inteira(heuristica):
+    '''
+    Informa se a heurística só produz valores inteiros, o que (com os custos
+    inteiros da grade) permite usar a FilaBaldes na busca. Além das
+    heurísticas deste módulo, valem objetos com o atributo inteira = True.
+    '''
+    return heuristica in VERSOES_LOTE or getattr(heuristica, 'inteira', False)
+
+
+# -----------------------------------------------------------------------
+# HEURÍSTICA POR ÍNDICE DA GRADE
+# -----------------------------------------------------------------------
+@lru_cache(maxsize=8)
+def campo_heuristico(heuristica, pos_fim, qtd_linhas, qtd_colunas):
+    '''
+    Calcula de uma só vez, com NumPy, a heurística de todos os pontos da
+    grade até pos_fim. Os últimos campos calculados ficam em cache,
+    indexados pela heurística, pelo objetivo e pelo tamanho da grade.
+    Parâmetros:
+        heuristica (function): uma das heurísticas de VERSOES_LOTE.
+        pos_fim (tuple): posição final, para onde quer ir.
+        qtd_linhas (int): número de linhas da grade.
+        qtd_colunas (int): número de colunas da grade.
+    Retorno:
+        array: valor da heurística para cada índice da grade.
+    '''
+    linhas, colunas = np.indices((qtd_linhas, qtd_colunas), dtype=np.int64)
+    campo = VERSOES_LOTE[heuristica](linhas, colunas, pos_fim)
+    return array('q', campo.astype(np.int64).tobytes())
+
+
+def heuristica_por_indice(heuristica, pos_fim, qtd_linhas, qtd_colunas,
+                          campo=False, reverso=False):
+    '''
+    Adapta uma heurística h(p1, p2) para receber o índice de um ponto.
+    Por padrão a heurística é calculada sob demanda, apenas para os nós
+    que a busca alcança. Com campo=True (e se houver versão em lote) é
+    usado o campo pré-calculado e cacheado por objetivo, que compensa
+    quando várias buscas vão para o mesmo pos_fim.
+    Parâmetros:
+        heuristica (function): heurística h(p1, p2) entre duas posições.
+        pos_fim (tuple): posição final, para onde quer ir.
+        qtd_linhas (int): número de linhas da grade.
+        qtd_colunas (int): número de colunas da grade.
+        campo (bool): usar o campo pré-calculado.
+        reverso (bool): estimar a distância de pos_fim até cada ponto, e
+            não de cada ponto até pos_fim (as buscas que partem do fim
+            precisam disso quando a heurística não é simétrica).
+    Retorno:
+        function: h(indice).
+    '''
+    # Heurísticas com tabelas próprias (como a HeuristicaMarcos) sabem
+    # gerar sua versão por índice:
+    if hasattr(heuristica, 'por_indice'):
+        return heuristica.por_indice(pos_fim, campo, reverso)
+
+    # As heurísticas com versão em lote são todas simétricas:
+    if campo and heuristica in VERSOES_LOTE:
+        return campo_heuristico(
+            heuristica, tuple(pos_fim), qtd_linhas, qtd_colunas).__getitem__
+
+    if reverso:
+        def h(indice):
+            return heuristica(pos_fim, divmod(indice, qtd_colunas))
+    else:
+        def h(indice):
+            return heuristica(divmod(indice, qtd_colunas), pos_fim)
+
+    return h
+
+
+@lru_cache(maxsize=8)
+def campo_mais_proximo(heuristica, posicoes_fim, qtd_linhas, qtd_colunas):
+    '''
+    Como campo_heuristico, mas com o menor valor da heurística entre vários
+    fins em cada ponto.
+    Parâmetros:
+        heuristica (function): uma das heurísticas de VERSOES_LOTE.
+        posicoes_fim (tuple): posições finais candidatas.
+        qtd_linhas (int): número de linhas da grade.
+        qtd_colunas (int): número de colunas da grade.
+    Retorno:
+        array: valor da heurística para cada índice da grade.
+    '''
+    linhas, colunas = np.indices((qtd_linhas, qtd_colunas), dtype=np.int64)
+    lote = VERSOES_LOTE[heuristica]
+    campo = lote(linhas, colunas, posicoes_fim[0])
+    for pos_fim in posicoes_fim[1:]:
+        np.minimum(campo, lote(linhas, colunas, pos_fim), out=campo)
+    return array('q', campo.astype(np.int64).tobytes())
+
+
+def heuristica_mais_proxima(heuristica, posicoes_fim, qtd_linhas,
+                            qtd_colunas, campo=False):
+    '''
+    Heurística por índice para buscas com vários fins: o menor valor entre
+    os fins. O mínimo de heurísticas admissíveis (ou consistentes) também é
+    admissível (ou consistente) para a distância até o fim mais próximo.
+    Parâmetros:
+        heuristica (function): heurística h(p1, p2) entre duas posições.
+        posicoes_fim (tuple): posições finais candidatas.
+        qtd_linhas (int): número de linhas da grade.
+        qtd_colunas (int): número de colunas da grade.
+        campo (bool): usar o campo pré-calculado; sem ele, cada avaliação
+            custa uma chamada por fim.
+    Retorno:
+        function: h(indice).
+    '''
+    posicoes_fim = tuple(tuple(p) for p in posicoes_fim)
+    if campo and heuristica in VERSOES_LOTE:
+        return campo_mais_proximo(
+            heuristica, posicoes_fim, qtd_linhas, qtd_colunas).__getitem__
+
+    por_fim = [heuristica_por_indice(heuristica, pos_fim, qtd_linhas,
+                                     qtd_colunas, campo)
+               for pos_fim in posicoes_fim]
+    if len(por_fim) == 1:
+        return por_fim[0]
+
+    def h(indice):
+        return min([h_fim(indice) for h_fim in por_fim])
+
+    return h
@@ -0,0 +1,506 @@
+"""
+Busca hierárquica de caminhos (HPA*).
+A grade é dividida em clusters quadrados. Nas bordas entre clusters
+vizinhos são escolhidas entradas (pares de pontos livres, um de cada lado),
+e os custos dos caminhos entre as entradas de um mesmo cluster são
+pré-calculados. Uma consulta liga o início e o fim às entradas dos seus
+clusters, faz uma busca pequena nesse grafo abstrato e, por fim, refina
+cada trecho seguindo as árvores de caminhos mínimos locais, guardadas junto
+com os custos de cada cluster.
+O caminho obtido é quase ótimo: as entradas são um subconjunto dos pontos
+de borda, então o custo pode ficar um pouco acima do real. Alterações na
+grade reconstroem apenas os clusters afetados.
+"""
+from array import array
+from collections import deque
+from heapq import heappush, heappop
+
+from busca import ResultadoBusca
+from filas import nova_fila
+from grade import BAIXO, BAIXO_DIREITA, BAIXO_ESQUERDA, CIMA, CIMA_DIREITA, \
+    CIMA_ESQUERDA, DIREITA, ESQUERDA, INFINITO, deslocamentos_por_mascara
+from heuristicas import heuristica_admissivel, heuristica_inteira, \
+    heuristica_por_indice
+
+# Segmentos de borda a partir deste tamanho ganham duas entradas (uma em
+# cada ponta) em vez de uma só no meio:
+TAMANHO_ENTRADA_DUPLA = 6
+
+# Valor das árvores de caminhos locais na raiz e nos pontos inalcançáveis:
+SEM_MOVIMENTO = 255
+
+
+class BuscaHierarquica:
+    '''
+    Abstração HPA* de uma Grade. É construída uma vez e depois atende a
+    quantas consultas forem necessárias através de buscar(). Fica registrada
+    em grade.ao_alterar, de modo que edições de obstáculos (como as feitas
+    pelos cliques do mouse no main) marcam os clusters afetados, que são
+    reconstruídos na consulta seguinte. Uma abstração descartada antes da
+    grade deve ser desligada com desconectar().
+    '''
+
+    def __init__(self, grade, tamanho_cluster=16, heuristica=None):
+        self.grade = grade
+        self.tamanho_cluster = tamanho_cluster
+        self.heuristica = heuristica or heuristica_admissivel(grade.diagonais)
+        self.qtd_linhas_clusters = -(-grade.qtd_linhas // tamanho_cluster)
+        self.qtd_colunas_clusters = -(-grade.qtd_colunas // tamanho_cluster)
+
+        # Entradas de cada borda: (cluster_a, cluster_b) -> [(a, b), ...]
+        self._transicoes = {}
+        # Arestas entre clusters e dentro de cada cluster: no -> {no: custo}
+        self._inter = {}
+        self._intra = {}
+        # Por cluster: adjacência local e árvores das entradas (ver
+        # _adjacencia_local e _dijkstra_local):
+        self._locais = {}
+        self._arvores = {}
+        # Movimentos de cada máscara, por largura de cluster:
+        self._passos = {}
+        self._sujos = set()
+
+        for cluster in self._clusters():
+            for borda in self._bordas(cluster):
+                if borda[0] == cluster:
+                    self._calcular_borda(borda)
+        for cluster in self._clusters():
+            self._calcular_cluster(cluster)
+
+        grade.ao_alterar.append(self.marcar_alteracao)
+
+    def desconectar(self):
+        '''
+        Deixa de acompanhar as alterações da grade.
+        '''
+        self.grade.ao_alterar.remove(self.marcar_alteracao)
+
+    # -------------------------------------------------------------------
+    # Clusters
+    # -------------------------------------------------------------------
+    def _clusters(self):
+        for linha in range(self.qtd_linhas_clusters):
+            for coluna in range(self.qtd_colunas_clusters):
+                yield linha, coluna
+
+    def cluster_de(self, indice):
+        linha, coluna = self.grade.posicao(indice)
+        return linha // self.tamanho_cluster, coluna // self.tamanho_cluster
+
+    def _limites(self, cluster):
+        '''
+        Retorno:
+            tuple: (linha_min, linha_max, coluna_min, coluna_max), com os
+            máximos exclusivos.
+        '''
+        tamanho = self.tamanho_cluster
+        linha, coluna = cluster
+        return (linha * tamanho,
+                min((linha + 1) * tamanho, self.grade.qtd_linhas),
+                coluna * tamanho,
+                min((coluna + 1) * tamanho, self.grade.qtd_colunas))
+
+    def _bordas(self, cluster):
+        '''
+        Bordas do cluster com seus vizinhos de baixo, cima, direita e
+        esquerda, sempre na forma (cluster_menor, cluster_maior).
+        '''
+        linha, coluna = cluster
+        if linha + 1 < self.qtd_linhas_clusters:
+            yield cluster, (linha + 1, coluna)
+        if linha > 0:
+            yield (linha - 1, coluna), cluster
+        if coluna + 1 < self.qtd_colunas_clusters:
+            yield cluster, (linha, coluna + 1)
+        if coluna > 0:
+            yield (linha, coluna - 1), cluster
+
+    def _nos(self, cluster):
+        '''
+        Nós abstratos (entradas) que pertencem ao cluster.
+        '''
+        nos = set()
+        for borda in self._bordas(cluster):
+            lado = 0 if borda[0] == cluster else 1
+            for transicao in self._transicoes.get(borda, ()):
+                nos.add(transicao[lado])
+        return nos
+
+    # -------------------------------------------------------------------
+    # Construção da abstração
+    # -------------------------------------------------------------------
+    def _calcular_borda(self, borda):
+        '''
+        Recalcula as entradas de uma borda, trocando as arestas entre
+        clusters correspondentes.
+        '''
+        grade = self.grade
+        obstaculo = grade.obstaculo_plano
+        custo = grade.custo_plano
+
+        for a, b in self._transicoes.get(borda, ()):
+            self._inter.get(a, {}).pop(b, None)
+            self._inter.get(b, {}).pop(a, None)
+
+        cluster_a, cluster_b = borda
+        linha_min, linha_max, coluna_min, coluna_max = self._limites(cluster_a)
+        if cluster_a[0] != cluster_b[0]:
+            # Borda horizontal: última linha de a e primeira linha de b.
+            pares = [(grade.indice(linha_max - 1, coluna),
+                      grade.indice(linha_max, coluna))
+                     for coluna in range(coluna_min, coluna_max)]
+        else:
+            # Borda vertical: última coluna de a e primeira coluna de b.
+            pares = [(grade.indice(linha, coluna_max - 1),
+                      grade.indice(linha, coluna_max))
+                     for linha in range(linha_min, linha_max)]
+
+        # Segmentos contínuos em que os dois lados estão livres:
+        transicoes = []
+        segmento = []
+        for par in pares + [None]:
+            if par is not None \
+                    and not obstaculo[par[0]] and not obstaculo[par[1]]:
+                segmento.append(par)
+                continue
+            if len(segmento) >= TAMANHO_ENTRADA_DUPLA:
+                transicoes += [segmento[0], segmento[-1]]
+            elif segmento:
+                transicoes.append(segmento[len(segmento) // 2])
+            segmento = []
+
+        for a, b in transicoes:
+            self._inter.setdefault(a, {})[b] = custo[b]
+            self._inter.setdefault(b, {})[a] = custo[a]
+        self._transicoes[borda] = transicoes
+
+    def _calcular_cluster(self, cluster):
+        '''
+        Recalcula os custos dos caminhos entre todas as entradas do cluster
+        (sem sair dele). A adjacência do cluster e a árvore de caminhos
+        mínimos de cada entrada ficam guardadas para o refinamento.
+        '''
+        limites = self._limites(cluster)
+        local = self._locais[cluster] = self._adjacencia_local(limites)
+        nos = self._nos(cluster)
+        arestas = {}
+        arvores = {}
+        for no in nos:
+            distancias, arvores[no] = self._dijkstra_local(
+                self._local(no, limites), local)
+            arestas[no] = {}
+            for outro in nos:
+                distancia = distancias[self._local(outro, limites)]
+                if outro != no and distancia != INFINITO:
+                    arestas[no][outro] = distancia
+        self._intra[cluster] = arestas
+        self._arvores[cluster] = arvores
+
+    def marcar_alteracao(self, indice):
+        '''
+        Marca o cluster de um ponto alterado para ser reconstruído na
+        próxima consulta. Registrada em grade.ao_alterar.
+        Parâmetro:
+            indice (int): índice do ponto alterado; None marca todos os
+                clusters.
+        '''
+        if indice is None:
+            self._sujos.update(self._clusters())
+        else:
+            self._sujos.add(self.cluster_de(indice))
+
+    def _reconstruir_sujos(self):
+        '''
+        Reconstrói as bordas dos clusters alterados e as arestas internas
+        deles e dos vizinhos que compartilham essas bordas.
+        '''
+        afetados = set()
+        bordas = set()
+        for cluster in self._sujos:
+            afetados.add(cluster)
+            for borda in self._bordas(cluster):
+                bordas.add(borda)
+                afetados.update(borda)
+        for borda in bordas:
+            self._calcular_borda(borda)
+        for cluster in afetados:
+            self._calcular_cluster(cluster)
+        self._sujos.clear()
+
+    # -------------------------------------------------------------------
+    # Buscas locais (dentro de um cluster)
+    # -------------------------------------------------------------------
+    def _local(self, indice, limites):
+        '''
+        Índice de um ponto dentro do seu cluster (linha a linha).
+        '''
+        linha, coluna = divmod(indice, self.grade.qtd_colunas)
+        return (linha - limites[0]) * (limites[3] - limites[2]) \
+            + coluna - limites[2]
+
+    def _global(self, local, limites):
+        '''
+        Índice na grade de um ponto dado pelo índice dentro do cluster.
+        '''
+        linha, coluna = divmod(local, limites[3] - limites[2])
+        return (linha + limites[0]) * self.grade.qtd_colunas \
+            + coluna + limites[2]
+
+    def _adjacencia_local(self, limites):
+        '''
+        Adjacência de um cluster, sem sair dele, em índices locais: as
+        máscaras de movimentos da grade sem os bits que cruzam a borda do
+        cluster, e os custos dos pontos. É montada junto com o cluster e
+        reaproveitada pelas buscas locais até ele ser reconstruído.
+        Parâmetro:
+            limites (tuple): limites do cluster, como em _limites.
+        Retorno:
+            tuple: (mascaras, custos, passos, uniforme), com mascaras e
+            custos (bytes) por índice local, passos (list) com, para cada
+            máscara, os pares (bit, deslocamento local) dos movimentos, e
+            uniforme (bool) se todos os custos do cluster são 1.
+        '''
+        grade = self.grade
+        linha_min, linha_max, coluna_min, coluna_max = limites
+        mascaras = grade.movimentos[linha_min:linha_max,
+                                    coluna_min:coluna_max].copy()
+        mascaras[0, :] &= 0xFF ^ (CIMA | CIMA_DIREITA | CIMA_ESQUERDA)
+        mascaras[-1, :] &= 0xFF ^ (BAIXO | BAIXO_DIREITA | BAIXO_ESQUERDA)
+        mascaras[:, 0] &= 0xFF ^ (ESQUERDA | BAIXO_ESQUERDA | CIMA_ESQUERDA)
+        mascaras[:, -1] &= 0xFF ^ (DIREITA | BAIXO_DIREITA | CIMA_DIREITA)
+        custos = grade.custo[linha_min:linha_max,
+                             coluna_min:coluna_max].tobytes()
+        return (mascaras.tobytes(), custos,
+                self._passos_locais(coluna_max - coluna_min),
+                custos.count(1) == len(custos))
+
+    def _passos_locais(self, largura):
+        '''
+        Pares (bit, deslocamento) de cada máscara em um cluster com a
+        largura dada (só há duas larguras: a normal e a da última coluna
+        de clusters).
+        '''
+        passos = self._passos.get(largura)
+        if passos is None:
+            deslocamentos = deslocamentos_por_mascara(largura)[255]
+            passos = self._passos[largura] = [
+                tuple((bit, d) for bit, d in enumerate(deslocamentos)
+                      if mascara >> bit & 1)
+                for mascara in range(256)]
+        return passos
+
+    def _dijkstra_local(self, origem, local, reverso=False):
+        '''
+        Dijkstra a partir de 'origem' sem sair de um cluster, em índices
+        locais.
+        Parâmetros:
+            origem (int): índice local do ponto de partida.
+            local (tuple): adjacência do cluster (ver _adjacencia_local).
+            reverso (bool): calcula as distâncias de cada ponto ATÉ a
+                origem (cada aresta custa a entrada no ponto de onde sai).
+        Retorno:
+            tuple: (distancias, arvore) por índice local: distancias
+            (array) vale INFINITO nos pontos inalcançáveis, e arvore
+            (bytearray) guarda o bit do movimento que chegou a cada ponto
+            (SEM_MOVIMENTO na origem e nos inalcançáveis), como usado por
+            _seguir.
+        '''
+        mascaras, custo, passos, uniforme = local
+        distancias = array('i', [INFINITO]) * len(mascaras)
+        arvore = bytearray([SEM_MOVIMENTO]) * len(mascaras)
+        distancias[origem] = 0
+        if uniforme:
+            # Com custo uniforme, uma busca em largura dá as mesmas
+            # distâncias (como em fluxo.py):
+            fila = deque([origem])
+            while fila:
+                atual = fila.popleft()
+                nova = distancias[atual] + 1
+                for bit, deslocamento in passos[mascaras[atual]]:
+                    vizinho = atual + deslocamento
+                    if distancias[vizinho] == INFINITO:
+                        distancias[vizinho] = nova
+                        arvore[vizinho] = bit
+                        fila.append(vizinho)
+            return distancias, arvore
+
+        fila = [(0, origem)]
+        while fila:
+            distancia, atual = heappop(fila)
+            if distancia > distancias[atual]:
+                continue
+            for bit, deslocamento in passos[mascaras[atual]]:
+                vizinho = atual + deslocamento
+                nova = distancia + (custo[atual] if reverso
+                                    else custo[vizinho])
+                if nova < distancias[vizinho]:
+                    distancias[vizinho] = nova
+                    arvore[vizinho] = bit
+                    heappush(fila, (nova, vizinho))
+        return distancias, arvore
+
+    def _seguir(self, arvore, limites, indice, alvo):
+        '''
+        Segue uma árvore de _dijkstra_local de um ponto até a raiz: na
+        árvore direta, é o caminho mínimo da raiz até o ponto, de trás para
+        frente; na reversa, o caminho mínimo do ponto até a raiz.
+        Parâmetros:
+            arvore (bytearray): árvore de _dijkstra_local.
+            limites (tuple): limites do cluster da árvore.
+            indice (int): índice (na grade) do ponto de partida.
+            alvo (int): índice (na grade) da raiz.
+        Retorno:
+            list: índices na grade, do ponto (inclusive) até a raiz
+            (exclusive).
+        '''
+        deslocamentos = self._passos_locais(limites[3] - limites[2])[255]
+        atual = self._local(indice, limites)
+        raiz = self._local(alvo, limites)
+        locais = []
+        while atual != raiz:
+            locais.append(atual)
+            atual -= deslocamentos[arvore[atual]][1]
+        return [self._global(local, limites) for local in locais]
+
+    # -------------------------------------------------------------------
+    # Consulta
+    # -------------------------------------------------------------------
+    def buscar(self, pos_inicio, pos_fim):
+        '''
+        Busca um caminho (quase ótimo) entre duas posições. O caminho não
+        passa por suavização: como só as entradas escolhidas ligam os
+        clusters, o custo pode ficar acima do ótimo (alguns por cento em
+        mapas com obstáculos espalhados; cerca de 8% no pior caso medido
+        em uma grade 512x512 com 15% de obstáculos). Quando o custo exato
+        importa, use busca_A_estrela.
+        Parâmetros:
+            pos_inicio (tuple): posição (linha, coluna) da qual parte-se.
+            pos_fim (tuple): posição (linha, coluna) na qual pretende-se
+                chegar.
+        Retorno:
+            ResultadoBusca: caminho completo; as listas de nós abertos e
+            fechados e as iterações se referem à busca abstrata.
+        '''
+        if self._sujos:
+            self._reconstruir_sujos()
+
+        grade = self.grade
+        inicio = grade.indice(*pos_inicio)
+        fim = grade.indice(*pos_fim)
+        if grade.obstaculo_plano[inicio] or grade.obstaculo_plano[fim]:
+            return ResultadoBusca(False, float("inf"), [], set(), set(), 0)
+
+        # Liga o início e o fim às entradas dos seus clusters:
+        cluster_inicio = self.cluster_de(inicio)
+        cluster_fim = self.cluster_de(fim)
+        limites_inicio = self._limites(cluster_inicio)
+        limites_fim = self._limites(cluster_fim)
+        saindo_do_inicio, arvore_inicio = self._dijkstra_local(
+            self._local(inicio, limites_inicio), self._locais[cluster_inicio])
+        chegando_ao_fim, arvore_fim = self._dijkstra_local(
+            self._local(fim, limites_fim), self._locais[cluster_fim],
+            reverso=True)
+
+        extras = {inicio: {}}
+        for no in self._nos(cluster_inicio):
+            distancia = saindo_do_inicio[self._local(no, limites_inicio)]
+            if distancia != INFINITO:
+                extras[inicio][no] = distancia
+        para_fim = {}
+        for no in self._nos(cluster_fim):
+            distancia = chegando_ao_fim[self._local(no, limites_fim)]
+            if distancia != INFINITO:
+                para_fim[no] = distancia
+        if cluster_inicio == cluster_fim:
+            distancia = saindo_do_inicio[self._local(fim, limites_inicio)]
+            if distancia != INFINITO:
+                extras[inicio][fim] = distancia
+
+        nos, custo, lista_abertos, lista_fechados, iteracoes = \
+            self._busca_abstrata(inicio, fim, extras, para_fim)
+        if nos is None:
+            return ResultadoBusca(False, float("inf"), [], lista_abertos,
+                                  lista_fechados, iteracoes)
+
+        # Refinamento: trechos dentro de um cluster seguem as árvores já
+        # calculadas (a do início, a reversa do fim ou a da entrada de onde
+        # o trecho sai); trechos entre clusters são um único passo.
+        caminho = [inicio]
+        for origem, destino in zip(nos, nos[1:]):
+            cluster = self.cluster_de(origem)
+            if cluster != self.cluster_de(destino):
+                caminho.append(destino)
+            elif origem == inicio:
+                caminho += reversed(self._seguir(
+                    arvore_inicio, limites_inicio, destino, origem))
+            elif destino == fim:
+                caminho += self._seguir(arvore_fim, limites_fim, origem,
+                                        fim)[1:]
+                caminho.append(fim)
+            else:
+                caminho += reversed(self._seguir(
+                    self._arvores[cluster][origem], self._limites(cluster),
+                    destino, origem))
+
+        return ResultadoBusca(True, custo, [grade.posicao(i) for i in caminho],
+                              lista_abertos, lista_fechados, iteracoes)
+
+    def _busca_abstrata(self, inicio, fim, extras, para_fim):
+        '''
+        A* sobre o grafo de entradas, acrescido das arestas temporárias que
+        ligam o início e o fim.
+        Retorno:
+            tuple: (nos, custo, lista_abertos, lista_fechados, iteracoes),
+            com nos = None se não há caminho.
+        '''
+        grade = self.grade
+        h = heuristica_por_indice(self.heuristica, grade.posicao(fim),
+                                  grade.qtd_linhas, grade.qtd_colunas)
+        qtd_colunas = grade.qtd_colunas
+        tamanho = self.tamanho_cluster
+        intra = self._intra
+        inter = self._inter
+        nenhuma = {}
+        g = {inicio: 0}
+        pais = {}
+        fila = nova_fila(heuristica_inteira(self.heuristica))
+        fila.inserir(0, inicio)
+        lista_abertos = {inicio}
+        lista_fechados = set()
+
+        iteracoes = 0
+        while fila:
+            atual = fila.remover()[1]
+            if atual in lista_fechados:
+                continue
+            iteracoes += 1
+            lista_abertos.discard(atual)
+            lista_fechados.add(atual)
+
+            if atual == fim:
+                nos = [fim]
+                while nos[-1] in pais:
+                    nos.append(pais[nos[-1]])
+                nos.reverse()
+                return nos, g[fim], lista_abertos, lista_fechados, iteracoes
+
+            linha, coluna = divmod(atual, qtd_colunas)
+            arestas = [intra[linha // tamanho, coluna // tamanho].get(
+                           atual, nenhuma),
+                       inter.get(atual, nenhuma),
+                       extras.get(atual, nenhuma)]
+            if atual in para_fim:
+                arestas.append({fim: para_fim[atual]})
+
+            g_atual = g[atual]
+            for vizinhos in arestas:
+                for vizinho, custo in vizinhos.items():
+                    temp_g = g_atual + custo
+                    if temp_g < g.get(vizinho, temp_g + 1):
+                        g[vizinho] = temp_g
+                        pais[vizinho] = atual
+                        fila.inserir(temp_g + h(vizinho), vizinho)
+                        lista_fechados.discard(vizinho)
+                        lista_abertos.add(vizinho)
+
+        return None, float("inf"), lista_abertos, lista_fechados, iteracoes
@@ -0,0 +1,302 @@
+"""
+Replanejamento incremental (D* Lite).
+A busca é feita do fim para o início e guarda seu estado (g, rhs e fila)
+entre uma chamada e outra. Quando obstáculos ou custos mudam, apenas os
+pontos cujas estimativas ficaram inconsistentes voltam para a fila, de modo
+que replanejar custa aproximadamente o tamanho da mudança, e não o tamanho
+da grade. O início também pode se mover (como um agente andando pelo
+caminho) sem que a busca precise recomeçar.
+"""
+from array import array
+
+from busca import ResultadoBusca
+from filas import FilaHeap
+from grade import INFINITO, SEM_PAI
+from heuristicas import heuristica_admissivel, heuristica_por_indice
+
+
+class BuscaIncremental:
+    '''
+    Planejador D* Lite de uma Grade, de um início até um fim fixo. Fica
+    registrado em grade.ao_alterar: as edições de obstáculos e custos (como
+    as feitas pelos cliques do mouse no main) são anotadas e reparadas na
+    chamada seguinte de buscar().
+    Os valores de g guardados são as distâncias de cada ponto até o fim;
+    rhs é a estimativa de um passo à frente, min(custo(s) + g(s)) entre os
+    vizinhos s. Um ponto está na fila enquanto g != rhs.
+    A heurística precisa ser consistente para o caminho ser ótimo.
+    '''
+
+    def __init__(self, grade, pos_inicio, pos_fim, heuristica=None):
+        self.grade = grade
+        self.heuristica = heuristica or heuristica_admissivel(grade.diagonais)
+        self.pos_inicio = tuple(pos_inicio)
+        self.pos_fim = tuple(pos_fim)
+        self.inicio = grade.indice(*pos_inicio)
+        self.fim = grade.indice(*pos_fim)
+        self._h = self._heuristica_ate(self.pos_inicio)
+        # Acúmulo das heurísticas dos movimentos do início, somado às chaves
+        # novas para que as antigas na fila continuem válidas:
+        self._km = 0
+
+        self.g = array('i', [INFINITO]) * grade.tamanho
+        self.rhs = array('i', [INFINITO]) * grade.tamanho
+        self._fila = FilaHeap()
+        # Chave atual de cada ponto na fila; entradas do heap com outra
+        # chave são obsoletas:
+        self._chaves = {}
+        self._obsoletas = 0
+        self._alterados = set()
+
+        if not grade.obstaculo_plano[self.fim]:
+            self.rhs[self.fim] = 0
+            self._inserir(self.fim)
+
+        grade.ao_alterar.append(self.marcar_alteracao)
+
+    def desconectar(self):
+        '''
+        Deixa de acompanhar as alterações da grade.
+        '''
+        self.grade.ao_alterar.remove(self.marcar_alteracao)
+
+    def _heuristica_ate(self, pos_inicio):
+        grade = self.grade
+        return heuristica_por_indice(self.heuristica, pos_inicio,
+                                     grade.qtd_linhas, grade.qtd_colunas,
+                                     reverso=True)
+
+    # -------------------------------------------------------------------
+    # Fila
+    # -------------------------------------------------------------------
+    def _chave(self, indice):
+        menor = min(self.g[indice], self.rhs[indice])
+        return menor + self._h(indice) + self._km, menor
+
+    def _inserir(self, indice):
+        chave = self._chave(indice)
+        self._chaves[indice] = chave
+        self._fila.inserir(chave, indice)
+
+    def _topo(self):
+        '''
+        Descarta as entradas obsoletas do topo da fila.
+        Retorno:
+            tuple: (chave, indice) do topo, ou None se a fila está vazia.
+        '''
+        fila = self._fila
+        chaves = self._chaves
+        while fila:
+            chave, indice = fila.consultar()
+            if chaves.get(indice) == chave:
+                return chave, indice
+            fila.remover()
+            self._obsoletas += 1
+        return None
+
+    # -------------------------------------------------------------------
+    # Atualizações
+    # -------------------------------------------------------------------
+    def _atualizar(self, indice):
+        '''
+        Recalcula o rhs de um ponto e o coloca na fila (ou o retira dela)
+        conforme ele esteja inconsistente ou não.
+        Retorno:
+            bool: se o ponto entrou na fila agora.
+        '''
+        grade = self.grade
+        if grade.obstaculo_plano[indice]:
+            rhs = INFINITO
+        elif indice == self.fim:
+            rhs = 0
+        else:
+            custo = grade.custo_plano
+            g = self.g
+            rhs = INFINITO
+            for vizinho in grade.vizinhos(indice):
+                if g[vizinho] + custo[vizinho] < rhs:
+                    rhs = g[vizinho] + custo[vizinho]
+        self.rhs[indice] = rhs
+
+        if self.g[indice] != rhs:
+            novo = indice not in self._chaves
+            self._inserir(indice)
+            return novo
+        self._chaves.pop(indice, None)
+        return False
+
+    def marcar_alteracao(self, indice):
+        '''
+        Ouvinte de grade.ao_alterar: anota o ponto alterado (todos, quando
+        indice é None) para a próxima chamada de buscar().
+        '''
+        if indice is None:
+            self._alterados.update(range(self.grade.tamanho))
+        else:
+            self._alterados.add(indice)
+
+    def _reparar_alterados(self):
+        '''
+        Um ponto alterado muda as arestas que entram e saem dele e, com
+        diagonais, as que passam rente a ele; todas ligam pontos da sua
+        vizinhança 3x3, cujos rhs são recalculados.
+        '''
+        grade = self.grade
+        afetados = set()
+        for indice in self._alterados:
+            linha, coluna = grade.posicao(indice)
+            for dl in (-1, 0, 1):
+                for dc in (-1, 0, 1):
+                    if grade.contem(linha + dl, coluna + dc):
+                        afetados.add(grade.indice(linha + dl, coluna + dc))
+        self._alterados.clear()
+        for indice in afetados:
+            self._atualizar(indice)
+
+    def mover_inicio(self, pos_inicio):
+        '''
+        Troca o ponto de partida (por exemplo, depois de o agente andar
+        alguns passos pelo caminho) sem descartar a busca.
+        Parâmetro:
+            pos_inicio (tuple): nova posição (linha, coluna) de partida.
+        '''
+        pos_inicio = tuple(pos_inicio)
+        self._km += self._h(self.grade.indice(*pos_inicio))
+        self.pos_inicio = pos_inicio
+        self.inicio = self.grade.indice(*pos_inicio)
+        self._h = self._heuristica_ate(pos_inicio)
+
+    # -------------------------------------------------------------------
+    # Busca
+    # -------------------------------------------------------------------
+    def buscar(self, ao_abrir=None, ao_fechar=None, ao_iterar=None,
+               instrumentos=None):
+        '''
+        Repara a busca após as alterações anotadas e devolve o caminho do
+        início até o fim. A primeira chamada faz a busca completa.
+        Parâmetros:
+            ao_abrir, ao_fechar, ao_iterar (function): callbacks opcionais,
+                como em busca_A_estrela. ao_iterar recebe os nós na fila
+                (uma visão das chaves, sem cópia, válida só durante a
+                chamada) e os expandidos nesta chamada.
+            instrumentos (Instrumentos): opcional, como em busca_A_estrela.
+                Aqui 'reaberturas' conta os nós subconsistentes (cuja
+                distância piorou e voltaram para a fila).
+        Retorno:
+            ResultadoBusca: resultado da busca; iteracoes conta apenas os
+            nós expandidos nesta chamada.
+        '''
+        if instrumentos is not None:
+            instrumentos.iniciar()
+        amostragem = instrumentos.amostragem if instrumentos is not None \
+            else 0
+        insercoes = self._fila.insercoes()
+        obsoletas = self._obsoletas
+
+        if self._alterados:
+            self._reparar_alterados()
+
+        if instrumentos is not None:
+            instrumentos.marcar('preparacao')
+
+        g = self.g
+        rhs = self.rhs
+        inicio = self.inicio
+        vizinhos = self.grade.vizinhos
+        lista_fechados = set()
+
+        iterador = 0
+        reaberturas = 0
+        topo = self._topo()
+        while topo is not None:
+            chave, atual = topo
+            if chave >= self._chave(inicio) and rhs[inicio] == g[inicio]:
+                break
+
+            iterador += 1
+            chave_nova = self._chave(atual)
+            if chave < chave_nova:
+                # A chave ficou desatualizada por um movimento do início:
+                self._inserir(atual)
+            elif g[atual] > rhs[atual]:
+                # Sobreconsistente: a estimativa melhorou.
+                g[atual] = rhs[atual]
+                del self._chaves[atual]
+                lista_fechados.add(atual)
+                if ao_fechar is not None:
+                    ao_fechar(atual)
+                for vizinho in vizinhos(atual):
+                    if self._atualizar(vizinho) and ao_abrir is not None:
+                        ao_abrir(vizinho)
+            else:
+                # Subconsistente: a estimativa piorou (obstáculo novo).
+                g[atual] = INFINITO
+                reaberturas += 1
+                lista_fechados.add(atual)
+                if ao_fechar is not None:
+                    ao_fechar(atual)
+                for vizinho in vizinhos(atual) + [atual]:
+                    if self._atualizar(vizinho) and ao_abrir is not None:
+                        ao_abrir(vizinho)
+
+            if amostragem and iterador % amostragem == 0:
+                # Os sinks gravam ou guardam o evento: vai uma cópia da
+                # fila, não a visão usada por ao_iterar.
+                instrumentos.emitir('iteracao', iteracao=iterador,
+                                    lista_abertos=set(self._chaves),
+                                    lista_fechados=lista_fechados)
+
+            if ao_iterar is not None:
+                ao_iterar(iterador, self._chaves.keys(), lista_fechados)
+            topo = self._topo()
+
+        if instrumentos is not None:
+            instrumentos.marcar('busca')
+
+        lista_abertos = set(self._chaves)
+        if rhs[inicio] >= INFINITO:
+            resultado = ResultadoBusca(False, float("inf"), [],
+                                       lista_abertos, lista_fechados,
+                                       iterador)
+        else:
+            nos = self._seguir_gradiente()
+            resultado = ResultadoBusca(True, rhs[inicio],
+                                       [self.grade.posicao(i) for i in nos],
+                                       lista_abertos, lista_fechados,
+                                       iterador)
+
+        if instrumentos is not None:
+            instrumentos.marcar('caminho')
+            instrumentos.finalizar(
+                expansoes=iterador,
+                insercoes=self._fila.insercoes() - insercoes,
+                obsoletas=self._obsoletas - obsoletas,
+                reaberturas=reaberturas)
+        return resultado
+
+    def _seguir_gradiente(self):
+        '''
+        Monta o caminho indo sempre para o vizinho de menor custo + g e
+        grava g (desde o início) e pai dos seus nós na grade.
+        Retorno:
+            list: índices do caminho, do início até o fim.
+        '''
+        grade = self.grade
+        custo = grade.custo_plano
+        g = self.g
+        nos = [self.inicio]
+        while nos[-1] != self.fim:
+            nos.append(min(grade.vizinhos(nos[-1]),
+                           key=lambda v: g[v] + custo[v]))
+
+        grade.limpar_busca()
+        g_caminho = 0
+        anterior = SEM_PAI
+        for indice in nos:
+            if anterior != SEM_PAI:
+                g_caminho += custo[indice]
+            grade.g_plano[indice] = g_caminho
+            grade.pai_plano[indice] = anterior
+            anterior = indice
+        grade.registrar_busca(nos)
+        return nos
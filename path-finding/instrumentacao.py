@@ -0,0 +1,134 @@
+"""
+Instrumentação das buscas: contadores, cronômetros por fase e eventos.
+Os buscadores recebem um objeto Instrumentos opcional. Sem ele nada é
+medido; com ele, ao final de cada busca são somados os contadores
+(expansões, inserções na fila, entradas obsoletas descartadas e nós
+reabertos) e os tempos de cada fase, e um evento 'busca' com o resumo é
+enviado aos sinks. Eventos 'iteracao', com as listas de abertos e
+fechados, só são emitidos a cada 'amostragem' expansões.
+Um sink é qualquer função sink(evento, dados). Este módulo traz três:
+o console (a antiga impressão das listas a cada iteração), um arquivo
+JSON Lines e uma lista em memória.
+"""
+from collections import Counter, defaultdict
+from collections.abc import Set
+import json
+from time import perf_counter
+
+
+class Instrumentos:
+    '''
+    Coleta as medidas de uma ou mais buscas.
+    Atributos:
+        contadores (Counter): totais acumulados por nome.
+        tempos (dict): segundos acumulados por fase.
+        sinks (list): funções sink(evento, dados) que recebem os eventos.
+        amostragem (int): emitir um evento 'iteracao' a cada tantas
+            expansões (0 para nunca).
+    '''
+
+    def __init__(self, sinks=(), amostragem=0):
+        self.contadores = Counter()
+        self.tempos = defaultdict(float)
+        self.sinks = list(sinks)
+        self.amostragem = amostragem
+        self._marca = None
+
+    def iniciar(self):
+        '''
+        Dispara o cronômetro da primeira fase.
+        '''
+        self._marca = perf_counter()
+
+    def marcar(self, fase):
+        '''
+        Atribui à fase o tempo passado desde a marca anterior.
+        '''
+        agora = perf_counter()
+        self.tempos[fase] += agora - self._marca
+        self._marca = agora
+
+    def contar(self, nome, quantidade=1):
+        self.contadores[nome] += quantidade
+
+    def emitir(self, evento, **dados):
+        for sink in self.sinks:
+            sink(evento, dados)
+
+    def finalizar(self, **contadores):
+        '''
+        Soma os contadores de uma busca e emite o evento 'busca' com eles.
+        '''
+        self.contadores.update(contadores)
+        self.emitir('busca', **contadores)
+
+    def resumo(self):
+        '''
+        Retorno:
+            dict: contadores e tempos acumulados.
+        '''
+        return {'contadores': dict(self.contadores),
+                'tempos': dict(self.tempos)}
+
+
+# -----------------------------------------------------------------------
+# SINKS
+# -----------------------------------------------------------------------
+def printar_listas(lista_abertos, lista_fechados):
+    print('******** LISTA NOS ABERTOS ********')
+    for item in lista_abertos:
+        print(f'{item},', end=" ")
+    print('\n')
+
+    print('******** LISTA NOS FECHADOS ********')
+    for item in lista_fechados:
+        print(f'{item},', end=" ")
+    print('\n')
+
+
+class SinkConsole:
+    '''
+    Imprime as listas de nós abertos e fechados a cada evento 'iteracao'
+    e o resumo de cada busca.
+    '''
+
+    def __call__(self, evento, dados):
+        if evento == 'iteracao':
+            print(f"ITERACAO {dados['iteracao']:2}:")
+            printar_listas(dados['lista_abertos'], dados['lista_fechados'])
+        elif evento == 'busca':
+            print(' '.join(f'{nome}={valor}'
+                           for nome, valor in dados.items()))
+
+
+class SinkJSONL:
+    '''
+    Grava um objeto JSON por linha para cada evento. Das listas de abertos
+    e fechados (qualquer conjunto, como set ou dict.keys()) só o tamanho é
+    gravado.
+    '''
+
+    def __init__(self, arquivo):
+        self.arquivo = arquivo
+
+    def __call__(self, evento, dados):
+        registro = {'evento': evento}
+        for nome, valor in dados.items():
+            registro[nome] = len(valor) if isinstance(valor, Set) else valor
+        self.arquivo.write(json.dumps(registro) + '\n')
+
+
+class SinkMemoria:
+    '''
+    Guarda os eventos em uma lista de tuplas (evento, dados). As listas de
+    abertos e fechados (qualquer conjunto, como set ou dict.keys()) são
+    copiadas para um set, já que a busca continua alterando-as.
+    '''
+
+    def __init__(self):
+        self.eventos = []
+
+    def __call__(self, evento, dados):
+        self.eventos.append((evento, {
+            nome: set(valor) if isinstance(valor, Set) else valor
+            for nome, valor in dados.items()}))
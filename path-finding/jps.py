@@ -0,0 +1,326 @@
+"""
+Jump Point Search (JPS) para grades de custo uniforme.
+Em áreas abertas o A* comum expande planícies inteiras de nós simétricos.
+O JPS percorre as linhas retas (e diagonais) sem colocá-las na fila,
+parando apenas nos "pontos de salto", onde algum vizinho forçado obriga uma
+mudança de direção. O custo dos caminhos encontrados é o mesmo do A*.
+Funciona com grades de 4 vizinhos e de 8 vizinhos (sem cortar quinas).
+"""
+from operator import add
+
+from busca import ResultadoBusca
+from filas import nova_fila
+from grade import SEM_PAI
+from heuristicas import heuristica_admissivel, heuristica_inteira, \
+    heuristica_por_indice
+
+
+def _sinal(valor):
+    return (valor > 0) - (valor < 0)
+
+
+def busca_jps(grade, pos_inicio, pos_fim, heuristica=None, campo=False,
+              ao_abrir=None, ao_fechar=None, ao_iterar=None,
+              instrumentos=None):
+    '''
+    Busca A* sobre pontos de salto. Recebe os mesmos parâmetros e devolve o
+    mesmo ResultadoBusca de busca_A_estrela; o caminho devolvido já vem
+    completo, ponto a ponto. As listas de nós abertos e fechados contêm
+    apenas pontos de salto.
+    Parâmetros:
+        grade (Grade): grade de custo uniforme (todos os custos iguais a 1).
+        pos_inicio (tuple): posição (linha, coluna) da qual parte-se.
+        pos_fim (tuple): posição (linha, coluna) na qual pretende-se chegar.
+        heuristica (function): heurística h(p1, p2) entre duas posições.
+            Por padrão, manhattan (ou chebyshev em grades com diagonais).
+        campo (bool): usar o campo de heurística pré-calculado.
+        ao_abrir, ao_fechar, ao_iterar (function): callbacks opcionais,
+            como em busca_A_estrela.
+        instrumentos (Instrumentos): opcional, como em busca_A_estrela.
+    Retorno:
+        ResultadoBusca: resultado da busca (verdadeiro se achou caminho).
+    '''
+    if not grade.custo_uniforme():
+        raise ValueError('O JPS exige uma grade de custo uniforme.')
+    if instrumentos is not None:
+        instrumentos.iniciar()
+    amostragem = instrumentos.amostragem if instrumentos is not None else 0
+    if heuristica is None:
+        heuristica = heuristica_admissivel(grade.diagonais)
+
+    qtd_linhas = grade.qtd_linhas
+    qtd_colunas = grade.qtd_colunas
+    obstaculo = grade.obstaculo_plano
+    linha_fim, coluna_fim = pos_fim
+
+    def livre(linha, coluna):
+        return 0 <= linha < qtd_linhas and 0 <= coluna < qtd_colunas \
+            and not obstaculo[linha * qtd_colunas + coluna]
+
+    # Saltos a partir de (linha, coluna) na direção (dl, dc). Retornam o
+    # ponto de salto encontrado ou None. São iterativos para não estourar a
+    # pilha em grades grandes. Os saltos retos usam _saltar_reto sobre a
+    # grade (horizontal) ou sobre sua transposta (vertical), ambas mantidas
+    # pela própria grade.
+    transposta = grade.obstaculo_transposto_plano
+
+    def saltar_horizontal(linha, coluna, dc):
+        coluna = _saltar_reto(obstaculo, qtd_linhas, qtd_colunas, linha,
+                              coluna, dc, linha_fim, coluna_fim)
+        return None if coluna is None else (linha, coluna)
+
+    def saltar_vertical(linha, coluna, dl):
+        linha = _saltar_reto(transposta, qtd_colunas, qtd_linhas, coluna,
+                             linha, dl, coluna_fim, linha_fim)
+        return None if linha is None else (linha, coluna)
+
+    def saltar_4(linha, coluna, dl, dc):
+        if dc:
+            return saltar_horizontal(linha, coluna, dc)
+        while True:
+            linha += dl
+            if not livre(linha, coluna):
+                return None
+            if linha == linha_fim and coluna == coluna_fim:
+                return linha, coluna
+            # Vertical: vizinho forçado dos lados ou salto horizontal.
+            if (livre(linha, coluna - 1)
+                    and not livre(linha - dl, coluna - 1)) \
+                    or (livre(linha, coluna + 1)
+                        and not livre(linha - dl, coluna + 1)):
+                return linha, coluna
+            if saltar_horizontal(linha, coluna, 1) \
+                    or saltar_horizontal(linha, coluna, -1):
+                return linha, coluna
+
+    def saltar_8(linha, coluna, dl, dc):
+        if not dl:
+            return saltar_horizontal(linha, coluna, dc)
+        if not dc:
+            return saltar_vertical(linha, coluna, dl)
+        while True:
+            # Na diagonal os dois vizinhos ortogonais precisam estar livres:
+            if not (livre(linha + dl, coluna) and livre(linha, coluna + dc)):
+                return None
+            linha += dl
+            coluna += dc
+            if not livre(linha, coluna):
+                return None
+            if linha == linha_fim and coluna == coluna_fim:
+                return linha, coluna
+            if saltar_vertical(linha, coluna, dl) \
+                    or saltar_horizontal(linha, coluna, dc):
+                return linha, coluna
+
+    # Direções que sobram após a poda, dada a direção de chegada:
+    def direcoes_4(linha, coluna, dl, dc):
+        if dc:
+            return [(d, 0) for d in (-1, 1) if livre(linha + d, coluna)] \
+                + [(0, dc)]
+        return [(0, d) for d in (-1, 1) if livre(linha, coluna + d)] \
+            + [(dl, 0)]
+
+    def direcoes_8(linha, coluna, dl, dc):
+        if dl and dc:
+            return [(dl, 0), (0, dc), (dl, dc)]
+        direcoes = []
+        if dc:
+            proximo = livre(linha, coluna + dc)
+            for d in (-1, 1):
+                if livre(linha + d, coluna):
+                    if proximo:
+                        direcoes.append((d, dc))
+                    direcoes.append((d, 0))
+            direcoes.append((0, dc))
+        else:
+            proximo = livre(linha + dl, coluna)
+            for d in (-1, 1):
+                if livre(linha, coluna + d):
+                    if proximo:
+                        direcoes.append((dl, d))
+                    direcoes.append((0, d))
+            direcoes.append((dl, 0))
+        return direcoes
+
+    if grade.diagonais:
+        saltar, direcoes, distancia = saltar_8, direcoes_8, max
+        todas = [(1, 0), (-1, 0), (0, 1), (0, -1),
+                 (1, 1), (1, -1), (-1, 1), (-1, -1)]
+    else:
+        saltar, direcoes, distancia = saltar_4, direcoes_4, add
+        todas = [(1, 0), (-1, 0), (0, 1), (0, -1)]
+
+    inicio = grade.indice(*pos_inicio)
+    fim = grade.indice(*pos_fim)
+
+    grade.limpar_busca()
+    g = grade.g_plano
+    caminho = grade.pai_plano
+    h = heuristica_por_indice(heuristica, pos_fim, qtd_linhas, qtd_colunas,
+                              campo)
+
+    fila = nova_fila(heuristica_inteira(heuristica))
+    lista_abertos = set()
+    lista_fechados = set()
+    # Um obstáculo não é início nem fim de caminho (como em busca.py):
+    if not grade.obstaculo_plano[inicio] and not grade.obstaculo_plano[fim]:
+        g[inicio] = 0
+        fila.inserir(0, inicio)
+        lista_abertos.add(inicio)
+
+    if instrumentos is not None:
+        instrumentos.marcar('preparacao')
+
+    iterador = 0
+    obsoletas = 0
+    reaberturas = 0
+    encontrado = False
+    while fila:
+        atual = fila.remover()[1]
+        if atual in lista_fechados:
+            obsoletas += 1
+            continue
+
+        iterador += 1
+
+        if atual == fim:
+            lista_abertos.remove(fim)
+            lista_fechados.add(fim)
+            encontrado = True
+            break
+
+        linha, coluna = divmod(atual, qtd_colunas)
+        pai = caminho[atual]
+        if pai == SEM_PAI:
+            candidatas = todas
+        else:
+            linha_pai, coluna_pai = divmod(pai, qtd_colunas)
+            candidatas = direcoes(linha, coluna, _sinal(linha - linha_pai),
+                                  _sinal(coluna - coluna_pai))
+
+        g_atual = g[atual]
+        for dl, dc in candidatas:
+            ponto_salto = saltar(linha, coluna, dl, dc)
+            if ponto_salto is None:
+                continue
+            linha_salto, coluna_salto = ponto_salto
+            vizinho = linha_salto * qtd_colunas + coluna_salto
+            temp_g = g_atual + distancia(abs(linha_salto - linha),
+                                         abs(coluna_salto - coluna))
+
+            if temp_g < g[vizinho]:
+                caminho[vizinho] = atual
+                g[vizinho] = temp_g
+                fila.inserir(temp_g + h(vizinho), vizinho)
+
+                if vizinho not in lista_abertos:
+                    if vizinho in lista_fechados:
+                        lista_fechados.remove(vizinho)
+                        reaberturas += 1
+                    lista_abertos.add(vizinho)
+                    if ao_abrir is not None:
+                        ao_abrir(vizinho)
+
+        lista_abertos.remove(atual)
+        lista_fechados.add(atual)
+        if ao_fechar is not None:
+            ao_fechar(atual)
+
+        if amostragem and iterador % amostragem == 0:
+            instrumentos.emitir('iteracao', iteracao=iterador,
+                                lista_abertos=lista_abertos,
+                                lista_fechados=lista_fechados)
+
+        if ao_iterar is not None:
+            ao_iterar(iterador, lista_abertos, lista_fechados)
+
+    if instrumentos is not None:
+        instrumentos.marcar('busca')
+
+    # Só os nós abertos e fechados tiveram g e pai escritos:
+    grade.registrar_busca(lista_abertos, lista_fechados)
+    if encontrado:
+        resultado = ResultadoBusca(True, g[fim], _completar_caminho(
+            grade.reconstruir_caminho(fim)),
+            lista_abertos, lista_fechados, iterador, fila.operacoes())
+    else:
+        resultado = ResultadoBusca(False, float("inf"), [],
+                                   lista_abertos, lista_fechados, iterador,
+                                   fila.operacoes())
+
+    if instrumentos is not None:
+        instrumentos.marcar('caminho')
+        instrumentos.finalizar(expansoes=iterador,
+                               insercoes=fila.insercoes(),
+                               obsoletas=obsoletas, reaberturas=reaberturas)
+    return resultado
+
+
+def _saltar_reto(obstaculo, qtd_linhas, qtd_colunas, linha, coluna, d,
+                 linha_fim, coluna_fim):
+    '''
+    Salto em linha reta ao longo de uma linha do buffer de obstáculos.
+    Como cada linha é contígua no buffer, o próximo obstáculo e os vizinhos
+    forçados (um obstáculo seguido de um ponto livre na linha de cima ou de
+    baixo) são procurados com find/rfind, sem laço em Python.
+    Parâmetros:
+        obstaculo (bytearray): obstáculos, linha a linha.
+        qtd_linhas (int): número de linhas do buffer.
+        qtd_colunas (int): número de colunas do buffer.
+        linha (int): linha percorrida.
+        coluna (int): coluna de onde se sai.
+        d (int): 1 para a direita, -1 para a esquerda.
+        linha_fim, coluna_fim (int): posição do objetivo.
+    Retorno:
+        int: coluna do ponto de salto, ou None se não há.
+    '''
+    base = linha * qtd_colunas
+    candidatos = []
+
+    if d > 0:
+        limite = obstaculo.find(1, base + coluna + 1, base + qtd_colunas)
+        limite = qtd_colunas if limite < 0 else limite - base
+        if linha_fim == linha and coluna < coluna_fim < limite:
+            candidatos.append(coluna_fim)
+        for vizinha in (linha - 1, linha + 1):
+            if 0 <= vizinha < qtd_linhas:
+                inicio = vizinha * qtd_colunas
+                forcado = obstaculo.find(
+                    b'\x01\x00', inicio + coluna, inicio + limite)
+                if forcado >= 0:
+                    candidatos.append(forcado - inicio + 1)
+        return min(candidatos) if candidatos else None
+
+    limite = obstaculo.rfind(1, base, base + coluna)
+    limite = -1 if limite < 0 else limite - base
+    if linha_fim == linha and limite < coluna_fim < coluna:
+        candidatos.append(coluna_fim)
+    for vizinha in (linha - 1, linha + 1):
+        if 0 <= vizinha < qtd_linhas:
+            inicio = vizinha * qtd_colunas
+            forcado = obstaculo.rfind(
+                b'\x00\x01', inicio + limite + 1, inicio + coluna + 1)
+            if forcado >= 0:
+                candidatos.append(forcado - inicio)
+    return max(candidatos) if candidatos else None
+
+
+def _completar_caminho(pontos_salto):
+    '''
+    Preenche os pontos entre pontos de salto consecutivos (que estão sempre
+    na mesma linha, coluna ou diagonal).
+    Parâmetro:
+        pontos_salto (list): posições dos pontos de salto, em ordem.
+    Retorno:
+        list: todas as posições do caminho.
+    '''
+    caminho = pontos_salto[:1]
+    for linha_destino, coluna_destino in pontos_salto[1:]:
+        linha, coluna = caminho[-1]
+        dl = _sinal(linha_destino - linha)
+        dc = _sinal(coluna_destino - coluna)
+        while (linha, coluna) != (linha_destino, coluna_destino):
+            linha += dl
+            coluna += dc
+            caminho.append((linha, coluna))
+    return caminho
@@ -0,0 +1,105 @@
+"""
+Consultas em lote distribuídas por um pool de processos.
+Os obstáculos e custos da grade são copiados uma única vez para um bloco de
+memória compartilhada; cada processo do pool copia esse bloco para uma
+Grade própria ao iniciar, em vez de receber a grade serializada a cada
+consulta. As consultas são enviadas em blocos e os resultados voltam à
+medida que ficam prontos.
+"""
+from multiprocessing import Pool, cpu_count
+
+from busca import busca_A_estrela
+from memoria_compartilhada import compartilhar_grade, grade_compartilhada
+
+# Grade montada em cada processo do pool (ver iniciar_processo):
+_grade_processo = None
+
+
+def iniciar_processo(nome, qtd_linhas, qtd_colunas, diagonais):
+    '''
+    Inicializador dos processos de um pool (multiprocessing ou
+    concurrent.futures): monta a grade local a partir do bloco de memória
+    compartilhada, usada depois por resolver_tarefa.
+    Parâmetros:
+        nome (str): nome do bloco de memória compartilhada.
+        qtd_linhas, qtd_colunas (int): dimensões da grade.
+        diagonais (bool): movimentos diagonais habilitados.
+    '''
+    global _grade_processo
+    _grade_processo = grade_compartilhada(nome, qtd_linhas, qtd_colunas,
+                                          diagonais)
+
+
+def resolver_tarefa(tarefa):
+    '''
+    Resolve uma consulta na grade montada por iniciar_processo (função de
+    módulo, para poder ser enviada a um pool de processos).
+    Parâmetro:
+        tarefa (tuple): (numero, pos_inicio, pos_fim, algoritmo,
+            heuristica, listas).
+    Retorno:
+        tuple: (numero, ResultadoBusca).
+    '''
+    numero, pos_inicio, pos_fim, algoritmo, heuristica, listas = tarefa
+    return numero, _executar(_grade_processo, pos_inicio, pos_fim,
+                             algoritmo, heuristica, listas)
+
+
+def _executar(grade, pos_inicio, pos_fim, algoritmo, heuristica, listas):
+    resultado = algoritmo(grade, pos_inicio, pos_fim, heuristica=heuristica)
+    if not listas:
+        # As listas podem ter milhares de nós; não vale a pena devolvê-las
+        # ao processo principal se ninguém vai usá-las. Os demais campos
+        # (operacoes_fila e os das subclasses) são mantidos:
+        resultado.lista_abertos = set()
+        resultado.lista_fechados = set()
+    return resultado
+
+
+def buscar_lote(grade, consultas, heuristica=None, algoritmo=busca_A_estrela,
+                processos=None, tamanho_bloco=None, listas=False):
+    '''
+    Resolve uma lista de consultas (início, fim) sobre a mesma grade,
+    distribuindo-as por um pool de processos. É um gerador: os resultados
+    são devolvidos na ordem em que ficam prontos, acompanhados do número da
+    consulta. As edições feitas na grade durante o lote não são vistas
+    pelos processos.
+    Parâmetros:
+        grade (Grade): grade sobre a qual as buscas são feitas.
+        consultas (list): pares (pos_inicio, pos_fim).
+        heuristica (function): heurística h(p1, p2). Precisa ser uma função
+            de módulo (e não uma lambda) para ser enviada aos processos.
+        algoritmo (function): busca_A_estrela, busca_jps, busca_bidirecional
+            ou outra busca com a mesma assinatura.
+        processos (int): tamanho do pool. Por padrão, um por núcleo. Com
+            um só processo as consultas são resolvidas no processo atual.
+        tamanho_bloco (int): consultas enviadas de cada vez a um processo.
+        listas (bool): devolver também as listas de abertos e fechados.
+    Retorno:
+        generator: tuplas (numero, ResultadoBusca).
+    '''
+    consultas = list(consultas)
+    processos = processos or cpu_count()
+    if processos == 1:
+        for numero, (pos_inicio, pos_fim) in enumerate(consultas):
+            yield numero, _executar(grade, pos_inicio, pos_fim, algoritmo,
+                                    heuristica, listas)
+        return
+
+    if tamanho_bloco is None:
+        tamanho_bloco = max(1, len(consultas) // (processos * 4))
+
+    memoria = compartilhar_grade(grade)
+    try:
+        with Pool(processos, iniciar_processo,
+                  (memoria.name, grade.qtd_linhas, grade.qtd_colunas,
+                   grade.diagonais)) as pool:
+            tarefas = ((numero, tuple(pos_inicio), tuple(pos_fim), algoritmo,
+                        heuristica, listas)
+                       for numero, (pos_inicio, pos_fim)
+                       in enumerate(consultas))
+            yield from pool.imap_unordered(resolver_tarefa, tarefas,
+                                           tamanho_bloco)
+    finally:
+        memoria.close()
+        memoria.unlink()
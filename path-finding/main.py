@@ -1,5 +1,17 @@
+from functools import lru_cache
+from time import perf_counter
+
+import numpy as np
 import pygame
-from queue import PriorityQueue
+
+from busca import busca_A_estrela
+from grade import Grade, VAZIO, FECHADO, ABERTO, INICIO, FIM, OBSTACULO, \
+    CAMINHO
+from heuristicas import manhattan, chebyshev, heuristica_inadmissivel, \
+    heuristica_admissivel
+from hierarquica import BuscaHierarquica
+from incremental import BuscaIncremental
+from instrumentacao import Instrumentos, SinkConsole, printar_listas
 
 """
 Path Finding - Buscador de caminhos com A*
@@ -31,36 +43,66 @@ ESTADOS = {
     'caminho': (252, 255, 72),  # Verde Claro
 }
 
+# Cor de cada código de estado guardado na Grade (mesma ordem de grade.py):
+CORES = (
+    ESTADOS['vazio'],
+    ESTADOS['fechado'],
+    ESTADOS['aberto'],
+    ESTADOS['inicio'],
+    ESTADOS['fim'],
+    ESTADOS['obstaculo'],
+    ESTADOS['caminho'],
+)
+
+# Imprimir no console as listas de abertos e fechados a cada iteração
+# (custa O(n) por iteração; desligue em grades grandes):
+IMPRIMIR_LISTAS = True
+
+# Lado dos clusters da busca hierárquica (tecla 'h'), pequeno o bastante
+# para que a grade da interface tenha vários clusters:
+TAMANHO_CLUSTER = 4
+
 # Dimensões:
 LARGURA = 1600
 ALTURA = 800
-JANELA = pygame.display.set_mode((LARGURA, ALTURA))  # Tamanho da janela
-pygame.display.set_caption(
-    'Path Finding - Buscador de caminhos com A*')  # Título da janela
-
-# Definições para escrita de texto na tela do jogo:
-pygame.font.init()
-font_titulo = pygame.font.Font(pygame.font.get_default_font(), 30)
-font = pygame.font.Font(pygame.font.get_default_font(), 12)
-font_aviso = pygame.font.Font(pygame.font.get_default_font(), 15)
+JANELA = None  # Criada em inicializar_janela()
+
+# Definições para escrita de texto na tela do jogo (ver inicializar_janela):
+font_titulo = None
+font = None
+font_aviso = None
 COR_FONTE = (255, 255, 255)
 
 # Definição dos títulos textuais dentro da tela:
-cabecalho_arvore_busca = font_titulo.render('Árvore de Busca', True, COR_FONTE)
-cabecalho_lista_abertos = font_titulo.render(
-    'Lista de nós abertos', True, COR_FONTE)
-cabecalho_lista_fechados = font_titulo.render(
-    'Lista de nós fechados', True, COR_FONTE)
+cabecalho_arvore_busca = None
+cabecalho_lista_abertos = None
+cabecalho_lista_fechados = None
 
-# Deslocamento dos textos na tela:
-deslocamento_y_abertos = 90
-deslocamento_x_abertos = 1250
 
-deslocamento_y_fechados = 440
-deslocamento_x_fechados = 1250
+def inicializar_janela():
+    '''
+    Abre a janela do pygame e prepara as fontes e os cabeçalhos. Fica
+    separada do carregamento do módulo para que ele possa ser importado
+    sem abrir uma janela.
+    '''
+    global JANELA, font_titulo, font, font_aviso, cabecalho_arvore_busca, \
+        cabecalho_lista_abertos, cabecalho_lista_fechados
+
+    JANELA = pygame.display.set_mode((LARGURA, ALTURA))  # Tamanho da janela
+    pygame.display.set_caption(
+        'Path Finding - Buscador de caminhos com A*')  # Título da janela
 
-deslocamento_y_arvore = 90
-deslocamento_x_arvore = 900
+    pygame.font.init()
+    font_titulo = pygame.font.Font(pygame.font.get_default_font(), 30)
+    font = pygame.font.Font(pygame.font.get_default_font(), 12)
+    font_aviso = pygame.font.Font(pygame.font.get_default_font(), 15)
+
+    cabecalho_arvore_busca = font_titulo.render(
+        'Árvore de Busca', True, COR_FONTE)
+    cabecalho_lista_abertos = font_titulo.render(
+        'Lista de nós abertos', True, COR_FONTE)
+    cabecalho_lista_fechados = font_titulo.render(
+        'Lista de nós fechados', True, COR_FONTE)
 
 # -----------------------------------------------------------------------
 # CLASSE PARA CADA UM DOS NÓS DISPOSTOS NA TELA
@@ -69,91 +111,72 @@ deslocamento_x_arvore = 900
 
 class Ponto:
     """
-    Classe utilizada para gerar cada um dos 'quadradinhos' ou 'nós' do grafo.
+    Classe utilizada para desenhar cada um dos 'quadradinhos' ou 'nós' do
+    grafo. É apenas uma visão sobre uma posição da Grade: o estado, o
+    obstáculo e o valor de g ficam guardados nos vetores da grade.
     """
     # Construtor:
 
-    def __init__(self, linha, coluna, largura, qtd_linhas):
+    def __init__(self, grade, linha, coluna, largura):
+        self.grade = grade
         self.linha = linha
         self.coluna = coluna
+        self.indice = grade.indice(linha, coluna)
         self.largura = largura
-        self.qtd_linhas = qtd_linhas
+        self.qtd_linhas = grade.qtd_linhas
 
         # Atributos para desenhar cubos independentemente do tamanho da tela:
         self.x = linha * largura
         self.y = coluna * largura
 
-        # Estado padrão padrão dos nós:
-        self.estado = ESTADOS['vazio']
-
-        # Pontos vizinhos:
-        self.vizinhos = []
-
-        # Heurística de cada nó:
-        self.h = 0
-        self.g = 0
-
     # Getters:
+    @property
+    def estado(self):
+        return CORES[self.grade.get_estado(self.indice)]
+
     def get_posicao(self):
         return self.linha, self.coluna
 
-    def get_heuristica(self):
-        return self.h
-
     def get_g(self):
-        return self.g
+        return self.grade.get_g(self.indice)
 
     # Setters:
-    def set_g(self, valor):
-        self.g = valor
-
     def set_vazio(self):
-        self.estado = ESTADOS['vazio']
+        self.grade.set_estado(self.indice, VAZIO)
 
     def set_fechado(self):
-        self.estado = ESTADOS['fechado']
+        self.grade.set_estado(self.indice, FECHADO)
 
     def set_aberto(self):
-        self.estado = ESTADOS['aberto']
+        self.grade.set_estado(self.indice, ABERTO)
 
     def set_obstaculo(self):
-        self.estado = ESTADOS['obstaculo']
+        self.grade.set_estado(self.indice, OBSTACULO)
 
     def set_inicio(self):
-        self.estado = ESTADOS['inicio']
+        self.grade.set_estado(self.indice, INICIO)
 
     def set_fim(self):
-        self.estado = ESTADOS['fim']
+        self.grade.set_estado(self.indice, FIM)
 
     def set_caminho(self):
-        self.estado = ESTADOS['caminho']
-
-    def set_h_manhanttan(self, end_pos):
-        self.h = manhattan(self.get_posicao(), end_pos.get_posicao())
-
-    def set_h_chebyshev(self, end_pos):
-        self.h = chebyshev(self.get_posicao(), end_pos.get_posicao())
-
-    def set_h_inadmissivel(self, end_pos, obs):
-        h = heuristica_inadmissivel(
-            self.get_posicao(), end_pos.get_posicao())
-        self.h = abs(h + obs)
+        self.grade.set_estado(self.indice, CAMINHO)
 
     # Métodos para checagem de estados de cada nó:
     def is_aberto(self):
-        return self.estado == ESTADOS['aberto']
+        return self.grade.get_estado(self.indice) == ABERTO
 
     def is_fechado(self):
-        return self.estado == ESTADOS['fechado']
+        return self.grade.get_estado(self.indice) == FECHADO
 
     def is_obstaculo(self):
-        return self.estado == ESTADOS['obstaculo']
+        return self.grade.get_estado(self.indice) == OBSTACULO
 
     def is_inicio(self):
-        return self.estado == ESTADOS['inicio']
+        return self.grade.get_estado(self.indice) == INICIO
 
     def is_fim(self):
-        return self.estado == ESTADOS['fim']
+        return self.grade.get_estado(self.indice) == FIM
 
     # Outros Métodos:
     def desenhar(self, janela):
@@ -169,219 +192,114 @@ class Ponto:
         pygame.draw.rect(janela, self.estado,
                          (self.x, self.y, self.largura, self.largura))
 
-    def atualizar_pontos_vizinhos(self, matriz):
-        '''
-        Atualizar a lista com todos os pontos próximos ao ponto em questão, 
-        verificando se o ponto existe e se não é um obstáculo.
-        Parâmetro:
-            matrix (list): lista de listas.
-        '''
-        self.vizinhos = []
-        # O ponto de baixo existe? Ele é um obstaculo?:
-        if self.linha < self.qtd_linhas - 1 \
-                and not matriz[self.linha + 1][self.coluna].is_obstaculo():
-            self.vizinhos.append(matriz[self.linha + 1][self.coluna])
-
-        # O ponto de cima existe? Ele é um obstaculo?:
-        if self.linha > 0 \
-                and not matriz[self.linha - 1][self.coluna].is_obstaculo():
-            self.vizinhos.append(matriz[self.linha - 1][self.coluna])
-
-        # O ponto da direita existe? Ele é um obstaculo?:
-        if self.coluna < self.qtd_linhas - 1 \
-                and not matriz[self.linha][self.coluna + 1].is_obstaculo():
-            self.vizinhos.append(matriz[self.linha][self.coluna + 1])
-
-        # O ponto da esquerda existe? Ele é um obstaculo?:
-        if self.coluna > 0 \
-                and not matriz[self.linha][self.coluna - 1].is_obstaculo():
-            self.vizinhos.append(matriz[self.linha][self.coluna - 1])
-
-    def __lt__(self, other):
-        return False
-
     def __str__(self):
         return str(self.get_posicao())
 
 
 # -----------------------------------------------------------------------
-# HEURÍSTICAS
+# ACOMPANHAMENTO DA BUSCA NA TELA
 # -----------------------------------------------------------------------
-def manhattan(p1, p2):  # -> Admissível
+def acompanhar_busca(redesenhar_tela):
     '''
-    Heurística 01: Manhattan. Será utilizada a distância de Manhattan como 
-    uma das heurísticas adimissíveis.
+    Cria o callback chamado pela busca ao fim de cada iteração.
+    É aqui que a interface trata os eventos do pygame e redesenha a tela.
+    A impressão das listas no console é feita pelo SinkConsole.
     Parâmetros:
-        p1 (Ponto): ponto inicial, de onde quer sair.
-        p2 (Ponto): ponto final, para onde quer ir.
+        redesenhar_tela (function): função que desenha um quadro e retorna
+            se ele foi desenhado (como Renderizador.quadro).
     Retorno:
-        int: distância 'Manhattan' entre p1 e p2.
+        function: callback (iterador, lista_abertos, lista_fechados).
     '''
-    x1, y1 = p1
-    x2, y2 = p2
-    return abs(x1 - x2) + abs(y1 - y2)
+    def ao_iterar(iterador, lista_abertos, lista_fechados):
+        # Os eventos só são tratados nos quadros efetivamente desenhados:
+        if redesenhar_tela():
+            # Encerra o jogo ao clicar no botão de sair:
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    pygame.quit()
 
+    return ao_iterar
 
-def chebyshev(p1, p2):  # -> Admissível
-    '''
-    Heurística 02: Chebyshev. Retona a maior entre as diferenças 
-    de X e Y de dois pontos.
-    Parâmetros:
-        p1 (Ponto): ponto inicial, de onde quer sair.
-        p2 (Ponto): ponto final, para onde quer ir.
-    Retorno:
-        int: distância 'Chebyshev' entre p1 e p2.
-    '''
-    x1, y1 = p1
-    x2, y2 = p2
-    return max(abs(x1 - x2), abs(y1 - y2))
 
-
-def heuristica_inadmissivel(p1, p2):  # -> Inadmissível
+def marcador(grade, estado):
     '''
-    Heurística 03: Multiplica a distância de manhattan pela 
-    distância de chebyshev.
+    Cria o callback ao_abrir/ao_fechar que pinta os pontos visitados pela
+    busca. Os obstáculos nunca são pintados: set_estado apagaria o
+    obstáculo, e o D* Lite revisita pontos que acabaram de ser bloqueados.
     Parâmetros:
-        p1 (Ponto): ponto inicial, de onde quer sair.
-        p2 (Ponto): ponto final, para onde quer ir.
+        grade (Grade): grade exibida na tela.
+        estado (int): ABERTO ou FECHADO.
     Retorno:
-        int: distância "inventada" entre p1 e p2.
+        function: callback (indice).
     '''
+    obstaculo = grade.obstaculo_plano
 
-    return manhattan(p1, p2) * chebyshev(p1, p2)
+    def marcar(indice):
+        if not obstaculo[indice]:
+            grade.set_estado(indice, estado)
 
+    return marcar
 
-# -----------------------------------------------------------------------
-# Buscador de Caminhos com A*
-# -----------------------------------------------------------------------
-def busca_A_estrela(redesenhar_tela, matriz, pos_inicio, pos_fim):
+
+def exibir_resultado(resultado, matriz, pos_inicio, pos_fim, heuristica,
+                     redesenhar_tela, painel):
     '''
-    Função central do projeto. É aqui que o algoritmo A* é definido, 
-    todas as estruturas de dados são modificadas e a melhor decisão é tomada 
-    com base em uma determinada função de avaliação.
-    F(n) = g(n) + h(n)
+    Exibe na tela e no console o resultado de uma busca bem sucedida:
+    o melhor caminho e as listas de nós abertos e fechados.
     Parâmetros:
-        redesenhar_tela (function): função que atualiza a tela.
-        matriz (list): lista de listas.
+        resultado (ResultadoBusca): retorno da busca.
+        matriz (list): lista de listas de Ponto.
         pos_inicio (Ponto): ponto inicial, do qual parte-se.
         pos_fim (Ponto): ponto final, no qual pretende-se chegar.
+        heuristica (function): heurística utilizada na busca.
+        redesenhar_tela (function): função que atualiza a tela.
+        painel (PainelLateral): painel onde as listas são exibidas.
     '''
+    lista_abertos = resultado.lista_abertos
+    lista_fechados = resultado.lista_fechados
 
-    contador = 0
-    caminho = {}
-    global deslocamento_y_abertos, deslocamento_x_abertos, deslocamento_x_fechados, deslocamento_y_fechados
-
-    # Estrutura de dados dos nós abertos e fechados:
-    fila = PriorityQueue()  # Retorna sempre o menor elemento da fila
-    fila.put((0, contador, pos_inicio))
-    lista_abertos = {pos_inicio}
-    lista_fechados = set()
-
-    # Parâmetros para função de avaliação:
-    g = {ponto: float("inf") for linha in matriz for ponto in linha}
-    g[pos_inicio] = 0
-
-    f = {ponto: float("inf") for linha in matriz for ponto in linha}
-
-    iterador = 0
-    while not fila.empty():
-        iterador += 1
-        # Encerra o jogo ao clicar no botão de sair:
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-
-        atual = fila.get()[2]
-        atual.set_g(g[atual])  # Valor de 'g' para cada nó
-
-        # Solução encontrada? Desenha o melhor caminho:
-        if atual == pos_fim:
-            lista_abertos.remove(pos_fim)
-            lista_fechados.add(pos_fim)
-            print(f"ITERACAO {iterador:2}: ")
-            printar_listas(lista_abertos, lista_fechados)
-            print('========= ARVORE DE BUSCA =========')
-            print(f'CUSTO REAL = {pos_fim.get_g()}')
-            # Enviar listas por parametros
-            desenhar_melhor_caminho(caminho, pos_fim, redesenhar_tela)
-            pos_fim.set_fim()
-            pos_inicio.set_inicio()
-
-            for ponto in lista_abertos:
-                # Exibe o nó aberto na tela do jogo:
-                if deslocamento_x_abertos > LARGURA - 50:
-                    deslocamento_x_abertos = 1250
-                    deslocamento_y_abertos += 20
-                JANELA.blit(font.render(str(ponto) + ',', True, COR_FONTE),
-                            dest=(deslocamento_x_abertos, deslocamento_y_abertos))
-                deslocamento_x_abertos += 55
-
-            for ponto in lista_fechados:
-                # Exibe o nó fechado na tela do jogo:
-                if deslocamento_x_fechados > LARGURA - 50:
-                    deslocamento_x_fechados = 1250
-                    deslocamento_y_fechados += 20
-
-                JANELA.blit(font.render(str(ponto) + ',', True, COR_FONTE),
-                            dest=(deslocamento_x_fechados, deslocamento_y_fechados))
-
-                deslocamento_x_fechados += 55
-
-            return True
-
-        # Caso contrário:
-        for ponto_vizinho in atual.vizinhos:
-            temp_g = g[atual] + 1
-
-            if temp_g < g[ponto_vizinho]:
-                caminho[ponto_vizinho] = atual
-                g[ponto_vizinho] = temp_g
-
-                # Atualiza valor de f para tomar decisão:
-                f[ponto_vizinho] = temp_g + ponto_vizinho.get_heuristica()
-
-                # Alteração de estado - Nó aberto:
-                if ponto_vizinho not in lista_abertos \
-                        and ponto_vizinho not in lista_fechados:
-                    contador += 1
-                    fila.put((f[ponto_vizinho], contador, ponto_vizinho))
-                    lista_abertos.add(ponto_vizinho)
-                    ponto_vizinho.set_aberto()
-
-        redesenhar_tela()
+    if IMPRIMIR_LISTAS:
+        print(f"ITERACAO {resultado.iteracoes:2}: ")
+        printar_listas(lista_abertos, lista_fechados)
+    print('========= ARVORE DE BUSCA =========')
+    print(f'CUSTO REAL = {resultado.custo}')
+    desenhar_melhor_caminho(
+        matriz, resultado.caminho, heuristica, redesenhar_tela, painel)
+    pos_fim.set_fim()
+    pos_inicio.set_inicio()
 
-        # Alteração de estado - Nó fechado:
-        lista_abertos.remove(atual)
-        lista_fechados.add(atual)
-        atual.set_fechado()
+    # Só os itens visíveis das listas serão convertidos e desenhados:
+    grade = pos_fim.grade
 
-        print(f"ITERACAO {iterador:2}:")
-        printar_listas(lista_abertos, lista_fechados)
+    def formatar(indice):
+        return f'{grade.posicao(indice)},'
 
-    return False
+    painel.abertos.definir_itens(list(lista_abertos), formatar)
+    painel.fechados.definir_itens(list(lista_fechados), formatar)
+    painel.desenhar(JANELA)
 
 
 # -----------------------------------------------------------------------
 # ESTRUTURA DE DADOS
 # -----------------------------------------------------------------------
-def criar_matriz(qtd_linhas, largura):
+def criar_matriz(grade, largura):
     '''
-    Criar uma matriz, ou seja, uma lista de listas para guardar cada
-    um dos pontos criados.
+    Criar uma matriz, ou seja, uma lista de listas com um Ponto (visão
+    para desenho) para cada posição da grade.
     Parâmetros:
-        qtd_linhas (int): número de linhas.
+        grade (Grade): grade que guarda os dados de cada ponto.
         largura (int): tamanho da janela.
     Retorno:
         list: lista de listas, a matriz.
     '''
     matriz = []
-    margem = largura // qtd_linhas  # Espaço entre os nós dentro do jogo
-    for linha in range(qtd_linhas):
+    margem = largura // grade.qtd_linhas  # Espaço entre os nós dentro do jogo
+    for linha in range(grade.qtd_linhas):
         matriz.append([])
-        for coluna in range(qtd_linhas):
+        for coluna in range(grade.qtd_colunas):
             # Criação de um novo nó:
-            ponto = Ponto(linha=linha, coluna=coluna,
-                          largura=margem, qtd_linhas=qtd_linhas)
+            ponto = Ponto(grade=grade, linha=linha, coluna=coluna,
+                          largura=margem)
             matriz[linha].append(ponto)
 
     return matriz
@@ -390,32 +308,100 @@ def criar_matriz(qtd_linhas, largura):
 # -----------------------------------------------------------------------
 # FUNÇÕES AUXILIARES
 # -----------------------------------------------------------------------
-def printar_listas(lista_abertos, lista_fechados):
-    print('******** LISTA NOS ABERTOS ********')
-    for item in lista_abertos:
-        print(f'{item},', end=" ")
-    print('\n')
-    
-    print('******** LISTA NOS FECHADOS ********')
-    for item in lista_fechados:
-        print(f'{item},', end=" ")
-    print('\n')
+@lru_cache(maxsize=4096)
+def glifo(texto):
+    '''
+    Renderiza um texto do painel. Os textos mais usados (coordenadas dos
+    pontos) ficam em cache e são renderizados uma única vez.
+    '''
+    return font.render(texto, True, COR_FONTE)
 
 
-def resetar_textos():
-    pygame.draw.rect(JANELA, (0, 0, 0),
-    pygame.Rect(700, 0, 1000, 1000))
+class PainelTexto:
+    '''
+    Lista rolável de textos em uma área retangular da janela, disposta em
+    colunas de largura fixa. Os itens são guardados como vieram e só os da
+    janela visível são formatados e desenhados, então o custo de desenhar
+    não depende do tamanho da lista.
+    '''
 
-    global deslocamento_y_abertos, deslocamento_x_abertos, deslocamento_y_fechados, \
-    deslocamento_x_fechados, deslocamento_y_arvore, deslocamento_x_arvore
+    def __init__(self, retangulo, largura_item, altura_item=20):
+        self.retangulo = pygame.Rect(retangulo)
+        self.altura_item = altura_item
+        self.colunas = max(1, self.retangulo.width // largura_item)
+        self.largura_item = largura_item
+        self.linhas_visiveis = max(1, self.retangulo.height // altura_item)
+        self.itens = []
+        self.formatar = str
+        self.rolagem = 0  # Primeira linha visível
+
+    def definir_itens(self, itens, formatar=str):
+        '''
+        Troca os itens exibidos e volta ao topo da lista.
+        Parâmetros:
+            itens (list): itens a exibir.
+            formatar (function): converte um item no texto exibido.
+        '''
+        self.itens = itens
+        self.formatar = formatar
+        self.rolagem = 0
+
+    def rolar(self, linhas):
+        total = -(-len(self.itens) // self.colunas)
+        self.rolagem = max(0, min(self.rolagem + linhas,
+                                  total - self.linhas_visiveis))
+
+    def desenhar(self, janela):
+        '''
+        Limpa a área do painel e desenha os itens visíveis.
+        Retorno:
+            pygame.Rect: área alterada.
+        '''
+        janela.fill((0, 0, 0), self.retangulo)
+        primeiro = self.rolagem * self.colunas
+        visiveis = self.itens[primeiro:
+                              primeiro + self.linhas_visiveis * self.colunas]
+        for posicao, item in enumerate(visiveis):
+            linha, coluna = divmod(posicao, self.colunas)
+            janela.blit(glifo(self.formatar(item)),
+                        (self.retangulo.x + coluna * self.largura_item,
+                         self.retangulo.y + linha * self.altura_item))
+        return self.retangulo
+
+
+class PainelLateral:
+    '''
+    Os três painéis de texto à direita da grade: a árvore de busca (o
+    caminho escolhido) e as listas de nós abertos e fechados.
+    '''
+
+    def __init__(self):
+        self.arvore = PainelTexto((900, 90, 340, ALTURA - 90), 340)
+        self.abertos = PainelTexto((1250, 90, LARGURA - 1250, 300), 55)
+        self.fechados = PainelTexto(
+            (1250, 440, LARGURA - 1250, ALTURA - 440), 55)
+        self.paineis = (self.arvore, self.abertos, self.fechados)
+
+    def limpar(self):
+        for painel in self.paineis:
+            painel.definir_itens([])
+
+    def desenhar(self, janela):
+        for painel in self.paineis:
+            painel.desenhar(janela)
+
+    def rolar(self, posicao_mouse, linhas):
+        '''
+        Rola o painel que está sob o mouse.
+        Retorno:
+            PainelTexto: painel rolado, ou None se o mouse está fora deles.
+        '''
+        for painel in self.paineis:
+            if painel.retangulo.collidepoint(posicao_mouse):
+                painel.rolar(linhas)
+                return painel
+        return None
 
-    # Reseta as variáveis de deslocamento do texto:
-    deslocamento_y_abertos = 90
-    deslocamento_x_abertos = 1250
-    deslocamento_y_fechados = 440
-    deslocamento_x_fechados = 1250
-    deslocamento_y_arvore = 90
-    deslocamento_x_arvore = 900
 
 def desenhar_grade(janela, qtd_linhas, largura):
     '''
@@ -442,31 +428,111 @@ def desenhar_grade(janela, qtd_linhas, largura):
                          (coluna * margem, 0), (coluna * margem, largura))
 
 
-def redesenhar_tela(janela, matriz, qtd_linhas, largura):
+class Renderizador:
     '''
-    Redesenha, isto é, limpa a tela e redenha tudo novamente com os estados atuais.
-    Parâmetros:
-        janela (pygame window): janela do pygame.
-        matriz (list): lista de listas.
-        qtd_linhas (int): número de linhas.
-        largura (int): tamanho da janela.
+    Desenha a grade na janela redesenhando apenas os pontos cujo estado
+    mudou desde o último quadro (comparando o vetor de estados da grade com
+    uma cópia do que está na tela) e atualizando só os retângulos sujos.
+    As linhas da grade ficam pré-desenhadas em uma superfície transparente,
+    da qual é copiado apenas o pedaço de cada ponto redesenhado.
+    Os quadros respeitam um limite de quadros por segundo: chamadas dentro
+    do intervalo são ignoradas, de modo que a busca não fica presa à
+    velocidade do desenho.
     '''
-    janela.blit(cabecalho_arvore_busca, dest=(900, 50))
 
-    janela.blit(cabecalho_lista_abertos, dest=(1250, 50))
+    # Acima desta quantidade de pontos sujos, a área inteira da grade é
+    # atualizada de uma vez em vez de retângulo por retângulo:
+    LIMITE_RETANGULOS = 256
+
+    def __init__(self, janela, grade, largura, fps=60):
+        self.janela = janela
+        self.grade = grade
+        self.largura = largura
+        self.margem = largura // grade.qtd_linhas
+        self.intervalo = 1 / fps
+        self._ultimo_quadro = None
+        self._na_tela = None  # Cópia dos estados desenhados
+        self._retangulos = []  # Outras áreas alteradas (textos)
+
+        self._linhas = pygame.Surface((largura, largura))
+        self._linhas.set_colorkey((0, 0, 0))
+        desenhar_grade(self._linhas, grade.qtd_linhas, largura)
 
-    janela.blit(cabecalho_lista_fechados, dest=(1250, 400))
+    def sujar(self, retangulo):
+        '''
+        Marca uma área da janela (como a de um texto) para ser atualizada
+        no próximo quadro.
+        '''
+        self._retangulos.append(pygame.Rect(retangulo))
 
-    janela.blit(font_aviso.render(
-        'Aperte a tecla "f5" para reiniciar o jogo', False, (0, 255, 0)), dest=(1300, 25))
+    def sujar_painel(self):
+        '''
+        Marca toda a área à direita da grade, onde ficam os textos.
+        '''
+        self.sujar((self.largura, 0, LARGURA - self.largura, ALTURA))
 
-    for linha in matriz:
-        for ponto in linha:
-            # Desenha cada nó de cada uma das linhas:
-            ponto.desenhar(janela)
+    def quadro(self, forcar=False):
+        '''
+        Desenha um quadro, a não ser que o anterior tenha sido desenhado há
+        menos de 1/fps segundos.
+        Parâmetro:
+            forcar (bool): desenhar mesmo dentro do intervalo.
+        Retorno:
+            bool: se o quadro foi desenhado.
+        '''
+        agora = perf_counter()
+        if not forcar and self._ultimo_quadro is not None \
+                and agora - self._ultimo_quadro < self.intervalo:
+            return False
+        self._ultimo_quadro = agora
+
+        estado = self.grade.estado
+        if self._na_tela is None:
+            self._desenhar_tudo()
+            self._na_tela = estado.copy()
+            self._retangulos.clear()
+            pygame.display.update()
+            return True
 
-    desenhar_grade(janela, qtd_linhas, largura)
-    pygame.display.update()
+        margem = self.margem
+        janela = self.janela
+        retangulos = self._retangulos
+        sujos = np.argwhere(estado != self._na_tela)
+        for linha, coluna in sujos.tolist():
+            retangulo = pygame.Rect(linha * margem, coluna * margem,
+                                    margem, margem)
+            janela.fill(CORES[estado[linha, coluna]], retangulo)
+            janela.blit(self._linhas, retangulo, area=retangulo)
+            if len(sujos) <= self.LIMITE_RETANGULOS:
+                retangulos.append(retangulo)
+        if len(sujos) > self.LIMITE_RETANGULOS:
+            retangulos.append(pygame.Rect(0, 0, self.largura, self.largura))
+        self._na_tela[:] = estado
+
+        if retangulos:
+            pygame.display.update(retangulos)
+            retangulos.clear()
+        return True
+
+    def _desenhar_tudo(self):
+        janela = self.janela
+        janela.blit(cabecalho_arvore_busca, dest=(900, 50))
+
+        janela.blit(cabecalho_lista_abertos, dest=(1250, 50))
+
+        janela.blit(cabecalho_lista_fechados, dest=(1250, 400))
+
+        janela.blit(font_aviso.render(
+            'Aperte a tecla "f5" para reiniciar o jogo', False, (0, 255, 0)),
+            dest=(1300, 25))
+
+        margem = self.margem
+        estado = self.grade.estado
+        for linha in range(self.grade.qtd_linhas):
+            for coluna in range(self.grade.qtd_colunas):
+                janela.fill(CORES[estado[linha, coluna]],
+                            (linha * margem, coluna * margem, margem, margem))
+        janela.blit(self._linhas, (0, 0))
 
 
 def get_mouse_pos(mouse_pos, qtd_linhas, largura):
@@ -488,41 +554,42 @@ def get_mouse_pos(mouse_pos, qtd_linhas, largura):
     return linha, coluna
 
 
-def desenhar_melhor_caminho(caminho, atual, redesenhar_tela):
+def desenhar_melhor_caminho(matriz, caminho, heuristica, redesenhar_tela,
+                            painel):
     '''
     Desenha na tela o melhor caminho após o algoritmo ter encontrado 
     uma solução. Somente será o melhor caminho caso a heurística escolhida 
     seja admissível.
     Parâmetros:
-        caminho(dict): dicionário com todos o nós do melhor caminho. 
-        atual(Point): ponto atual, o destino.
+        matriz (list): lista de listas de Ponto.
+        caminho (list): posições do melhor caminho, do início até o fim.
+        heuristica (function): heurística utilizada na busca.
         redesenhar_tela(function): função que redesenha a tela.
+        painel (PainelLateral): painel onde a árvore de busca é exibida.
     '''
+    pos_fim = caminho[-1]
 
-    global deslocamento_y_arvore, deslocamento_x_arvore
-    print('CAMINHO ESCOLHIDO:')
-    print(f'Ponto: {atual.get_posicao()} G:  {atual.get_g()}  H: {atual.get_heuristica()} | F = {atual.get_g() + atual.get_heuristica()}',  end="  ")
+    def descrever(posicao):
+        g = matriz[posicao[0]][posicao[1]].get_g()
+        h = heuristica(posicao, pos_fim)
+        return f'Ponto: {posicao} G:  {g}  H: {h} | F = {g + h}'
 
-    JANELA.blit(font.render(
-        str(f'Ponto: {atual.get_posicao()} G:  {atual.get_g()}  H: {atual.get_heuristica()} | F = {atual.get_g() + atual.get_heuristica()}'), True, COR_FONTE),
-        dest=(deslocamento_x_arvore, 90))
+    print('CAMINHO ESCOLHIDO:')
+    print(descrever(pos_fim), end="  ")
+    descricoes = [descrever(pos_fim)]
 
     print()
-    while atual in caminho:
-        atual.set_caminho()
-        atual = caminho[atual]
+    # Percorre o caminho do fim para o início:
+    for anterior, atual in zip(caminho[:0:-1], caminho[-2::-1]):
+        linha, coluna = anterior
+        matriz[linha][coluna].set_caminho()
         redesenhar_tela()
 
-        deslocamento_y_arvore += 20
+        descricoes.append(descrever(atual))
+        print(descricoes[-1])
 
-        JANELA.blit(font.render(
-            str(f'Ponto: {atual.get_posicao()} G:  {atual.get_g()}  H: {atual.get_heuristica()} | F = {atual.get_g() + atual.get_heuristica()}'), True, COR_FONTE),
-            dest=(deslocamento_x_arvore, deslocamento_y_arvore))
-
-        print(
-            f'Ponto: {atual.get_posicao()} G:  {atual.get_g()}  H: {atual.get_heuristica()} | F = {atual.get_g() + atual.get_heuristica()}')
-
-        redesenhar_tela()
+    painel.arvore.definir_itens(descricoes)
+    painel.arvore.desenhar(JANELA)
 
 
 # -----------------------------------------------------------------------
@@ -537,14 +604,24 @@ def main(janela, largura):
     else:
         largura = largura
         
-    matriz = criar_matriz(NUM_LINHAS, largura)
+    grade = Grade(NUM_LINHAS)
+    matriz = criar_matriz(grade, largura)
+    renderizador = Renderizador(janela, grade, largura)
+    painel = PainelLateral()
+    painel.desenhar(janela)
     pos_inicial = None
     pos_final = None
+    # Planejador incremental mantido entre as buscas, para que editar
+    # obstáculos e apertar 'r' de novo repare a busca anterior:
+    planejador = None
+    # Abstração HPA* mantida entre as buscas: as edições de obstáculos
+    # marcam os clusters afetados, reconstruídos no próximo 'h':
+    abstracao = None
     em_execucao = True
 
     while em_execucao:
         # Desenha na tela cada mudança de estado:
-        redesenhar_tela(janela, matriz, NUM_LINHAS, largura)
+        renderizador.quadro()
 
         # Para cada evento detectado no jogo:
         for event in pygame.event.get():
@@ -552,6 +629,12 @@ def main(janela, largura):
             if event.type == pygame.QUIT:
                 em_execucao = False
 
+            # Rolagem das listas do painel com a roda do mouse:
+            if event.type == pygame.MOUSEWHEEL:
+                rolado = painel.rolar(pygame.mouse.get_pos(), -event.y)
+                if rolado is not None:
+                    renderizador.sujar(rolado.desenhar(janela))
+
             # Caso botão esquerdo do mouse for pressionado:
             if pygame.mouse.get_pressed()[0]:
                 # Obtém a posição do mouse e mapeia na matriz:
@@ -593,12 +676,9 @@ def main(janela, largura):
                 elif ponto == pos_final:
                     pos_final = None
 
-            # Contador de obstáculos (utilizado na heurística inadmissível):
-            obstaculos = 0
-            for linha in matriz:
-                for ponto in linha:
-                    if ponto.is_obstaculo():
-                        obstaculos += 1
+            # Contador de obstáculos (utilizado na heurística inadmissível),
+            # mantido pela própria grade a cada edição:
+            obstaculos = grade.qtd_obstaculos
 
             # Condição para detectar eventos do teclado
             if event.type == pygame.KEYDOWN:
@@ -606,37 +686,104 @@ def main(janela, largura):
                 # Botão 'f5' -> reinicia o jogo:
                 if pygame.key.name(event.key) == 'f5':
                     # Apaga o as infos sobre listas e árvores de busca na tela:
-                    resetar_textos()
+                    painel.limpar()
+                    painel.desenhar(janela)
                     
                     # Desenha a grade novamente para um novoz
                     main(janela=JANELA, largura=LARGURA)
 
-                # Botão de espaço -> inicializa o jogo:
+                # Descomente uma das três heurísticas abaixo:
+                heuristica = manhattan
+                # heuristica = chebyshev
+                # def heuristica(p1, p2): return abs(
+                #     heuristica_inadmissivel(p1, p2) + obstaculos)
+
+                resultado = None
+                redesenho = renderizador.quadro
+                instrumentos = Instrumentos(
+                    [SinkConsole()] if IMPRIMIR_LISTAS else [], amostragem=1)
+
+                # Botão de espaço -> inicializa o jogo (A* animado):
                 if event.key == pygame.K_SPACE and pos_inicial and pos_final:
-                    for linha in matriz:
-                        for ponto in linha:
-                            # Pontos vizinhos:
-                            ponto.atualizar_pontos_vizinhos(matriz)
-
-                            # Descomente uma das três heurísticas abaixo:
-                            ponto.set_h_manhanttan(pos_final)
-                            # ponto.set_h_chebyshev(pos_final)
-                            # ponto.set_h_inadmissivel(pos_final, obstaculos)
-
-                    # Inicia o algoritmo A*:
-                    busca_A_estrela(
-                        lambda: redesenhar_tela(
-                            janela, matriz, NUM_LINHAS, largura),
-                        matriz,
-                        pos_inicial,
-                        pos_final,
+                    resultado = busca_A_estrela(
+                        grade,
+                        pos_inicial.get_posicao(),
+                        pos_final.get_posicao(),
+                        heuristica=heuristica,
+                        ao_abrir=marcador(grade, ABERTO),
+                        ao_fechar=marcador(grade, FECHADO),
+                        ao_iterar=acompanhar_busca(redesenho),
+                        instrumentos=instrumentos,
                     )
 
+                # Botão 'r' -> replaneja com o D* Lite, reparando a busca
+                # anterior depois de editar os obstáculos:
+                elif event.key == pygame.K_r and pos_inicial and pos_final:
+                    # O reparo só é correto com heurística admissível:
+                    if heuristica not in (
+                            chebyshev, heuristica_admissivel(grade.diagonais)):
+                        heuristica = heuristica_admissivel(grade.diagonais)
+
+                    # Reaproveita o planejador se só os obstáculos mudaram:
+                    if planejador is None \
+                            or planejador.grade is not grade \
+                            or planejador.heuristica is not heuristica \
+                            or planejador.pos_fim != pos_final.get_posicao():
+                        if planejador is not None \
+                                and planejador.grade is grade:
+                            planejador.desconectar()
+                        planejador = BuscaIncremental(
+                            grade, pos_inicial.get_posicao(),
+                            pos_final.get_posicao(), heuristica=heuristica)
+                    elif planejador.pos_inicio != pos_inicial.get_posicao():
+                        planejador.mover_inicio(pos_inicial.get_posicao())
+
+                    # Inicia (ou repara) a busca:
+                    resultado = planejador.buscar(
+                        ao_abrir=marcador(grade, ABERTO),
+                        ao_fechar=marcador(grade, FECHADO),
+                        ao_iterar=acompanhar_busca(redesenho),
+                        instrumentos=instrumentos,
+                    )
+
+                # Botão 'h' -> busca hierárquica (HPA*), reconstruindo só os
+                # clusters alterados desde a busca anterior:
+                elif event.key == pygame.K_h and pos_inicial and pos_final:
+                    if abstracao is None \
+                            or abstracao.grade is not grade \
+                            or abstracao.heuristica is not heuristica:
+                        if abstracao is not None \
+                                and abstracao.grade is grade:
+                            abstracao.desconectar()
+                        abstracao = BuscaHierarquica(
+                            grade, TAMANHO_CLUSTER, heuristica=heuristica)
+
+                    resultado = abstracao.buscar(pos_inicial.get_posicao(),
+                                                 pos_final.get_posicao())
+
+                if resultado is not None:
+                    if resultado:
+                        exibir_resultado(resultado, matriz, pos_inicial,
+                                         pos_final, heuristica, redesenho,
+                                         painel)
+                    # Mostra o estado final e os textos escritos no painel:
+                    renderizador.sujar_painel()
+                    renderizador.quadro(forcar=True)
+
                 # Recria a tela após execução:
                 if event.key == pygame.K_BACKSPACE:
                     pos_inicial = None
                     pos_final = None
-                    matriz = criar_matriz(NUM_LINHAS, largura)
+                    # O planejador e a abstração deixam a grade antiga:
+                    if planejador is not None:
+                        planejador.desconectar()
+                        planejador = None
+                    if abstracao is not None:
+                        abstracao.desconectar()
+                        abstracao = None
+                    grade = Grade(NUM_LINHAS)
+                    matriz = criar_matriz(grade, largura)
+                    renderizador = Renderizador(janela, grade, largura)
 
     pygame.quit()  # Encerra a execução
 
@@ -644,4 +791,6 @@ def main(janela, largura):
 # -----------------------------------------------------------------------
 # INICIA O JOGO
 # -----------------------------------------------------------------------
-main(janela=JANELA, largura=LARGURA)
\ No newline at end of file
+if __name__ == '__main__':
+    inicializar_janela()
+    main(janela=JANELA, largura=LARGURA)
@@ -0,0 +1,267 @@
+"""
+Heurística ALT (A*, marcos e desigualdade triangular).
+Alguns pontos da grade são escolhidos como marcos e as distâncias exatas
+de cada marco até todos os pontos (e de todos os pontos até ele) são
+pré-calculadas. Pela desigualdade triangular, para qualquer marco L:
+    d(n, t) >= d(L, t) - d(L, n)   e   d(n, t) >= d(n, L) - d(t, L)
+e o maior desses limites é uma heurística admissível que, ao contrário de
+manhattan e chebyshev, "enxerga" as paredes. As tabelas ficam em vetores
+int32 e podem ser salvas em disco e carregadas rapidamente.
+"""
+from array import array
+from collections import deque
+from hashlib import blake2b
+from heapq import heappush, heappop
+import random
+
+import numpy as np
+
+from grade import INFINITO
+from heuristicas import heuristica_admissivel, VERSOES_LOTE
+
+
+def assinatura_grade(grade):
+    '''
+    Resumo dos obstáculos, custos e vizinhança da grade, usado para
+    conferir se tabelas salvas em disco correspondem à grade atual.
+    Retorno:
+        str: assinatura em hexadecimal.
+    '''
+    resumo = blake2b(digest_size=16)
+    resumo.update(f'{grade.qtd_linhas}x{grade.qtd_colunas}'
+                  f':{int(grade.diagonais)}'.encode())
+    resumo.update(grade.obstaculo_plano)
+    resumo.update(grade.custo_plano)
+    return resumo.hexdigest()
+
+
+def _distancias(grade, origem, reverso=False):
+    '''
+    Distâncias exatas de origem até todos os pontos (ou, com reverso=True,
+    de todos os pontos até origem). Em grades de custo uniforme é feita uma
+    busca em largura; nas demais, Dijkstra.
+    Retorno:
+        ndarray: distância de cada índice (INFINITO se inalcançável).
+    '''
+    distancia = array('i', [INFINITO]) * grade.tamanho
+    vizinhos = grade.vizinhos
+    custo = grade.custo_plano
+    distancia[origem] = 0
+
+    if grade.custo_uniforme():
+        fila = deque([origem])
+        while fila:
+            atual = fila.popleft()
+            proxima = distancia[atual] + 1
+            for vizinho in vizinhos(atual):
+                if distancia[vizinho] == INFINITO:
+                    distancia[vizinho] = proxima
+                    fila.append(vizinho)
+    else:
+        heap = [(0, origem)]
+        while heap:
+            d, atual = heappop(heap)
+            if d > distancia[atual]:
+                continue
+            for vizinho in vizinhos(atual):
+                # Ida: custo de entrar no vizinho. Volta: o de entrar no
+                # ponto atual, vindo do vizinho.
+                nova = d + (custo[atual] if reverso else custo[vizinho])
+                if nova < distancia[vizinho]:
+                    distancia[vizinho] = nova
+                    heappush(heap, (nova, vizinho))
+
+    return np.frombuffer(distancia, dtype=np.int32)
+
+
+class HeuristicaMarcos:
+    '''
+    Heurística ALT de uma grade. Pode ser passada como 'heuristica' para
+    qualquer busca: é chamável como h(p1, p2) e, através de por_indice,
+    é usada diretamente pelo heuristica_por_indice. O valor é o maior entre
+    os limites dos marcos e a heurística admissível comum da grade.
+    Continua admissível se obstáculos forem adicionados depois do cálculo
+    (as distâncias só aumentam), mas deve ser recalculada quando obstáculos
+    são removidos ou custos diminuem.
+    Atributos:
+        marcos (list): índices dos pontos escolhidos como marcos.
+        partida (ndarray): K x N, distâncias de cada marco até cada ponto.
+        chegada (ndarray): K x N, distâncias de cada ponto até cada marco
+            (o mesmo vetor de partida em grades de custo uniforme).
+        assinatura (str): assinatura da grade usada no cálculo.
+    '''
+
+    # Os limites são diferenças de distâncias inteiras (ver
+    # heuristica_inteira):
+    inteira = True
+
+    def __init__(self, marcos, partida, chegada, qtd_linhas, qtd_colunas,
+                 diagonais, assinatura):
+        self.marcos = list(marcos)
+        self.partida = partida
+        self.chegada = chegada
+        self.qtd_linhas = qtd_linhas
+        self.qtd_colunas = qtd_colunas
+        self.diagonais = diagonais
+        self.assinatura = assinatura
+        self.base = heuristica_admissivel(diagonais)
+        self._campos = {}
+
+    @classmethod
+    def calcular(cls, grade, qtd_marcos=8, semente=0):
+        '''
+        Escolhe os marcos e calcula suas tabelas de distância. Os marcos
+        são escolhidos pelo critério "mais distante": o primeiro é o ponto
+        mais distante de um ponto livre sorteado, e cada seguinte é o ponto
+        mais distante de todos os marcos já escolhidos, o que os espalha
+        pelas bordas do mapa.
+        Parâmetros:
+            grade (Grade): grade a ser pré-processada.
+            qtd_marcos (int): quantidade de marcos.
+            semente (int): semente do sorteio do ponto inicial.
+        Retorno:
+            HeuristicaMarcos: heurística pronta para uso.
+        '''
+        livres = np.flatnonzero(grade.obstaculo.ravel() == 0)
+        if not len(livres):
+            raise ValueError('A grade não tem pontos livres.')
+        uniforme = grade.custo_uniforme()
+
+        sorteado = int(random.Random(semente).choice(livres))
+        distancia = _distancias(grade, sorteado).astype(np.int64)
+
+        marcos, partida, chegada = [], [], []
+        for _ in range(qtd_marcos):
+            marco = int(np.argmax(np.where(distancia < INFINITO,
+                                           distancia, -1)))
+            if marco in marcos:  # Não sobrou ponto distante dos marcos.
+                break
+            ida = _distancias(grade, marco)
+            marcos.append(marco)
+            partida.append(ida)
+            chegada.append(ida if uniforme
+                           else _distancias(grade, marco, reverso=True))
+            # O próximo marco é o ponto mais distante dos já escolhidos:
+            if len(marcos) == 1:
+                distancia = ida.astype(np.int64)
+            else:
+                distancia = np.minimum(distancia, ida)
+
+        partida = np.stack(partida)
+        chegada = partida if uniforme else np.stack(chegada)
+        return cls(marcos, partida, chegada, grade.qtd_linhas,
+                   grade.qtd_colunas, grade.diagonais,
+                   assinatura_grade(grade))
+
+    # -------------------------------------------------------------------
+    # Disco
+    # -------------------------------------------------------------------
+    def salvar(self, arquivo):
+        '''
+        Salva as tabelas em um arquivo .npz (sem compressão, para carregar
+        rápido).
+        '''
+        tabelas = {'partida': self.partida}
+        if self.chegada is not self.partida:
+            tabelas['chegada'] = self.chegada
+        np.savez(arquivo, marcos=np.array(self.marcos, dtype=np.int64),
+                 formato=np.array([self.qtd_linhas, self.qtd_colunas,
+                                   int(self.diagonais)]),
+                 assinatura=np.array(self.assinatura), **tabelas)
+
+    @classmethod
+    def carregar(cls, arquivo, grade=None):
+        '''
+        Carrega tabelas salvas por salvar().
+        Parâmetros:
+            arquivo (str): caminho do arquivo .npz.
+            grade (Grade): opcional; se informada, confere se as tabelas
+                foram calculadas para ela.
+        Retorno:
+            HeuristicaMarcos: heurística carregada.
+        '''
+        with np.load(arquivo) as dados:
+            qtd_linhas, qtd_colunas, diagonais = dados['formato'].tolist()
+            assinatura = str(dados['assinatura'])
+            if grade is not None and assinatura != assinatura_grade(grade):
+                raise ValueError(
+                    'As tabelas de marcos não correspondem a esta grade.')
+            partida = dados['partida']
+            chegada = dados['chegada'] if 'chegada' in dados else partida
+            return cls(dados['marcos'].tolist(), partida, chegada,
+                       qtd_linhas, qtd_colunas, bool(diagonais), assinatura)
+
+    # -------------------------------------------------------------------
+    # Heurística
+    # -------------------------------------------------------------------
+    def __call__(self, p1, p2):
+        n = p1[0] * self.qtd_colunas + p1[1]
+        t = p2[0] * self.qtd_colunas + p2[1]
+        limite = self.base(p1, p2)
+        for ida, volta in zip(self.partida, self.chegada):
+            limite = max(limite, int(ida[t]) - int(ida[n]),
+                         int(volta[n]) - int(volta[t]))
+        return limite
+
+    def por_indice(self, pos_fim, campo=False, reverso=False):
+        '''
+        Versão h(indice) da heurística até pos_fim, no formato de
+        heuristica_por_indice.
+        Parâmetros:
+            pos_fim (tuple): posição final, para onde quer ir.
+            campo (bool): calcular de uma vez, com NumPy, a heurística de
+                todos os pontos (os últimos campos ficam guardados).
+            reverso (bool): estimar a distância de pos_fim até cada ponto.
+        Retorno:
+            function: h(indice).
+        '''
+        pos_fim = tuple(pos_fim)
+        if campo:
+            return self._campo(pos_fim, reverso).__getitem__
+
+        t = pos_fim[0] * self.qtd_colunas + pos_fim[1]
+        # Por marco: (tabela de ida, d(L, t), tabela de volta, d(t, L)),
+        # com as tabelas como memoryview para acesso rápido item a item.
+        # No sentido reverso os limites trocam de sinal, o que é feito
+        # negando o sinal de tudo:
+        sinal = -1 if reverso else 1
+        termos = [(ida.data, sinal * int(ida[t]), volta.data,
+                   sinal * int(volta[t]))
+                  for ida, volta in zip(self.partida, self.chegada)]
+        base = self.base
+        qtd_colunas = self.qtd_colunas
+
+        if reverso:
+            def h(indice):
+                limite = base(divmod(indice, qtd_colunas), pos_fim)
+                for ida, ida_fim, volta, volta_fim in termos:
+                    limite = max(limite, ida_fim + ida[indice],
+                                 -volta[indice] - volta_fim)
+                return limite
+        else:
+            def h(indice):
+                limite = base(divmod(indice, qtd_colunas), pos_fim)
+                for ida, ida_fim, volta, volta_fim in termos:
+                    limite = max(limite, ida_fim - ida[indice],
+                                 volta[indice] - volta_fim)
+                return limite
+
+        return h
+
+    def _campo(self, pos_fim, reverso):
+        chave = (pos_fim, reverso)
+        if chave not in self._campos:
+            if len(self._campos) >= 8:
+                del self._campos[next(iter(self._campos))]
+            t = pos_fim[0] * self.qtd_colunas + pos_fim[1]
+            sinal = -1 if reverso else 1
+            partida = self.partida.astype(np.int64)
+            chegada = self.chegada.astype(np.int64)
+            limite = np.maximum(
+                (sinal * (partida[:, t:t + 1] - partida)).max(axis=0),
+                (sinal * (chegada - chegada[:, t:t + 1])).max(axis=0))
+            linhas, colunas = np.indices((self.qtd_linhas, self.qtd_colunas))
+            limite = np.maximum(limite, VERSOES_LOTE[self.base](
+                linhas, colunas, pos_fim).ravel())
+            self._campos[chave] = array('q', limite.tobytes())
+        return self._campos[chave]
@@ -0,0 +1,50 @@
+"""
+Cópia da grade em memória compartilhada, para processos que buscam na
+mesma grade (lote.py, servico.py e paralela.py).
+O bloco guarda os obstáculos e em seguida os custos, um byte por ponto.
+Cada processo monta a partir dele uma Grade própria, em vez de receber a
+grade serializada.
+"""
+from multiprocessing.shared_memory import SharedMemory
+
+from grade import Grade
+
+
+def compartilhar_grade(grade):
+    '''
+    Copia os obstáculos e os custos da grade para um bloco novo de memória
+    compartilhada. Quem cria o bloco precisa liberá-lo com close() e
+    unlink() quando os processos não precisarem mais dele.
+    Parâmetro:
+        grade (Grade): grade a ser copiada.
+    Retorno:
+        SharedMemory: o bloco (o nome fica em .name).
+    '''
+    tamanho = grade.tamanho
+    memoria = SharedMemory(create=True, size=2 * tamanho)
+    memoria.buf[:tamanho] = grade.obstaculo_plano
+    memoria.buf[tamanho:2 * tamanho] = grade.custo_plano
+    return memoria
+
+
+def grade_compartilhada(nome, qtd_linhas, qtd_colunas, diagonais):
+    '''
+    Monta uma grade local a partir de um bloco criado por
+    compartilhar_grade.
+    Parâmetros:
+        nome (str): nome do bloco de memória compartilhada.
+        qtd_linhas, qtd_colunas (int): dimensões da grade.
+        diagonais (bool): movimentos diagonais habilitados.
+    Retorno:
+        Grade: grade nova, com os obstáculos e custos do bloco.
+    '''
+    grade = Grade(qtd_linhas, qtd_colunas, diagonais)
+    memoria = SharedMemory(name=nome)
+    try:
+        tamanho = grade.tamanho
+        grade.obstaculo_plano[:] = memoria.buf[:tamanho]
+        grade.custo_plano[:] = memoria.buf[tamanho:2 * tamanho]
+    finally:
+        memoria.close()
+    grade.recalcular_movimentos()
+    return grade
@@ -0,0 +1,371 @@
+"""
+Busca com memória limitada (SMA*, Simplified Memory-bounded A*).
+Enquanto a memória dá, a busca é um A*: expande sempre o nó de menor f. Ao
+atingir o limite de nós, descarta a folha de maior f (a mais rasa, nos
+empates) e guarda no pai o f dela; o pai volta à fila com esse valor e,
+se um dia for o melhor nó, regera o filho esquecido. Os valores de f são
+levados de filho para pai (pathmax), de modo que continuam limites
+inferiores.
+Com pouca memória a busca refaz trabalho, mas nunca passa do limite: em
+vez de esgotar a memória do processo, fica mais lenta. Caminhos com mais
+pontos que o limite não cabem na memória: com heurística admissível, o
+caminho devolvido é o melhor entre os que cabem, e pode ser pior que o
+ótimo quando um ramo precisou ser podado por falta de espaço (o resultado
+indica isso em 'otimo'). Se nenhum caminho cabe, nada é encontrado; como
+provar isso pode levar muito tempo, a busca aceita um prazo.
+"""
+from heapq import heapify, heappop, heappush
+from itertools import count
+import sys
+from time import perf_counter
+
+from busca import ResultadoBusca
+from grade import INFINITO
+from heuristicas import heuristica_admissivel, heuristica_por_indice
+
+# Expansões entre duas consultas ao relógio:
+INTERVALO_RELOGIO = 64
+
+
+class _No:
+    '''
+    Nó da árvore de busca mantida em memória.
+    '''
+    __slots__ = ('indice', 'g', 'f', 'pai', 'profundidade', 'filhos',
+                 'esquecidos', 'aberto', 'expandido')
+
+    def __init__(self, indice, g, f, pai, profundidade):
+        self.indice = indice
+        self.g = g
+        self.f = f
+        self.pai = pai
+        self.profundidade = profundidade
+        self.filhos = set()    # Índices dos filhos na memória.
+        self.esquecidos = {}   # Índice -> f dos filhos descartados.
+        self.aberto = False
+        self.expandido = False
+
+
+# Estimativas de bytes de um nó (com a entrada no dicionário de nós e o
+# conjunto de filhos) e de uma entrada em uma das filas:
+_BYTES_POR_NO = (sys.getsizeof(_No(0, 0, 0, None, 0)) + sys.getsizeof(set())
+                 + sys.getsizeof({}) + 3 * sys.getsizeof(2 ** 20) + 3 * 8)
+_BYTES_POR_ENTRADA = (sys.getsizeof((0, 0, 0, None))
+                      + 2 * sys.getsizeof(2 ** 20) + 8)
+
+
+class ResultadoMemoriaLimitada(ResultadoBusca):
+    '''
+    Resultado da busca com memória limitada.
+    Atributos (além dos de ResultadoBusca):
+        pico_nos (int): maior quantidade de nós na memória ao mesmo tempo.
+        memoria_estimada (int): estimativa, em bytes, do pico de memória
+            dos nós e das filas (sem contar a grade), calculada a partir do
+            tamanho de um nó e de uma entrada de fila, e não medida. Para
+            medir, use o tracemalloc, como em benchmark.py.
+        descartes (int): quantidade de nós descartados para liberar
+            memória (0 quando o limite não foi atingido).
+        interrompida (bool): se a busca parou por causa do prazo.
+        otimo (bool): se o caminho é ótimo (com heurística admissível).
+            Falso quando nada foi encontrado ou quando algum ramo foi
+            podado por não caber em limite_nos: um caminho melhor, mais
+            longo que o limite, pode ter ficado de fora.
+    '''
+
+    def __init__(self, encontrado, custo, caminho, lista_abertos,
+                 lista_fechados, iteracoes, operacoes_fila, pico_nos,
+                 memoria_estimada, descartes, interrompida, otimo):
+        super().__init__(encontrado, custo, caminho, lista_abertos,
+                         lista_fechados, iteracoes, operacoes_fila)
+        self.pico_nos = pico_nos
+        self.memoria_estimada = memoria_estimada
+        self.descartes = descartes
+        self.interrompida = interrompida
+        self.otimo = otimo
+
+
+class _Arvore:
+    '''
+    Nós em memória e duas filas: a dos abertos, por menor f, para escolher
+    quem expandir, e a das folhas abertas, por maior f, para escolher quem
+    descartar. As filas são heaps com remoção preguiçosa: uma entrada só
+    vale se o nó ainda está aberto, na memória e com o mesmo f.
+    '''
+
+    def __init__(self):
+        self.nos = {}
+        self.abertos = set()
+        self.fila_min = []
+        self.fila_max = []
+        self.operacoes = 0
+        self._contador = count()
+
+    def abrir(self, no):
+        no.aberto = True
+        self.abertos.add(no.indice)
+        desempate = next(self._contador)
+        heappush(self.fila_min, (no.f, -no.profundidade, -desempate, no))
+        self.operacoes += 1
+        if not no.filhos:
+            heappush(self.fila_max, (-no.f, no.profundidade, desempate, no))
+            self.operacoes += 1
+        # Limpa as entradas inválidas quando elas passam a dominar:
+        if len(self.fila_min) > 4 * len(self.abertos) + 64:
+            self.fila_min = [e for e in self.fila_min
+                             if self._valida(e[3], e[0])]
+            self.fila_max = [e for e in self.fila_max
+                             if self._valida(e[3], -e[0])
+                             and not e[3].filhos]
+            heapify(self.fila_min)
+            heapify(self.fila_max)
+
+    def _valida(self, no, f):
+        return no.aberto and no.f == f and self.nos.get(no.indice) is no
+
+    def melhor(self):
+        '''
+        Retira da fila o aberto de menor f (nos empates, o mais fundo e,
+        depois, o mais recente, como a FilaBaldes do A*).
+        '''
+        fila = self.fila_min
+        while fila:
+            f, _, _, no = heappop(fila)
+            self.operacoes += 1
+            if self._valida(no, f):
+                no.aberto = False
+                self.abertos.discard(no.indice)
+                return no
+        return None
+
+    def pior_folha(self):
+        '''
+        Aberto de maior f sem filhos na memória (o mais raso, nos empates);
+        a raiz nunca é escolhida. Nós que ganharam filhos saem da fila e
+        voltam quando perdem o último (ver anotar).
+        '''
+        fila = self.fila_max
+        while fila:
+            _, _, _, no = entrada = heappop(fila)
+            self.operacoes += 1
+            if self._valida(no, -entrada[0]) and not no.filhos \
+                    and no.pai is not None:
+                return no
+        return None
+
+    def esquecer(self, no, f):
+        '''
+        Tira o nó (que não pode ter filhos na memória) e anota f no pai,
+        que volta à fila com o menor f entre os filhos esquecidos.
+        '''
+        del self.nos[no.indice]
+        no.aberto = False
+        self.abertos.discard(no.indice)
+        self.anotar(no.pai, no.indice, f)
+
+    def anotar(self, pai, indice, f):
+        '''
+        Registra no pai um filho esquecido com o f dado.
+        '''
+        pai.filhos.discard(indice)
+        pai.esquecidos[indice] = f
+        f_pai = min(pai.esquecidos.values())
+        if not pai.aberto or pai.f != f_pai or not pai.filhos:
+            pai.f = f_pai
+            self.abrir(pai)
+
+    def remover_subarvore(self, no):
+        '''
+        Tira o nó e todos os seus descendentes da memória.
+        '''
+        pilha = [no]
+        while pilha:
+            atual = pilha.pop()
+            del self.nos[atual.indice]
+            atual.aberto = False
+            self.abertos.discard(atual.indice)
+            pilha.extend(self.nos[filho] for filho in atual.filhos)
+
+
+def busca_sma(grade, pos_inicio, pos_fim, heuristica=None, campo=False,
+              limite_nos=1_000_000, prazo=None, ao_abrir=None,
+              ao_fechar=None, ao_iterar=None, instrumentos=None):
+    '''
+    Busca com memória limitada a limite_nos nós. Com memória suficiente,
+    expande os mesmos nós que o A*; com menos, descarta e regera nós. Os
+    vetores g e pai da grade não são usados, e a busca pode ser usada com
+    a GradeMapeada sem que o estado esparso dela cresça.
+    Parâmetros:
+        grade (Grade): grade sobre a qual a busca é feita.
+        pos_inicio (tuple): posição (linha, coluna) da qual parte-se.
+        pos_fim (tuple): posição (linha, coluna) na qual pretende-se chegar.
+        heuristica (function): heurística h(p1, p2) entre duas posições.
+            Por padrão, manhattan (ou chebyshev em grades com diagonais).
+        campo (bool): usar o campo de heurística pré-calculado (ocupa um
+            valor por ponto da grade).
+        limite_nos (int): máximo de nós na memória ao mesmo tempo.
+        prazo (float): opcional, tempo máximo em segundos; esgotado, a
+            busca para sem caminho.
+        ao_abrir, ao_fechar, ao_iterar (function): callbacks opcionais,
+            como em busca_A_estrela; ao_iterar recebe os abertos e um
+            conjunto vazio no lugar dos fechados.
+        instrumentos (Instrumentos): opcional, como em busca_A_estrela;
+            'reaberturas' conta os nós regerados depois de descartados.
+    Retorno:
+        ResultadoMemoriaLimitada: resultado da busca.
+    '''
+    limite_tempo = perf_counter() + prazo if prazo is not None else None
+    if instrumentos is not None:
+        instrumentos.iniciar()
+    amostragem = instrumentos.amostragem if instrumentos is not None else 0
+
+    if heuristica is None:
+        heuristica = heuristica_admissivel(grade.diagonais)
+
+    inicio = grade.indice(*pos_inicio)
+    fim = grade.indice(*pos_fim)
+    custo = grade.custo_plano
+    vizinhos = grade.vizinhos
+    h = heuristica_por_indice(heuristica, pos_fim, grade.qtd_linhas,
+                              grade.qtd_colunas, campo)
+
+    arvore = _Arvore()
+    nos = arvore.nos
+    raiz = _No(inicio, 0, h(inicio), None, 0)
+    # Um obstáculo não é início nem fim de caminho (como em busca.py):
+    if not grade.is_obstaculo(*pos_inicio) \
+            and not grade.is_obstaculo(*pos_fim):
+        nos[inicio] = raiz
+        arvore.abrir(raiz)
+
+    if instrumentos is not None:
+        instrumentos.marcar('preparacao')
+
+    iterador = 0
+    descartes = 0
+    reaberturas = 0
+    pico_nos = len(nos)
+    memoria_estimada = len(nos) * _BYTES_POR_NO + _BYTES_POR_ENTRADA \
+        * (len(arvore.fila_min) + len(arvore.fila_max))
+    encontrado = None
+    interrompida = False
+    podado = False
+    while True:
+        if limite_tempo is not None and iterador % INTERVALO_RELOGIO == 0 \
+                and perf_counter() >= limite_tempo:
+            interrompida = True
+            break
+
+        atual = arvore.melhor()
+        if atual is None or atual.f >= INFINITO:
+            break
+        if atual.indice == fim:
+            encontrado = atual
+            break
+
+        iterador += 1
+        if ao_fechar is not None:
+            ao_fechar(atual.indice)
+
+        # Na primeira expansão entram todos os vizinhos; nas seguintes, só
+        # os filhos esquecidos, com o f que tinham.
+        if atual.expandido:
+            candidatos = list(atual.esquecidos.items())
+            reaberturas += len(candidatos)
+        else:
+            candidatos = [(vizinho, 0) for vizinho in vizinhos(atual.indice)]
+        atual.esquecidos = {}
+        atual.expandido = True
+        # Descartar um filho pode reabrir o nó com outro f; os filhos usam
+        # o f com que ele saiu da fila.
+        f_atual = atual.f
+
+        # Abre espaço descartando as piores folhas:
+        while len(nos) + len(candidatos) > limite_nos:
+            folha = arvore.pior_folha()
+            if folha is None:
+                break
+            arvore.esquecer(folha, folha.f)
+            descartes += 1
+
+        profundidade = atual.profundidade + 1
+        for vizinho, f_esquecido in candidatos:
+            g_vizinho = atual.g + custo[vizinho]
+            existente = nos.get(vizinho)
+            if existente is not None:
+                if existente.g <= g_vizinho:
+                    continue
+                # Caminho melhor até um nó na memória: a cópia antiga sai,
+                # com a subárvore, e o pai dela não precisa mais do ramo.
+                arvore.remover_subarvore(existente)
+                arvore.anotar(existente.pai, vizinho, INFINITO)
+
+            f_vizinho = max(g_vizinho + h(vizinho), f_esquecido, f_atual)
+            # Um nó que ocupa a última vaga não tem como ter filhos; os
+            # caminhos que passariam por ele ficam de fora:
+            if profundidade + 1 >= limite_nos and vizinho != fim:
+                f_vizinho = INFINITO
+                podado = True
+            if len(nos) >= limite_nos:
+                atual.esquecidos[vizinho] = f_vizinho
+                continue
+            filho = nos[vizinho] = _No(vizinho, g_vizinho, f_vizinho, atual,
+                                       profundidade)
+            atual.filhos.add(vizinho)
+            arvore.abrir(filho)
+            if ao_abrir is not None:
+                ao_abrir(vizinho)
+
+        if atual.esquecidos:
+            atual.f = min(atual.esquecidos.values())
+            arvore.abrir(atual)
+        elif not atual.filhos:
+            # Sem filhos úteis: todos os vizinhos têm cópias melhores. O nó
+            # fica na memória, como um fechado do A* (evita que seja
+            # regerado por um caminho pior), mas é o primeiro a sair.
+            if atual is raiz:
+                break
+            atual.f = INFINITO
+            arvore.abrir(atual)
+
+        if len(nos) > pico_nos:
+            pico_nos = len(nos)
+        memoria = (len(nos) * _BYTES_POR_NO + _BYTES_POR_ENTRADA
+                   * (len(arvore.fila_min) + len(arvore.fila_max)))
+        if memoria > memoria_estimada:
+            memoria_estimada = memoria
+
+        if amostragem and iterador % amostragem == 0:
+            instrumentos.emitir('iteracao', iteracao=iterador,
+                                lista_abertos=arvore.abertos,
+                                lista_fechados=set())
+
+        if ao_iterar is not None:
+            ao_iterar(iterador, arvore.abertos, set())
+
+    if instrumentos is not None:
+        instrumentos.marcar('busca')
+
+    lista_fechados = set(nos) - arvore.abertos
+    if encontrado is not None:
+        nos_caminho = []
+        no = encontrado
+        while no is not None:
+            nos_caminho.append(no.indice)
+            no = no.pai
+        resultado = ResultadoMemoriaLimitada(
+            True, encontrado.g,
+            [grade.posicao(i) for i in reversed(nos_caminho)],
+            arvore.abertos, lista_fechados, iterador, arvore.operacoes,
+            pico_nos, memoria_estimada, descartes, False, not podado)
+    else:
+        resultado = ResultadoMemoriaLimitada(
+            False, float("inf"), [], arvore.abertos, lista_fechados,
+            iterador, arvore.operacoes, pico_nos, memoria_estimada,
+            descartes, interrompida, False)
+
+    if instrumentos is not None:
+        instrumentos.marcar('caminho')
+        instrumentos.finalizar(expansoes=iterador,
+                               insercoes=arvore.operacoes // 2,
+                               obsoletas=0, reaberturas=reaberturas)
+    return resultado
@@ -0,0 +1,21 @@
+"""
+Buscadores e heurísticas escolhidos pelo nome nas linhas de comando
+(benchmark.py e movingai.py). Fica em um módulo próprio para que um não
+precise importar o outro só para ter a mesma lista.
+"""
+from bidirecional import busca_bidirecional
+from busca import busca_A_estrela
+from heuristicas import manhattan, chebyshev, heuristica_inadmissivel
+from jps import busca_jps
+
+HEURISTICAS = {
+    'manhattan': manhattan,
+    'chebyshev': chebyshev,
+    'inadmissivel': heuristica_inadmissivel,
+}
+
+MOTORES = {
+    'a_estrela': busca_A_estrela,
+    'jps': busca_jps,
+    'bidirecional': busca_bidirecional,
+}
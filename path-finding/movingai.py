@@ -0,0 +1,241 @@
+"""
+Leitura e escrita dos formatos .map e .scen do MovingAI (benchmarks de
+busca em grades de Sturtevant) e execução em fluxo dos cenários.
+O .map é lido de uma vez e convertido para os obstáculos da Grade com uma
+tabela de tradução do NumPy, sem laço Python por ponto. O .scen é lido
+linha a linha, e o executor resolve uma consulta de cada vez, gravando as
+estatísticas de cada uma (JSON Lines) sem acumular os resultados.
+Uso:
+    python movingai.py mapas/arena.map.scen --saida estatisticas.jsonl
+    python movingai.py cenarios/*.scen --motor jps --mapas mapas/
+"""
+import argparse
+import json
+import os
+import sys
+from time import perf_counter
+
+import numpy as np
+
+from busca import busca_A_estrela
+from grade import Grade
+from motores import HEURISTICAS, MOTORES
+from terrenos import OBSTACULO_POR_BYTE, ler_dimensoes
+
+
+# -----------------------------------------------------------------------
+# MAPAS
+# -----------------------------------------------------------------------
+def ler_mapa(arquivo, diagonais=True):
+    '''
+    Carrega um arquivo .map em uma Grade nova. Os mapas "octile" do MovingAI
+    permitem diagonais sem cortar quinas, a mesma regra da Grade.
+    Parâmetros:
+        arquivo (str): caminho do arquivo .map.
+        diagonais (bool): habilitar os movimentos diagonais.
+    Retorno:
+        Grade: grade com os obstáculos do mapa.
+    '''
+    with open(arquivo, 'rb') as entrada:
+        conteudo = entrada.read()
+
+    cabecalho, separador, corpo = conteudo.partition(b'\nmap')
+    if not separador:
+        raise ValueError(f'{arquivo}: seção "map" não encontrada.')
+    qtd_linhas, qtd_colunas = ler_dimensoes(cabecalho.split(b'\n'), arquivo)
+
+    linhas = corpo.split(None)
+    if len(linhas) < qtd_linhas \
+            or any(len(linha) < qtd_colunas for linha in linhas[:qtd_linhas]):
+        raise ValueError(f'{arquivo}: mapa menor que {qtd_linhas}x'
+                         f'{qtd_colunas}.')
+    pontos = np.frombuffer(
+        b''.join(linha[:qtd_colunas] for linha in linhas[:qtd_linhas]),
+        dtype=np.uint8).reshape(qtd_linhas, qtd_colunas)
+
+    grade = Grade(qtd_linhas, qtd_colunas, diagonais)
+    grade.obstaculo[:] = OBSTACULO_POR_BYTE[pontos]
+    grade.recalcular_movimentos()
+    return grade
+
+
+def salvar_mapa(grade, arquivo):
+    '''
+    Grava os obstáculos da grade como um arquivo .map ('@' para obstáculos
+    e '.' para pontos livres).
+    '''
+    pontos = np.where(grade.obstaculo, ord('@'), ord('.')).astype(np.uint8)
+    quebras = np.full((grade.qtd_linhas, 1), ord('\n'), dtype=np.uint8)
+    tipo = 'octile' if grade.diagonais else 'four-connected'
+    with open(arquivo, 'wb') as saida:
+        saida.write(f'type {tipo}\nheight {grade.qtd_linhas}\n'
+                    f'width {grade.qtd_colunas}\nmap\n'.encode())
+        saida.write(np.hstack([pontos, quebras]).tobytes())
+
+
+# -----------------------------------------------------------------------
+# CENÁRIOS
+# -----------------------------------------------------------------------
+class Consulta:
+    '''
+    Uma linha de um arquivo .scen. As posições seguem a convenção da Grade,
+    (linha, coluna), ao contrário do arquivo, que guarda x (coluna) e y
+    (linha).
+    Atributos:
+        balde (int): grupo de dificuldade da consulta.
+        mapa (str): nome do arquivo .map, como escrito no cenário.
+        qtd_linhas, qtd_colunas (int): dimensões do mapa.
+        pos_inicio, pos_fim (tuple): posições (linha, coluna).
+        otimo (float): custo ótimo informado, com diagonais custando raiz
+            de 2 (não é diretamente comparável aos custos da Grade, em que
+            todo passo custa o custo do ponto de chegada).
+    '''
+
+    def __init__(self, balde, mapa, qtd_linhas, qtd_colunas, pos_inicio,
+                 pos_fim, otimo):
+        self.balde = balde
+        self.mapa = mapa
+        self.qtd_linhas = qtd_linhas
+        self.qtd_colunas = qtd_colunas
+        self.pos_inicio = pos_inicio
+        self.pos_fim = pos_fim
+        self.otimo = otimo
+
+
+def ler_cenarios(arquivo):
+    '''
+    Lê, sob demanda, as consultas de um arquivo .scen (versão 1).
+    Parâmetro:
+        arquivo (str): caminho do arquivo .scen.
+    Retorno:
+        generator: objetos Consulta, na ordem do arquivo.
+    '''
+    with open(arquivo) as entrada:
+        for numero, linha in enumerate(entrada, 1):
+            campos = linha.split('\t')
+            if numero == 1 and campos[0].startswith('version'):
+                continue
+            if not linha.strip():
+                continue
+            if len(campos) != 9:
+                raise ValueError(f'{arquivo}:{numero}: esperados 9 campos '
+                                 f'separados por tabulação.')
+            balde, mapa, largura, altura, x1, y1, x2, y2, otimo = campos
+            yield Consulta(int(balde), mapa, int(altura), int(largura),
+                           (int(y1), int(x1)), (int(y2), int(x2)),
+                           float(otimo))
+
+
+def salvar_cenarios(consultas, arquivo):
+    '''
+    Grava consultas (objetos Consulta) como um arquivo .scen.
+    '''
+    with open(arquivo, 'w') as saida:
+        saida.write('version 1\n')
+        for consulta in consultas:
+            (y1, x1), (y2, x2) = consulta.pos_inicio, consulta.pos_fim
+            saida.write(f'{consulta.balde}\t{consulta.mapa}\t'
+                        f'{consulta.qtd_colunas}\t{consulta.qtd_linhas}\t'
+                        f'{x1}\t{y1}\t{x2}\t{y2}\t{consulta.otimo:.8f}\n')
+
+
+# -----------------------------------------------------------------------
+# EXECUÇÃO EM FLUXO
+# -----------------------------------------------------------------------
+def _localizar_mapa(mapa, arquivo_cenario, diretorio_mapas):
+    '''
+    Procura o .map citado no cenário no diretório de mapas informado e no
+    diretório do próprio cenário, com e sem os diretórios do nome.
+    '''
+    diretorios = [diretorio_mapas] if diretorio_mapas else []
+    diretorios.append(os.path.dirname(arquivo_cenario))
+    for diretorio in diretorios:
+        for nome in (mapa, os.path.basename(mapa)):
+            caminho = os.path.join(diretorio, nome)
+            if os.path.isfile(caminho):
+                return caminho
+    raise FileNotFoundError(f'{arquivo_cenario}: mapa {mapa} não encontrado.')
+
+
+def executar_cenarios(arquivos, algoritmo=busca_A_estrela, heuristica=None,
+                      diagonais=True, diretorio_mapas=None):
+    '''
+    Resolve as consultas de um ou mais arquivos .scen, uma de cada vez. Só
+    o mapa em uso fica carregado: ele é trocado quando as consultas passam
+    a citar outro.
+    Parâmetros:
+        arquivos (iterable): caminhos dos arquivos .scen.
+        algoritmo (function): buscador com a assinatura de busca_A_estrela.
+        heuristica (function): opcional, repassada ao buscador.
+        diagonais (bool): habilitar os movimentos diagonais.
+        diretorio_mapas (str): opcional, onde procurar os arquivos .map.
+    Retorno:
+        generator: um dict de estatísticas por consulta.
+    '''
+    grade = None
+    carregado = None
+    for arquivo in arquivos:
+        for numero, consulta in enumerate(ler_cenarios(arquivo)):
+            caminho = _localizar_mapa(consulta.mapa, arquivo,
+                                      diretorio_mapas)
+            if caminho != carregado:
+                grade = ler_mapa(caminho, diagonais)
+                carregado = caminho
+
+            inicio = perf_counter()
+            resultado = algoritmo(grade, consulta.pos_inicio,
+                                  consulta.pos_fim, heuristica=heuristica)
+            tempo = perf_counter() - inicio
+
+            yield {
+                'cenario': arquivo,
+                'consulta': numero,
+                'balde': consulta.balde,
+                'inicio': list(consulta.pos_inicio),
+                'fim': list(consulta.pos_fim),
+                'encontrado': resultado.encontrado,
+                'custo': resultado.custo if resultado.encontrado else None,
+                'passos': max(len(resultado.caminho) - 1, 0),
+                'otimo_referencia': consulta.otimo,
+                'expansoes': resultado.iteracoes,
+                'operacoes_fila': resultado.operacoes_fila,
+                'tempo_ms': tempo * 1000,
+            }
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(
+        description='Executa cenários .scen do MovingAI.')
+    parser.add_argument('cenarios', nargs='+', help='arquivos .scen')
+    parser.add_argument('--mapas', help='diretório dos arquivos .map')
+    parser.add_argument('--saida', help='arquivo JSON Lines das estatísticas'
+                        ' (padrão: saída padrão)')
+    parser.add_argument('--motor', choices=MOTORES, default='a_estrela')
+    parser.add_argument('--heuristica', choices=HEURISTICAS)
+    parser.add_argument('--sem-diagonais', action='store_true',
+                        help='usar apenas os 4 movimentos ortogonais')
+    args = parser.parse_args(argumentos)
+
+    estatisticas = executar_cenarios(
+        args.cenarios, MOTORES[args.motor],
+        HEURISTICAS.get(args.heuristica), not args.sem_diagonais, args.mapas)
+
+    saida = open(args.saida, 'w') if args.saida else sys.stdout
+    total = encontrados = 0
+    tempo = 0.0
+    try:
+        for registro in estatisticas:
+            saida.write(json.dumps(registro) + '\n')
+            total += 1
+            encontrados += registro['encontrado']
+            tempo += registro['tempo_ms']
+    finally:
+        if saida is not sys.stdout:
+            saida.close()
+    print(f'{total} consultas, {encontrados} com caminho, '
+          f'{tempo:.1f} ms de busca', file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,378 @@
+"""
+A* paralelo com distribuição dos estados por hash (HDA*, Hash Distributed
+A*) entre processos.
+Cada ponto da grade tem um dono, escolhido por hash do bloco (lado_bloco x
+lado_bloco pontos) em que ele está: cada processo expande apenas os seus
+pontos, com uma fila de prioridade própria, e envia os vizinhos gerados
+que pertencem a outro processo para a caixa de entrada do dono, em lotes.
+Agrupar os pontos em blocos mantém a maioria dos vizinhos no mesmo
+processo e reduz a troca de mensagens. Os obstáculos e custos ficam em
+memória compartilhada (ver memoria_compartilhada.py), assim como g e o pai
+de cada ponto, escritos só pelo dono do ponto.
+Ao alcançar o fim, o custo encontrado passa a ser o limite da busca: os
+processos descartam os nós com f maior ou igual a ele. A busca termina
+quando todos os processos estão ociosos e todas as mensagens enviadas
+foram recebidas (contadores conferidos duas vezes seguidas); com
+heurística admissível, o caminho devolvido é ótimo.
+"""
+from array import array
+from multiprocessing import Process, Queue, cpu_count
+from multiprocessing.sharedctypes import RawArray, RawValue
+from multiprocessing.shared_memory import SharedMemory
+from pickle import PicklingError, dumps
+from queue import Empty
+from time import sleep
+
+import numpy as np
+
+from busca import ResultadoBusca
+from filas import nova_fila
+from grade import INFINITO, SEM_PAI
+from heuristicas import heuristica_admissivel, heuristica_inteira, \
+    heuristica_por_indice
+from memoria_compartilhada import compartilhar_grade, grade_compartilhada
+
+# Expansões de um processo entre duas trocas de mensagens:
+EXPANSOES_POR_RODADA = 128
+
+# Intervalo, em segundos, entre duas conferências de término:
+INTERVALO_TERMINO = 0.001
+
+
+def _donos(qtd_linhas, qtd_colunas, lado_bloco, qtd_processos):
+    '''
+    Dono de cada ponto: hash multiplicativo do número do bloco do ponto.
+    Retorno:
+        bytes: número do processo dono de cada índice.
+    '''
+    blocos_linha = -(-qtd_colunas // lado_bloco)
+    bloco = ((np.arange(qtd_linhas, dtype=np.uint64) // lado_bloco)
+             * np.uint64(blocos_linha))[:, None] \
+        + (np.arange(qtd_colunas, dtype=np.uint64) // lado_bloco)[None, :]
+    espalhado = (bloco * np.uint64(2654435761)) & np.uint64(0xFFFFFFFF)
+    return ((espalhado >> np.uint64(16)) % np.uint64(qtd_processos)) \
+        .astype(np.uint8).tobytes()
+
+
+def _trabalhador(numero, qtd_processos, nome_grade, nome_estado,
+                 dimensoes, lado_bloco, caixas, respostas, contadores):
+    '''
+    Laço de um processo: espera o comando de cada busca, faz a sua parte
+    e responde com as próprias contagens. Termina ao receber None.
+    '''
+    qtd_linhas, qtd_colunas, diagonais = dimensoes
+    grade = grade_compartilhada(nome_grade, qtd_linhas, qtd_colunas,
+                                diagonais)
+    tamanho = grade.tamanho
+    dono = _donos(qtd_linhas, qtd_colunas, lado_bloco, qtd_processos)
+    memoria = SharedMemory(name=nome_estado)
+    visao = memoria.buf.cast('i')
+    g = visao[:tamanho]
+    pai = visao[tamanho:]
+    caixa = caixas[numero]
+    pendentes = []
+    try:
+        while True:
+            mensagem = caixa.get()
+            if mensagem is None:
+                break
+            if mensagem[0] == 'nos':
+                # Lote de uma busca cujo comando ainda não chegou:
+                pendentes.append(mensagem[1])
+                continue
+            _, pos_fim, heuristica, campo = mensagem
+            h = heuristica_por_indice(heuristica, pos_fim, qtd_linhas,
+                                      qtd_colunas, campo)
+            respostas.put((numero,) + _buscar_parte(
+                grade, g, pai, dono, numero, grade.indice(*pos_fim), h,
+                heuristica_inteira(heuristica), pendentes, caixas,
+                contadores))
+            pendentes = []
+    finally:
+        g.release()
+        pai.release()
+        visao.release()
+        memoria.close()
+
+
+def _buscar_parte(grade, g, pai, dono, numero, fim, h, inteira, lotes,
+                  caixas, contadores):
+    '''
+    Parte de uma busca feita por um processo, até o comando de parada.
+    Parâmetros:
+        g, pai (memoryview): vetores compartilhados da busca.
+        dono (bytes): dono de cada índice (ver _donos).
+        numero (int): número deste processo.
+        fim (int): índice do fim.
+        h (function): heurística por índice.
+        inteira (bool): se a heurística só produz inteiros.
+        lotes (list): lotes de nós recebidos antes do comando.
+    Retorno:
+        tuple: (expansões, operações na fila) deste processo.
+    '''
+    enviados, recebidos, ociosos, incumbente = contadores
+    caixa = caixas[numero]
+    custo = grade.custo_plano
+    vizinhos = grade.vizinhos
+    saida = [array('i') for _ in caixas]
+    fila = nova_fila(inteira)
+    expansoes = 0
+    operacoes = 0
+    ociosos[numero] = 0
+    while True:
+        # Recebe os nós enviados por outros processos (índice, g, pai):
+        for lote in lotes:
+            dados = array('i')
+            dados.frombytes(lote)
+            for k in range(0, len(dados), 3):
+                indice = dados[k]
+                g_novo = dados[k + 1]
+                if g_novo < g[indice]:
+                    g[indice] = g_novo
+                    pai[indice] = dados[k + 2]
+                    if indice == fim:
+                        if g_novo < incumbente.value:
+                            incumbente.value = g_novo
+                    else:
+                        fila.inserir(g_novo + h(indice), indice)
+            recebidos[numero] += 1
+        lotes = []
+
+        # Expande até EXPANSOES_POR_RODADA nós próprios:
+        limite = incumbente.value
+        rodada = 0
+        while fila and rodada < EXPANSOES_POR_RODADA:
+            if fila.menor_prioridade() >= limite:
+                # O limite só diminui: nenhum nó da fila ainda serve.
+                operacoes += fila.operacoes()
+                fila = nova_fila(inteira)
+                break
+            f_atual, atual = fila.remover()
+            g_atual = g[atual]
+            # Entrada obsoleta: o nó foi reinserido com g menor.
+            if f_atual != g_atual + h(atual):
+                continue
+            rodada += 1
+            for vizinho in vizinhos(atual):
+                g_novo = g_atual + custo[vizinho]
+                # Para vizinhos de outro processo a leitura de g pode estar
+                # atrasada; o dono confere de novo ao receber.
+                if g_novo >= g[vizinho]:
+                    continue
+                f_novo = g_novo + h(vizinho)
+                if f_novo >= limite:
+                    continue
+                destino = dono[vizinho]
+                if destino != numero:
+                    saida[destino].extend((vizinho, g_novo, atual))
+                    continue
+                g[vizinho] = g_novo
+                pai[vizinho] = atual
+                if vizinho == fim:
+                    incumbente.value = limite = g_novo
+                else:
+                    fila.inserir(f_novo, vizinho)
+        expansoes += rodada
+
+        for destino, dados in enumerate(saida):
+            if dados:
+                enviados[numero] += 1
+                caixas[destino].put(('nos', dados.tobytes()))
+                saida[destino] = array('i')
+
+        # Com trabalho próprio, só recolhe o que já chegou; sem ele,
+        # espera (ocioso) por nós novos ou pelo comando de parada.
+        while True:
+            if fila:
+                try:
+                    mensagem = caixa.get_nowait()
+                except Empty:
+                    break
+            else:
+                ociosos[numero] = 1
+                mensagem = caixa.get()
+                ociosos[numero] = 0
+            if mensagem[0] == 'parar':
+                return expansoes, operacoes + fila.operacoes()
+            lotes.append(mensagem[1])
+            if not fila:
+                break
+
+
+class BuscaParalela:
+    '''
+    Processos de busca paralela sobre uma cópia da grade, feita ao criar
+    (alterações posteriores da grade não são vistas). Os processos ficam
+    de pé entre as consultas; use com "with" ou chame encerrar().
+    Parâmetros:
+        grade (Grade): grade a ser copiada para a memória compartilhada.
+        processos (int): quantidade de processos (padrão: cpu_count()).
+        lado_bloco (int): lado, em pontos, dos blocos distribuídos.
+    '''
+
+    def __init__(self, grade, processos=None, lado_bloco=16):
+        self.grade = grade
+        self.processos = processos or cpu_count()
+        if not 1 <= self.processos <= 255:
+            raise ValueError('BuscaParalela: de 1 a 255 processos.')
+        self.lado_bloco = lado_bloco
+        tamanho = grade.tamanho
+        self._dono = _donos(grade.qtd_linhas, grade.qtd_colunas, lado_bloco,
+                            self.processos)
+
+        self._memoria_grade = compartilhar_grade(grade)
+        self._memoria_estado = SharedMemory(create=True, size=8 * tamanho)
+        estado = np.frombuffer(self._memoria_estado.buf, dtype=np.int32)
+        self._g = estado[:tamanho]
+        self._pai = estado[tamanho:]
+
+        # O processo principal usa a última posição dos contadores:
+        self._enviados = RawArray('q', self.processos + 1)
+        self._recebidos = RawArray('q', self.processos + 1)
+        self._ociosos = RawArray('b', [1] * self.processos)
+        self._incumbente = RawValue('d', float("inf"))
+        self._caixas = [Queue() for _ in range(self.processos)]
+        self._respostas = Queue()
+        contadores = (self._enviados, self._recebidos, self._ociosos,
+                      self._incumbente)
+        dimensoes = (grade.qtd_linhas, grade.qtd_colunas, grade.diagonais)
+        self._trabalhadores = [
+            Process(target=_trabalhador, daemon=True,
+                    args=(numero, self.processos, self._memoria_grade.name,
+                          self._memoria_estado.name, dimensoes, lado_bloco,
+                          self._caixas, self._respostas, contadores))
+            for numero in range(self.processos)]
+        for trabalhador in self._trabalhadores:
+            trabalhador.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *excecao):
+        self.encerrar()
+
+    def buscar(self, pos_inicio, pos_fim, heuristica=None, campo=False):
+        '''
+        Parâmetros:
+            pos_inicio (tuple): posição (linha, coluna) da qual parte-se.
+            pos_fim (tuple): posição (linha, coluna) na qual pretende-se
+                chegar.
+            heuristica (function): como em busca_A_estrela; precisa poder
+                ser enviada aos processos (pickle), senão ValueError.
+            campo (bool): cada processo usa o campo de heurística
+                pré-calculado para pos_fim.
+        Retorno:
+            ResultadoBusca: resultado da busca. Não há um conjunto único de
+            abertos e fechados: lista_abertos fica vazia e lista_fechados
+            tem todos os pontos alcançados; iteracoes soma as expansões de
+            todos os processos.
+        '''
+        if self._trabalhadores is None:
+            raise RuntimeError('BuscaParalela: processos já encerrados.')
+        grade = self.grade
+        inicio = grade.indice(*pos_inicio)
+        fim = grade.indice(*pos_fim)
+        # Um obstáculo não é início nem fim de caminho (como em busca.py):
+        if grade.obstaculo_plano[inicio] or grade.obstaculo_plano[fim]:
+            return ResultadoBusca(False, float("inf"), [], set(), set(), 0)
+        if inicio == fim:
+            return ResultadoBusca(True, 0, [grade.posicao(inicio)], set(),
+                                  {inicio}, 1)
+        if heuristica is None:
+            heuristica = heuristica_admissivel(grade.diagonais)
+        # Uma heurística que não pode ser serializada (lambda, função
+        # local) seria descartada pela thread da fila sem erro nenhum, e
+        # _esperar_termino ficaria esperando para sempre:
+        try:
+            dumps(heuristica)
+        except (PicklingError, AttributeError, TypeError) as erro:
+            raise ValueError('BuscaParalela: a heurística precisa poder ser '
+                             f'enviada aos processos ({erro}).') from erro
+
+        # Todos os processos estão ociosos entre duas buscas:
+        self._g.fill(INFINITO)
+        self._incumbente.value = float("inf")
+        for contador in (self._enviados, self._recebidos):
+            contador[:] = [0] * len(contador)
+        for caixa in self._caixas:
+            caixa.put(('buscar', tuple(pos_fim), heuristica, campo))
+        # O nó inicial é o primeiro lote, enviado ao seu dono:
+        self._enviados[self.processos] = 1
+        self._caixas[self._dono[inicio]].put(
+            ('nos', array('i', (inicio, 0, SEM_PAI)).tobytes()))
+
+        self._esperar_termino()
+        for caixa in self._caixas:
+            caixa.put(('parar',))
+        expansoes = operacoes = 0
+        for _ in self._trabalhadores:
+            _, expansoes_parte, operacoes_parte = self._respostas.get()
+            expansoes += expansoes_parte
+            operacoes += operacoes_parte
+
+        alcancados = set(np.flatnonzero(self._g != INFINITO).tolist())
+        if self._g[fim] == INFINITO:
+            return ResultadoBusca(False, float("inf"), [], set(),
+                                  alcancados, expansoes, operacoes)
+        pai = self._pai
+        nos = [fim]
+        while nos[-1] != inicio:
+            nos.append(int(pai[nos[-1]]))
+        caminho = [grade.posicao(indice) for indice in reversed(nos)]
+        return ResultadoBusca(True, int(self._g[fim]), caminho, set(),
+                              alcancados, expansoes, operacoes)
+
+    def _esperar_termino(self):
+        '''
+        Espera até que todos os processos estejam ociosos e nenhum lote
+        esteja a caminho: a soma dos enviados é igual à dos recebidos e nada
+        mudou entre duas conferências seguidas.
+        '''
+        anterior = None
+        while True:
+            sleep(INTERVALO_TERMINO)
+            ociosos = all(self._ociosos)
+            conferencia = (sum(self._enviados), sum(self._recebidos))
+            if ociosos and conferencia[0] == conferencia[1] \
+                    and conferencia == anterior:
+                return
+            anterior = conferencia if ociosos else None
+            if not all(t.is_alive() for t in self._trabalhadores):
+                self.encerrar()
+                raise RuntimeError('BuscaParalela: um processo de busca '
+                                   'terminou inesperadamente.')
+
+    def encerrar(self):
+        '''
+        Termina os processos e libera a memória compartilhada.
+        '''
+        if self._trabalhadores is None:
+            return
+        for trabalhador, caixa in zip(self._trabalhadores, self._caixas):
+            if trabalhador.is_alive():
+                caixa.put(None)
+        for trabalhador in self._trabalhadores:
+            trabalhador.join(1)
+            if trabalhador.is_alive():
+                trabalhador.terminate()
+        self._trabalhadores = None
+        del self._g, self._pai
+        for memoria in (self._memoria_grade, self._memoria_estado):
+            memoria.close()
+            memoria.unlink()
+
+
+def busca_paralela(grade, pos_inicio, pos_fim, heuristica=None,
+                   campo=False, processos=None):
+    '''
+    Uma única busca paralela: sobe os processos, busca e os encerra. Para
+    várias consultas na mesma grade, use BuscaParalela diretamente.
+    Parâmetros:
+        grade, pos_inicio, pos_fim, heuristica, campo: como em
+            BuscaParalela.buscar.
+        processos (int): quantidade de processos (padrão: cpu_count()).
+    Retorno:
+        ResultadoBusca: resultado da busca.
+    '''
+    with BuscaParalela(grade, processos) as busca:
+        return busca.buscar(pos_inicio, pos_fim, heuristica, campo)
@@ -0,0 +1,325 @@
+"""
+Serviço local de consultas de caminho com asyncio.
+O mapa é carregado uma vez e copiado para memória compartilhada, de onde os
+processos de um pool de buscas montam suas grades (como em lote.py). O
+servidor fala JSON por linha em um socket TCP local: cada linha é uma
+consulta {"id": ..., "inicio": [l, c], "fim": [l, c]} e cada resposta traz o
+mesmo id, na ordem em que as buscas terminam.
+Consultas iguais (mesmo início e fim) que chegam enquanto uma delas ainda
+está sendo resolvida esperam pela mesma busca, e as respostas recentes ficam
+em uma cache. Acima de um limite de buscas pendentes, consultas novas são
+recusadas na hora, o que mantém a latência das aceitas estável em rajadas.
+Uso:
+    python servico.py mapas/arena.map --porta 8765 --processos 4
+"""
+import argparse
+import asyncio
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+import json
+from multiprocessing import cpu_count
+import sys
+from time import perf_counter
+
+from busca import busca_A_estrela
+from lote import iniciar_processo, resolver_tarefa
+from memoria_compartilhada import compartilhar_grade
+from movingai import ler_mapa
+
+
+class ServicoCaminhos:
+    '''
+    Servidor de consultas de caminho sobre uma grade fixa.
+    Parâmetros:
+        grade (Grade): grade servida; edições feitas depois de iniciar()
+            não são vistas pelos processos.
+        processos (int): tamanho do pool. Por padrão, um por núcleo.
+        algoritmo (function): buscador com a assinatura de busca_A_estrela.
+        heuristica (function): opcional; precisa ser uma função de módulo.
+        capacidade_cache (int): respostas recentes guardadas.
+        limite_pendentes (int): buscas em andamento acima do qual consultas
+            novas são recusadas. Por padrão, 8 por processo.
+    Atributos:
+        estatisticas (dict): consultas, buscas, compartilhadas,
+            acertos_cache e recusadas.
+    '''
+
+    def __init__(self, grade, processos=None, algoritmo=busca_A_estrela,
+                 heuristica=None, capacidade_cache=4096,
+                 limite_pendentes=None):
+        self.grade = grade
+        self.processos = processos or cpu_count()
+        self.algoritmo = algoritmo
+        self.heuristica = heuristica
+        self.capacidade_cache = capacidade_cache
+        self.limite_pendentes = limite_pendentes or 8 * self.processos
+        self.estatisticas = dict.fromkeys(
+            ('consultas', 'buscas', 'compartilhadas', 'acertos_cache',
+             'recusadas'), 0)
+        self.porta = None
+
+        self._em_andamento = {}
+        self._cache = OrderedDict()
+        self._memoria = None
+        self._executor = None
+        self._servidor = None
+
+    # -------------------------------------------------------------------
+    # Ciclo de vida
+    # -------------------------------------------------------------------
+    async def iniciar(self, host='127.0.0.1', porta=0):
+        '''
+        Sobe o pool de buscas e passa a aceitar conexões.
+        Parâmetros:
+            host (str): endereço local.
+            porta (int): porta TCP (0 escolhe uma livre, ver self.porta).
+        '''
+        grade = self.grade
+        self._memoria = compartilhar_grade(grade)
+        self._executor = ProcessPoolExecutor(
+            self.processos, initializer=iniciar_processo,
+            initargs=(self._memoria.name, grade.qtd_linhas,
+                      grade.qtd_colunas, grade.diagonais))
+        # Sobe os processos antes de aceitar conexões: com fork, processos
+        # criados depois herdariam os sockets das conexões abertas.
+        await asyncio.get_running_loop().run_in_executor(self._executor, int)
+
+        self._servidor = await asyncio.start_server(self._atender, host,
+                                                    porta)
+        self.porta = self._servidor.sockets[0].getsockname()[1]
+
+    async def servir(self):
+        '''
+        Atende conexões até a tarefa ser cancelada.
+        '''
+        await self._servidor.serve_forever()
+
+    async def encerrar(self):
+        '''
+        Para de aceitar conexões e libera o pool e a memória compartilhada.
+        '''
+        if self._servidor is not None:
+            self._servidor.close()
+            await self._servidor.wait_closed()
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+        if self._memoria is not None:
+            self._memoria.close()
+            self._memoria.unlink()
+        self._servidor = self._executor = self._memoria = None
+
+    async def __aenter__(self):
+        await self.iniciar()
+        return self
+
+    async def __aexit__(self, *excecao):
+        await self.encerrar()
+
+    # -------------------------------------------------------------------
+    # Consultas
+    # -------------------------------------------------------------------
+    async def resolver(self, pos_inicio, pos_fim):
+        '''
+        Resolve uma consulta, reaproveitando a cache ou uma busca idêntica
+        que já esteja em andamento.
+        Retorno:
+            dict: resposta (encontrado, custo, caminho e iteracoes), com
+            'origem' valendo 'busca', 'compartilhada' ou 'cache'.
+        '''
+        estatisticas = self.estatisticas
+        estatisticas['consultas'] += 1
+        chave = (tuple(pos_inicio), tuple(pos_fim))
+
+        if chave in self._cache:
+            self._cache.move_to_end(chave)
+            estatisticas['acertos_cache'] += 1
+            return dict(self._cache[chave], origem='cache')
+
+        futuro = self._em_andamento.get(chave)
+        if futuro is not None:
+            estatisticas['compartilhadas'] += 1
+            # shield: se quem espera for cancelado, a busca continua para
+            # os demais.
+            return dict(await asyncio.shield(futuro), origem='compartilhada')
+
+        if len(self._em_andamento) >= self.limite_pendentes:
+            estatisticas['recusadas'] += 1
+            raise OverflowError('serviço sobrecarregado')
+
+        estatisticas['buscas'] += 1
+        futuro = asyncio.ensure_future(self._buscar(chave))
+        self._em_andamento[chave] = futuro
+        futuro.add_done_callback(
+            lambda _: self._em_andamento.pop(chave, None))
+        return dict(await asyncio.shield(futuro), origem='busca')
+
+    async def _buscar(self, chave):
+        pos_inicio, pos_fim = chave
+        tarefa = (0, pos_inicio, pos_fim, self.algoritmo, self.heuristica,
+                  False)
+        _, resultado = await asyncio.get_running_loop().run_in_executor(
+            self._executor, resolver_tarefa, tarefa)
+        resposta = {
+            'encontrado': resultado.encontrado,
+            'custo': resultado.custo if resultado.encontrado else None,
+            'caminho': [list(posicao) for posicao in resultado.caminho],
+            'iteracoes': resultado.iteracoes,
+        }
+        if self.capacidade_cache:
+            if len(self._cache) >= self.capacidade_cache:
+                self._cache.popitem(last=False)
+            self._cache[chave] = resposta
+        return resposta
+
+    # -------------------------------------------------------------------
+    # Protocolo
+    # -------------------------------------------------------------------
+    async def _atender(self, leitor, escritor):
+        '''
+        Atende uma conexão: cada linha recebida vira uma tarefa, de modo que
+        o cliente pode enviar várias consultas sem esperar as respostas.
+        '''
+        trava = asyncio.Lock()
+        tarefas = set()
+        try:
+            while True:
+                linha = await leitor.readline()
+                if not linha:
+                    break
+                tarefa = asyncio.ensure_future(
+                    self._responder(linha, escritor, trava))
+                tarefas.add(tarefa)
+                tarefa.add_done_callback(tarefas.discard)
+            if tarefas:
+                await asyncio.gather(*tarefas)
+        except ConnectionError:
+            pass
+        finally:
+            for tarefa in tarefas:
+                tarefa.cancel()
+            escritor.close()
+
+    async def _responder(self, linha, escritor, trava):
+        inicio = perf_counter()
+        identificador = None
+        try:
+            consulta = json.loads(linha)
+            identificador = consulta.get('id')
+            if consulta.get('comando') == 'estatisticas':
+                resposta = dict(self.estatisticas,
+                                em_andamento=len(self._em_andamento))
+            else:
+                pos_inicio = _posicao(self.grade, consulta['inicio'])
+                pos_fim = _posicao(self.grade, consulta['fim'])
+                resposta = await self.resolver(pos_inicio, pos_fim)
+                if not consulta.get('caminho', True):
+                    del resposta['caminho']
+        except Exception as erro:  # A resposta leva o erro ao cliente.
+            resposta = {'erro': f'{type(erro).__name__}: {erro}'}
+        resposta['id'] = identificador
+        resposta['tempo_ms'] = (perf_counter() - inicio) * 1000
+
+        async with trava:
+            escritor.write(json.dumps(resposta).encode() + b'\n')
+            await escritor.drain()
+
+
+def _posicao(grade, valor):
+    linha, coluna = (int(v) for v in valor)
+    if not grade.contem(linha, coluna):
+        raise ValueError(f'posição fora da grade: {[linha, coluna]}')
+    return linha, coluna
+
+
+# -----------------------------------------------------------------------
+# CLIENTE
+# -----------------------------------------------------------------------
+class ClienteCaminhos:
+    '''
+    Cliente assíncrono do serviço. Várias consultas podem estar pendentes
+    na mesma conexão; as respostas são associadas pelo id.
+    '''
+
+    def __init__(self):
+        self._leitor = None
+        self._escritor = None
+        self._pendentes = {}
+        self._proximo_id = 0
+        self._recepcao = None
+
+    async def conectar(self, host='127.0.0.1', porta=8765):
+        self._leitor, self._escritor = await asyncio.open_connection(
+            host, porta)
+        self._recepcao = asyncio.ensure_future(self._receber())
+
+    async def _receber(self):
+        while True:
+            linha = await self._leitor.readline()
+            if not linha:
+                break
+            resposta = json.loads(linha)
+            futuro = self._pendentes.pop(resposta.get('id'), None)
+            if futuro is not None and not futuro.done():
+                futuro.set_result(resposta)
+        for futuro in self._pendentes.values():
+            futuro.set_exception(ConnectionError('conexão encerrada'))
+        self._pendentes.clear()
+
+    async def _enviar(self, mensagem):
+        self._proximo_id += 1
+        mensagem['id'] = self._proximo_id
+        futuro = asyncio.get_running_loop().create_future()
+        self._pendentes[self._proximo_id] = futuro
+        self._escritor.write(json.dumps(mensagem).encode() + b'\n')
+        await self._escritor.drain()
+        return await futuro
+
+    async def consultar(self, pos_inicio, pos_fim, caminho=True):
+        '''
+        Retorno:
+            dict: resposta do serviço (com 'erro' se a consulta falhou).
+        '''
+        return await self._enviar({'inicio': list(pos_inicio),
+                                   'fim': list(pos_fim),
+                                   'caminho': caminho})
+
+    async def estatisticas(self):
+        return await self._enviar({'comando': 'estatisticas'})
+
+    async def fechar(self):
+        self._escritor.close()
+        await self._escritor.wait_closed()
+        await self._recepcao
+
+
+async def _servir(args):
+    grade = ler_mapa(args.mapa, not args.sem_diagonais)
+    servico = ServicoCaminhos(grade, args.processos)
+    await servico.iniciar(args.host, args.porta)
+    print(f'Servindo {args.mapa} em {args.host}:{servico.porta}',
+          file=sys.stderr)
+    try:
+        await servico.servir()
+    finally:
+        await servico.encerrar()
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(
+        description='Serviço local de consultas de caminho.')
+    parser.add_argument('mapa', help='arquivo .map do MovingAI')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--porta', type=int, default=8765)
+    parser.add_argument('--processos', type=int)
+    parser.add_argument('--sem-diagonais', action='store_true',
+                        help='usar apenas os 4 movimentos ortogonais')
+    args = parser.parse_args(argumentos)
+    try:
+        asyncio.run(_servir(args))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,35 @@
+"""
+Terrenos e cabeçalho do formato .map do MovingAI, para quem lê esses mapas
+(movingai.py e grade_mapeada.py).
+Fica em um módulo próprio para que grade_mapeada.py não precise importar o
+executor de cenários, que depende de todos os motores de busca.
+"""
+import numpy as np
+
+# Terrenos do formato: '.' e 'G' são chão, 'S' é pântano (passável); '@' e
+# 'O' ficam fora do mapa, 'T' são árvores e 'W' água. Como a grade não tem
+# terrenos que só se ligam entre si, tudo o que não é passável vira
+# obstáculo.
+PASSAVEIS = b'.GS'
+
+# Tabela de tradução dos bytes de um .map para obstáculos (1) e pontos
+# livres (0), usada como OBSTACULO_POR_BYTE[vetor de bytes] (uint8):
+OBSTACULO_POR_BYTE = np.ones(256, dtype=np.uint8)
+OBSTACULO_POR_BYTE[list(PASSAVEIS)] = 0
+
+
+def ler_dimensoes(linhas, arquivo):
+    '''
+    Lê a altura e a largura do cabeçalho de um .map.
+    Parâmetros:
+        linhas (iterable): linhas (bytes) do cabeçalho, antes de "map".
+        arquivo (str): caminho do arquivo, para a mensagem de erro.
+    Retorno:
+        tuple: (qtd_linhas, qtd_colunas).
+    '''
+    try:
+        campos = dict(linha.split(None, 1) for linha in linhas
+                      if linha.strip())
+        return int(campos[b'height']), int(campos[b'width'])
+    except (KeyError, ValueError):
+        raise ValueError(f'{arquivo}: cabeçalho sem height/width válidos.')
@@ -0,0 +1,6 @@
+import os
+import sys
+
+# Os módulos do projeto ficam em path-finding/, sem pacote:
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+    __file__))))
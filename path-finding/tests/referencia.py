@@ -0,0 +1,178 @@
+"""
+Referência para os testes: Dijkstra simples sobre a matriz de obstáculos,
+com as regras de movimento escritas de novo (sem usar Grade.vizinhos),
+e geração de grades aleatórias.
+"""
+from heapq import heappop, heappush
+import random
+
+from grade import Grade
+
+INF = float("inf")
+
+PASSOS_ORTOGONAIS = ((1, 0), (-1, 0), (0, 1), (0, -1))
+PASSOS_DIAGONAIS = ((1, 1), (1, -1), (-1, 1), (-1, -1))
+
+
+def livre(grade, linha, coluna):
+    return 0 <= linha < grade.qtd_linhas and 0 <= coluna < grade.qtd_colunas \
+        and not grade.obstaculo[linha, coluna]
+
+
+def vizinhos(grade, pos):
+    '''
+    Vizinhos livres de pos; na diagonal, os dois ortogonais do movimento
+    também precisam estar livres.
+    '''
+    linha, coluna = pos
+    for dl, dc in PASSOS_ORTOGONAIS:
+        if livre(grade, linha + dl, coluna + dc):
+            yield linha + dl, coluna + dc
+    if grade.diagonais:
+        for dl, dc in PASSOS_DIAGONAIS:
+            if livre(grade, linha + dl, coluna + dc) \
+                    and livre(grade, linha + dl, coluna) \
+                    and livre(grade, linha, coluna + dc):
+                yield linha + dl, coluna + dc
+
+
+def distancias(grade, pos_inicio, reverso=False):
+    '''
+    Custos dos caminhos mínimos a partir de pos_inicio (ou, com reverso,
+    até pos_inicio). Entrar em um ponto custa o custo dele.
+    Retorno:
+        dict: posição -> custo, só com os pontos alcançáveis.
+    '''
+    pos_inicio = tuple(pos_inicio)
+    if not livre(grade, *pos_inicio):
+        return {}
+    resultado = {pos_inicio: 0}
+    heap = [(0, pos_inicio)]
+    while heap:
+        d, atual = heappop(heap)
+        if d > resultado[atual]:
+            continue
+        for vizinho in vizinhos(grade, atual):
+            passo = int(grade.custo[atual if reverso else vizinho])
+            if d + passo < resultado.get(vizinho, INF):
+                resultado[vizinho] = d + passo
+                heappush(heap, (d + passo, vizinho))
+    return resultado
+
+
+def custo_otimo(grade, pos_inicio, pos_fim):
+    if tuple(pos_inicio) == tuple(pos_fim):
+        return 0 if livre(grade, *pos_inicio) else INF
+    return distancias(grade, pos_inicio).get(tuple(pos_fim), INF)
+
+
+def custo_caminho(grade, caminho):
+    '''
+    Confere que o caminho só usa movimentos válidos e devolve o custo.
+    '''
+    caminho = [tuple(p) for p in caminho]
+    for anterior, proximo in zip(caminho, caminho[1:]):
+        assert proximo in set(vizinhos(grade, anterior)), \
+            f'movimento inválido {anterior} -> {proximo}'
+    return sum(int(grade.custo[p]) for p in caminho[1:])
+
+
+def conferir(grade, resultado, pos_inicio, pos_fim, otimo=None,
+             fator=1):
+    '''
+    Confere um ResultadoBusca: encontrado se há caminho, caminho válido
+    ligando as pontas, custo igual ao do caminho e no máximo fator vezes
+    o ótimo (igual ao ótimo com fator=1; sem limite com fator=INF).
+    '''
+    if otimo is None:
+        otimo = custo_otimo(grade, pos_inicio, pos_fim)
+    if otimo == INF:
+        assert not resultado
+        return
+    assert resultado, f'caminho não encontrado {pos_inicio} -> {pos_fim}'
+    assert tuple(resultado.caminho[0]) == tuple(pos_inicio)
+    assert tuple(resultado.caminho[-1]) == tuple(pos_fim)
+    assert custo_caminho(grade, resultado.caminho) == resultado.custo
+    if fator == 1:
+        assert resultado.custo == otimo
+    else:
+        assert otimo <= resultado.custo
+        if otimo and fator != INF:
+            assert resultado.custo <= fator * otimo + 1e-9
+
+
+# Formatos cobertos: estreitos (1 e 2 colunas ou linhas) e comuns.
+FORMATOS = [(1, 1), (1, 7), (7, 1), (6, 2), (2, 6), (5, 3), (12, 12),
+            (17, 23)]
+
+
+def grade_aleatoria(qtd_linhas, qtd_colunas, semente, diagonais=False,
+                    densidade=0.25, custos=False):
+    '''
+    Grade com obstáculos aleatórios (e custos de 1 a 5, com custos=True),
+    escrita pelos setters.
+    '''
+    aleatorio = random.Random(semente)
+    grade = Grade(qtd_linhas, qtd_colunas, diagonais)
+    for linha in range(qtd_linhas):
+        for coluna in range(qtd_colunas):
+            if aleatorio.random() < densidade:
+                grade.set_obstaculo(linha, coluna)
+            elif custos:
+                grade.set_custo(linha, coluna, aleatorio.randint(1, 5))
+    return grade
+
+
+def pontos_livres(grade):
+    return [(linha, coluna) for linha in range(grade.qtd_linhas)
+            for coluna in range(grade.qtd_colunas)
+            if not grade.obstaculo[linha, coluna]]
+
+
+def consultas(grade, semente, quantidade=12):
+    '''
+    Pares (início, fim) entre pontos livres, incluindo início == fim.
+    '''
+    aleatorio = random.Random(semente)
+    livres = pontos_livres(grade)
+    if not livres:
+        return []
+    pares = [(aleatorio.choice(livres), aleatorio.choice(livres))
+             for _ in range(quantidade)]
+    pares.append((livres[0], livres[0]))
+    return pares
+
+
+def editar(grade, semente, quantidade=6, custos=True):
+    '''
+    Alterna obstáculos e (com custos=True) custos de alguns pontos pelos
+    setters.
+    '''
+    aleatorio = random.Random(semente)
+    for _ in range(quantidade):
+        linha = aleatorio.randrange(grade.qtd_linhas)
+        coluna = aleatorio.randrange(grade.qtd_colunas)
+        sorteio = aleatorio.random()
+        if sorteio < 0.4:
+            grade.set_obstaculo(linha, coluna)
+        elif sorteio < 0.8 or not custos:
+            grade.set_vazio(linha, coluna)
+        else:
+            grade.set_custo(linha, coluna, aleatorio.randint(1, 5))
+
+
+def cenarios(formato, diagonais=False, custos=False, sementes=3,
+             rodadas=2):
+    '''
+    Grades aleatórias do formato e as consultas sobre cada uma, antes e
+    depois de rodadas de edições (a mesma grade é devolvida de novo a cada
+    rodada, já editada). Com custos=False a grade fica de custo uniforme.
+    Retorno:
+        generator: pares (grade, consultas).
+    '''
+    for semente in range(sementes):
+        grade = grade_aleatoria(*formato, semente, diagonais, custos=custos)
+        yield grade, consultas(grade, semente)
+        for rodada in range(rodadas):
+            editar(grade, 100 * semente + rodada, custos=custos)
+            yield grade, consultas(grade, 100 * semente + rodada)
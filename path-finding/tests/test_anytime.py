@@ -0,0 +1,46 @@
+import pytest
+
+from anytime import busca_ara
+
+import referencia
+
+
+@pytest.mark.parametrize('formato', referencia.FORMATOS)
+@pytest.mark.parametrize('diagonais', [False, True])
+@pytest.mark.parametrize('custos', [False, True])
+def test_ara_igual_a_referencia(formato, diagonais, custos):
+    for grade, pares in referencia.cenarios(formato, diagonais, custos):
+        for pos_inicio, pos_fim in pares:
+            otimo = referencia.custo_otimo(grade, pos_inicio, pos_fim)
+            solucoes = []
+
+            def ao_solucao(custo, caminho, limite):
+                # Cada solução intermediária é válida e respeita o limite:
+                assert caminho[0] == pos_inicio and caminho[-1] == pos_fim
+                assert referencia.custo_caminho(grade, caminho) == custo
+                assert otimo <= custo <= limite * otimo + 1e-9
+                solucoes.append(custo)
+
+            resultado = busca_ara(grade, pos_inicio, pos_fim,
+                                  peso_inicial=4, ao_solucao=ao_solucao)
+            referencia.conferir(grade, resultado, pos_inicio, pos_fim,
+                                otimo)
+            if resultado:
+                assert resultado.limite_subotimo == 1
+                assert not resultado.interrompida
+                assert solucoes == sorted(solucoes, reverse=True)
+                assert solucoes[-1] == resultado.custo
+
+
+@pytest.mark.parametrize('diagonais', [False, True])
+def test_ara_com_prazo_esgotado(diagonais):
+    grade = referencia.grade_aleatoria(17, 23, 8, diagonais, custos=True)
+    for pos_inicio, pos_fim in referencia.consultas(grade, 8):
+        resultado = busca_ara(grade, pos_inicio, pos_fim, prazo=0)
+        if resultado:
+            referencia.conferir(grade, resultado, pos_inicio, pos_fim,
+                                fator=resultado.limite_subotimo)
+        else:
+            assert resultado.interrompida \
+                or referencia.custo_otimo(grade, pos_inicio, pos_fim) \
+                == referencia.INF
@@ -0,0 +1,58 @@
+import numpy as np
+
+from benchmark import CENARIOS_RAPIDOS, comparar, executar, gerar_grade
+
+import referencia
+
+DETERMINISTICAS = ('expandidos', 'operacoes_fila', 'subotimalidade_media',
+                   'subotimalidade_maxima')
+
+
+def test_cenarios_sao_reproduziveis():
+    for cenario in CENARIOS_RAPIDOS:
+        primeira = gerar_grade(cenario, 3)
+        segunda = gerar_grade(cenario, 3)
+        assert np.array_equal(primeira.obstaculo, segunda.obstaculo)
+        assert not np.array_equal(primeira.obstaculo,
+                                  gerar_grade(cenario, 4).obstaculo)
+
+
+def test_labirinto_e_conexo():
+    cenario = next(c for c in CENARIOS_RAPIDOS if c['tipo'] == 'labirinto')
+    grade = gerar_grade(cenario, 0)
+    livres = referencia.pontos_livres(grade)
+    assert len(referencia.distancias(grade, livres[0])) == len(livres)
+
+
+def test_execucoes_iguais_e_regressao_apontada():
+    primeiro = executar(CENARIOS_RAPIDOS, 4, 1)
+    segundo = executar(CENARIOS_RAPIDOS, 4, 1)
+
+    def metricas(relatorio):
+        return [(r['cenario'], r['motor'], r['heuristica'])
+                + tuple(r[m] for m in DETERMINISTICAS)
+                for r in relatorio['resultados']]
+
+    assert metricas(primeiro) == metricas(segundo)
+    # O JPS fica de fora só onde há custos; aqui todas as grades são
+    # uniformes, e a heurística admissível dá sempre o ótimo:
+    assert {r['motor'] for r in primeiro['resultados']} \
+        == {'a_estrela', 'jps', 'bidirecional'}
+    assert all(r['subotimalidade_maxima'] == 1.0
+               for r in primeiro['resultados']
+               if r['heuristica'] == 'chebyshev')
+
+    # Tempo e memória só contam acima da tolerância; expansões sempre:
+    for resultado in segundo['resultados']:
+        resultado['tempo_mediano'] = resultado['pico_memoria'] = 0
+    assert comparar(segundo, primeiro) == []
+    piorado = segundo['resultados'][2]
+    piorado['expandidos'] += 1
+    piorado['tempo_mediano'] = 10 * primeiro['resultados'][2][
+        'tempo_mediano'] + 1
+    regressoes = comparar(segundo, primeiro)
+    assert len(regressoes) == 2
+    nome = '/'.join((piorado['cenario'], piorado['motor'],
+                     piorado['heuristica']))
+    assert all(regressao.startswith(nome + ': ')
+               for regressao in regressoes)
@@ -0,0 +1,42 @@
+import pytest
+
+from bidirecional import busca_bidirecional
+from heuristicas import manhattan
+
+import referencia
+
+
+@pytest.mark.parametrize('formato', referencia.FORMATOS)
+@pytest.mark.parametrize('diagonais', [False, True])
+@pytest.mark.parametrize('custos', [False, True])
+@pytest.mark.parametrize('campo', [False, True])
+def test_bidirecional_igual_a_referencia(formato, diagonais, custos, campo):
+    for grade, pares in referencia.cenarios(formato, diagonais, custos):
+        for pos_inicio, pos_fim in pares:
+            resultado = busca_bidirecional(grade, pos_inicio, pos_fim,
+                                           campo=campo)
+            referencia.conferir(grade, resultado, pos_inicio, pos_fim)
+
+
+def test_heuristica_propria():
+    def heuristica(p1, p2):
+        return manhattan(p1, p2) / 2
+
+    for grade, pares in referencia.cenarios((12, 12), custos=True):
+        for pos_inicio, pos_fim in pares:
+            resultado = busca_bidirecional(grade, pos_inicio, pos_fim,
+                                           heuristica=heuristica)
+            referencia.conferir(grade, resultado, pos_inicio, pos_fim)
+
+
+@pytest.mark.parametrize('diagonais', [False, True])
+def test_caminho_gravado_na_grade(diagonais):
+    # Como no A*, g e pai dos nós do caminho ficam nos vetores da grade.
+    grade = referencia.grade_aleatoria(17, 23, 2, diagonais, custos=True)
+    for pos_inicio, pos_fim in referencia.consultas(grade, 2):
+        resultado = busca_bidirecional(grade, pos_inicio, pos_fim)
+        if not resultado:
+            continue
+        fim = grade.indice(*pos_fim)
+        assert grade.reconstruir_caminho(fim) == resultado.caminho
+        assert grade.get_g(fim) == resultado.custo
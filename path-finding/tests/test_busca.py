@@ -0,0 +1,188 @@
+import os
+import random
+import subprocess
+import sys
+
+import pytest
+
+from anytime import busca_ara
+from bidirecional import busca_bidirecional
+import busca
+from busca import busca_A_estrela, busca_mais_proximo
+from grade import Grade
+from heuristicas import chebyshev, heuristica_inadmissivel, manhattan
+from hierarquica import BuscaHierarquica
+from incremental import BuscaIncremental
+from jps import busca_jps
+from memoria_limitada import busca_sma
+from paralela import busca_paralela
+
+import referencia
+
+
+def test_busca_sem_interface():
+    codigo = 'import sys, busca, grade, heuristicas; ' \
+        'assert "pygame" not in sys.modules'
+    subprocess.run([sys.executable, '-c', codigo], check=True,
+                   cwd=os.path.dirname(busca.__file__))
+
+
+@pytest.mark.parametrize('formato', referencia.FORMATOS)
+@pytest.mark.parametrize('diagonais', [False, True])
+@pytest.mark.parametrize('custos', [False, True])
+@pytest.mark.parametrize('campo', [False, True])
+def test_a_estrela_igual_a_referencia(formato, diagonais, custos, campo):
+    for grade, pares in referencia.cenarios(formato, diagonais, custos):
+        for pos_inicio, pos_fim in pares:
+            resultado = busca_A_estrela(grade, pos_inicio, pos_fim,
+                                        campo=campo)
+            referencia.conferir(grade, resultado, pos_inicio, pos_fim)
+
+
+@pytest.mark.parametrize('formato', referencia.FORMATOS)
+def test_heuristicas_do_projeto(formato):
+    for grade, pares in referencia.cenarios(formato, custos=True):
+        for pos_inicio, pos_fim in pares:
+            otimo = referencia.custo_otimo(grade, pos_inicio, pos_fim)
+            for heuristica in (manhattan, chebyshev):
+                resultado = busca_A_estrela(grade, pos_inicio, pos_fim,
+                                            heuristica=heuristica)
+                referencia.conferir(grade, resultado, pos_inicio, pos_fim,
+                                    otimo)
+            # A inadmissível só garante um caminho válido:
+            resultado = busca_A_estrela(grade, pos_inicio, pos_fim,
+                                        heuristica=heuristica_inadmissivel)
+            referencia.conferir(grade, resultado, pos_inicio, pos_fim,
+                                otimo, fator=referencia.INF)
+
+
+def test_heuristica_propria_usa_o_heap():
+    grade = referencia.grade_aleatoria(12, 12, 3, custos=True)
+
+    def heuristica(p1, p2):
+        return manhattan(p1, p2) / 2
+
+    for pos_inicio, pos_fim in referencia.consultas(grade, 3):
+        resultado = busca_A_estrela(grade, pos_inicio, pos_fim,
+                                    heuristica=heuristica)
+        referencia.conferir(grade, resultado, pos_inicio, pos_fim)
+
+
+@pytest.mark.parametrize('formato', [(6, 2), (12, 12), (17, 23)])
+def test_heuristica_inconsistente_reabre_nos(formato):
+    # Admissível, mas inconsistente: alguns pontos estimam zero e são
+    # fechados cedo demais; ao achar um g menor eles são reabertos.
+    for grade, pares in referencia.cenarios(formato, custos=True):
+        aleatorio = random.Random(len(pares))
+        for pos_inicio, pos_fim in pares:
+            ate_o_fim = referencia.distancias(grade, pos_fim, reverso=True)
+            estimativas = {pos: distancia * aleatorio.randint(0, 1)
+                           for pos, distancia in ate_o_fim.items()}
+
+            def heuristica(pos, _):
+                return estimativas.get(pos, 0)
+
+            resultado = busca_A_estrela(grade, pos_inicio, pos_fim,
+                                        heuristica=heuristica)
+            referencia.conferir(grade, resultado, pos_inicio, pos_fim)
+
+
+def test_callbacks_acompanham_as_listas():
+    grade = referencia.grade_aleatoria(12, 12, 1, densidade=0.15)
+    grade.set_vazio(0, 0)
+    grade.set_vazio(11, 11)
+    abertos, fechados, iteracoes = [], [], []
+
+    def ao_iterar(iterador, lista_abertos, lista_fechados):
+        iteracoes.append((iterador, len(lista_fechados)))
+
+    resultado = busca_A_estrela(grade, (0, 0), (11, 11),
+                                ao_abrir=abertos.append,
+                                ao_fechar=fechados.append,
+                                ao_iterar=ao_iterar)
+    referencia.conferir(grade, resultado, (0, 0), (11, 11))
+    inicio, fim = grade.indice(0, 0), grade.indice(11, 11)
+    # O fim é fechado sem passar pelos callbacks:
+    assert set(fechados) | {fim} == resultado.lista_fechados
+    assert set(abertos) | {inicio} \
+        == resultado.lista_abertos | resultado.lista_fechados
+    assert iteracoes == [(i, i) for i in range(1, resultado.iteracoes)]
+
+
+@pytest.mark.parametrize('formato', referencia.FORMATOS)
+@pytest.mark.parametrize('diagonais', [False, True])
+@pytest.mark.parametrize('custos', [False, True])
+@pytest.mark.parametrize('campo', [False, True])
+def test_mais_proximo_igual_a_referencia(formato, diagonais, custos, campo):
+    for grade, pares in referencia.cenarios(formato, diagonais, custos):
+        livres = referencia.pontos_livres(grade)
+        aleatorio = random.Random(len(livres))
+        for pos_inicio, _ in pares:
+            fins = aleatorio.sample(livres, min(len(livres), 3))
+            distancias = referencia.distancias(grade, pos_inicio)
+            otimo = min(distancias.get(fim, referencia.INF) for fim in fins)
+            resultado = busca_mais_proximo(grade, pos_inicio, fins,
+                                           campo=campo)
+            if otimo == referencia.INF:
+                assert not resultado
+                continue
+            pos_fim = tuple(resultado.caminho[-1])
+            assert pos_fim in fins
+            referencia.conferir(grade, resultado, pos_inicio, pos_fim,
+                                otimo)
+
+
+def test_mais_proximo_expande_menos_que_uma_busca_por_destino():
+    grade = referencia.grade_aleatoria(30, 30, 4, densidade=0.1)
+    fins = [(29, 29), (0, 29), (29, 0), (15, 15)]
+    for pos in [(0, 0)] + fins:
+        grade.set_vazio(*pos)
+    resultado = busca_mais_proximo(grade, (0, 0), fins)
+    separadas = [busca_A_estrela(grade, (0, 0), fim) for fim in fins]
+    assert resultado.custo == min(r.custo for r in separadas)
+    assert resultado.iteracoes < sum(r.iteracoes for r in separadas)
+
+
+def test_mais_proximo_sem_fins():
+    grade = referencia.grade_aleatoria(4, 4, 0)
+    with pytest.raises(ValueError):
+        busca_mais_proximo(grade, (0, 0), [])
+
+
+def _mais_proximo(grade, pos_inicio, pos_fim):
+    return busca_mais_proximo(grade, pos_inicio, [pos_fim])
+
+
+def _paralela(grade, pos_inicio, pos_fim):
+    return busca_paralela(grade, pos_inicio, pos_fim, processos=2)
+
+
+def _hierarquica(grade, pos_inicio, pos_fim):
+    hierarquica = BuscaHierarquica(grade, 4)
+    hierarquica.desconectar()
+    return hierarquica.buscar(pos_inicio, pos_fim)
+
+
+def _incremental(grade, pos_inicio, pos_fim):
+    planejador = BuscaIncremental(grade, pos_inicio, pos_fim)
+    planejador.desconectar()
+    return planejador.buscar()
+
+
+@pytest.mark.parametrize('buscador', [
+    busca_A_estrela, _mais_proximo, busca_jps, busca_bidirecional,
+    busca_ara, busca_sma, _paralela, _hierarquica, _incremental])
+@pytest.mark.parametrize('diagonais', [False, True])
+def test_pontas_bloqueadas_sem_caminho(buscador, diagonais):
+    # Todos os buscadores tratam um obstáculo no início ou no fim da mesma
+    # forma, inclusive quando início e fim são o mesmo ponto:
+    grade = Grade(6, 6, diagonais)
+    grade.set_obstaculo(2, 2)
+    for pos_inicio, pos_fim in [((2, 2), (5, 5)), ((5, 5), (2, 2)),
+                                ((2, 2), (2, 2))]:
+        resultado = buscador(grade, pos_inicio, pos_fim)
+        assert not resultado
+        assert (resultado.custo, resultado.caminho) == (float("inf"), [])
+
+    resultado = buscador(grade, (4, 4), (4, 4))
+    assert (resultado.custo, resultado.caminho) == (0, [(4, 4)])
@@ -0,0 +1,107 @@
+import pytest
+
+from cache import CacheCaminhos
+from jps import busca_jps
+
+import referencia
+
+
+@pytest.mark.parametrize('formato', referencia.FORMATOS)
+@pytest.mark.parametrize('diagonais', [False, True])
+@pytest.mark.parametrize('custos', [False, True])
+def test_cache_igual_a_referencia_apos_edicoes(formato, diagonais, custos):
+    # As mesmas consultas (cada uma duas vezes seguidas) são repetidas
+    # entre as edições, para conferir os acertos e as invalidações do
+    # cache. As que têm uma ponta bloqueada pelas edições ficam de fora.
+    for semente in range(3):
+        grade = referencia.grade_aleatoria(*formato, semente, diagonais,
+                                           custos=custos)
+        cache = CacheCaminhos(grade, capacidade=8)
+        pares = referencia.consultas(grade, semente)
+        for rodada in range(4):
+            for pos_inicio, pos_fim in pares:
+                if not (referencia.livre(grade, *pos_inicio)
+                        and referencia.livre(grade, *pos_fim)):
+                    continue
+                for _ in range(2):
+                    resultado = cache.buscar(pos_inicio, pos_fim)
+                    referencia.conferir(grade, resultado, pos_inicio,
+                                        pos_fim)
+            assert len(cache) <= 8
+            referencia.editar(grade, 100 * semente + rodada, quantidade=3,
+                              custos=custos)
+        assert cache.acertos > 0 or not pares
+        cache.desconectar()
+
+
+def test_descarta_o_menos_recente():
+    grade = referencia.grade_aleatoria(6, 6, 0, densidade=0)
+    cache = CacheCaminhos(grade, capacidade=2)
+    cache.buscar((0, 0), (5, 5))
+    cache.buscar((0, 0), (3, 3))
+    cache.buscar((0, 0), (5, 5))
+    cache.buscar((1, 1), (2, 2))
+    assert len(cache) == 2
+    cache.buscar((0, 0), (5, 5))
+    assert (cache.acertos, cache.falhas) == (2, 3)
+    cache.buscar((0, 0), (3, 3))
+    assert (cache.acertos, cache.falhas) == (2, 4)
+
+
+def test_invalidacao_pelas_edicoes():
+    grade = referencia.grade_aleatoria(6, 6, 0, densidade=0)
+    cache = CacheCaminhos(grade)
+    reta = cache.buscar((0, 0), (0, 5))
+    cache.buscar((5, 0), (5, 5))
+    assert reta.caminho == [(0, coluna) for coluna in range(6)]
+
+    # Um obstáculo fora dos caminhos guardados não invalida nada; um
+    # obstáculo no caminho invalida só os caminhos que passam por ele:
+    grade.set_obstaculo(3, 3)
+    assert len(cache) == 2
+    grade.set_obstaculo(0, 2)
+    assert len(cache) == 1 and cache.versao == 0
+    referencia.conferir(grade, cache.buscar((0, 0), (0, 5)), (0, 0), (0, 5))
+
+    # Liberar um ponto pode abrir atalhos: o cache inteiro é descartado.
+    grade.set_vazio(0, 2)
+    assert len(cache) == 0 and cache.versao == 1
+    assert cache.buscar((0, 0), (0, 5)).custo == 5
+
+
+def test_invalidacao_pela_grade_inteira():
+    grade = referencia.grade_aleatoria(6, 6, 0, densidade=0)
+    cache = CacheCaminhos(grade)
+    assert cache.buscar((0, 0), (5, 5)).custo == 10
+
+    # A troca de diagonais e a escrita direta não passam pelos setters:
+    grade.diagonais = True
+    referencia.conferir(grade, cache.buscar((0, 0), (5, 5)), (0, 0), (5, 5))
+    grade.obstaculo[1:, 2] = 1
+    grade.recalcular_movimentos()
+    assert len(cache) == 0 and cache.versao == 2
+    referencia.conferir(grade, cache.buscar((0, 0), (5, 5)), (0, 0), (5, 5))
+
+
+def test_cache_devolve_copias():
+    grade = referencia.grade_aleatoria(10, 10, 4, densidade=0)
+    cache = CacheCaminhos(grade)
+    primeiro = cache.buscar((0, 0), (9, 9))
+    primeiro.caminho.clear()
+    primeiro.custo = 0
+    segundo = cache.buscar((0, 0), (9, 9))
+    assert cache.acertos == 1
+    referencia.conferir(grade, segundo, (0, 0), (9, 9))
+
+    # O índice de invalidação continua com o caminho guardado:
+    grade.set_obstaculo(*segundo.caminho[5])
+    assert len(cache) == 0
+
+
+def test_cache_com_jps():
+    for grade, pares in referencia.cenarios((17, 23), diagonais=True):
+        cache = CacheCaminhos(grade, algoritmo=busca_jps)
+        for pos_inicio, pos_fim in pares + pares:
+            referencia.conferir(grade, cache.buscar(pos_inicio, pos_fim),
+                                pos_inicio, pos_fim)
+        cache.desconectar()
@@ -0,0 +1,106 @@
+import random
+
+import pytest
+
+from filas import FilaBaldes, FilaHeap, nova_fila
+
+
+def operacoes_aleatorias(semente, quantidade=2000, maximo=50):
+    '''
+    Sequência de inserções (prioridade, item) e remoções (None).
+    '''
+    aleatorio = random.Random(semente)
+    for item in range(quantidade):
+        if aleatorio.random() < 0.6:
+            yield aleatorio.randint(0, maximo), item
+        else:
+            yield None
+
+
+def conferir_fila(fila, semente, desempate):
+    '''
+    Compara a fila com uma lista ordenada a cada remoção. Com desempate
+    'fifo' os empates saem na ordem de inserção; com 'lifo', na inversa.
+    '''
+    esperados = []
+    ordem = 0
+    for operacao in operacoes_aleatorias(semente):
+        if operacao is not None:
+            prioridade, item = operacao
+            ordem += 1
+            chave = ordem if desempate == 'fifo' else -ordem
+            esperados.append((prioridade, chave, item))
+            fila.inserir(prioridade, item)
+        elif esperados:
+            esperados.sort()
+            prioridade, _, item = esperados.pop(0)
+            assert fila.consultar() == (prioridade, item)
+            assert fila.remover() == (prioridade, item)
+        assert len(fila) == len(esperados)
+        assert bool(fila) == bool(esperados)
+    while esperados:
+        esperados.sort()
+        prioridade, _, item = esperados.pop(0)
+        assert fila.remover() == (prioridade, item)
+    assert not fila
+
+
+@pytest.mark.parametrize('semente', range(5))
+def test_fila_heap(semente):
+    fila = FilaHeap()
+    conferir_fila(fila, semente, 'fifo')
+    assert fila.operacoes() == 2 * fila.insercoes()
+
+
+def test_fila_heap_nao_compara_itens():
+    # Itens sem ordem definida: os empates são desfeitos pelo contador.
+    fila = FilaHeap()
+    itens = [object() for _ in range(5)]
+    for item in itens:
+        fila.inserir(1, item)
+    assert [fila.remover()[1] for _ in itens] == itens
+
+
+def test_fila_heap_decrease_key_preguicoso():
+    # O nó melhorado é inserido de novo; a entrada antiga sai depois.
+    fila = FilaHeap()
+    fila.inserir(9, 'a')
+    fila.inserir(5, 'b')
+    fila.inserir(3, 'a')
+    assert fila.menor_prioridade() == 3
+    assert [fila.remover() for _ in range(3)] == [(3, 'a'), (5, 'b'),
+                                                  (9, 'a')]
+
+
+@pytest.mark.parametrize('semente', range(5))
+def test_fila_baldes(semente):
+    fila = FilaBaldes()
+    conferir_fila(fila, semente, 'lifo')
+    assert fila.operacoes() == 2 * fila.insercoes()
+
+
+def test_fila_baldes_salta_baldes_distantes():
+    # Prioridades espalhadas (heurística inconsistente) passam do limite
+    # de varredura e fazem o cursor saltar para a menor chave.
+    fila = FilaBaldes()
+    distantes = [0, 10 * FilaBaldes.LIMITE_VARREDURA, 3,
+                 40 * FilaBaldes.LIMITE_VARREDURA, 1]
+    for item, prioridade in enumerate(distantes):
+        fila.inserir(prioridade, item)
+    assert fila.remover() == (0, 0)
+    fila.inserir(2, 'novo')
+    ordem = [fila.remover()[0] for _ in range(len(fila))]
+    assert ordem == sorted(distantes[1:] + [2])
+
+
+def test_fila_baldes_vazia():
+    fila = FilaBaldes()
+    fila.inserir(4, 'a')
+    fila.remover()
+    with pytest.raises(IndexError):
+        fila.remover()
+
+
+def test_nova_fila():
+    assert isinstance(nova_fila(True), FilaBaldes)
+    assert isinstance(nova_fila(False), FilaHeap)
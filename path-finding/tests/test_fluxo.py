@@ -0,0 +1,82 @@
+import pytest
+
+from fluxo import CacheCampos, CampoFluxo, SEM_DIRECAO
+from grade import Grade, INFINITO
+
+import referencia
+
+
+def conferir_campo(grade, campo):
+    esperadas = referencia.distancias(grade, campo.pos_fim, reverso=True)
+    for linha in range(grade.qtd_linhas):
+        for coluna in range(grade.qtd_colunas):
+            pos = (linha, coluna)
+            distancia = esperadas.get(pos, referencia.INF)
+            assert campo.distancia(pos) == distancia, pos
+            proximo = campo.proximo(pos)
+            if distancia in (0, referencia.INF):
+                assert proximo is None, pos
+                continue
+            assert proximo in set(referencia.vizinhos(grade, pos)), pos
+            caminho = campo.caminho(pos)
+            assert referencia.custo_caminho(grade, caminho) == distancia
+
+
+@pytest.mark.parametrize('formato', referencia.FORMATOS)
+@pytest.mark.parametrize('diagonais', [False, True])
+@pytest.mark.parametrize('custos', [False, True])
+def test_campo_igual_a_referencia_apos_edicoes(formato, diagonais, custos):
+    for semente in range(4):
+        grade = referencia.grade_aleatoria(*formato, semente, diagonais,
+                                           custos=custos)
+        livres = referencia.pontos_livres(grade)
+        if not livres:
+            continue
+        campo = CampoFluxo(grade, livres[len(livres) // 2])
+        conferir_campo(grade, campo)
+        for rodada in range(5):
+            referencia.editar(grade, 100 * semente + rodada, quantidade=3)
+            conferir_campo(grade, campo)
+
+
+def test_grade_de_duas_colunas():
+    # Com duas colunas, o deslocamento de índice +1 (direita) é igual ao da
+    # diagonal baixo-esquerda: a direção precisa vir de (linha, coluna).
+    grade = Grade(5, 2)
+    for linha, coluna in [(0, 0), (0, 1), (3, 0)]:
+        grade.set_obstaculo(linha, coluna)
+    campo = CampoFluxo(grade, (2, 0))
+    assert campo.proximo((4, 0)) == (4, 1)
+    conferir_campo(grade, campo)
+
+    grade.set_obstaculo(2, 1)
+    grade.set_obstaculo(1, 1)
+    campo.atualizar()
+    for pos in [(3, 1), (4, 0), (4, 1)]:
+        assert campo.distancias[pos] == INFINITO
+        assert campo.direcoes[pos] == SEM_DIRECAO
+    conferir_campo(grade, campo)
+
+
+@pytest.mark.parametrize('diagonais', [False, True])
+def test_campo_apos_escrita_direta(diagonais):
+    grade = referencia.grade_aleatoria(12, 12, 1, diagonais, custos=True)
+    campo = CampoFluxo(grade, referencia.pontos_livres(grade)[0])
+    grade.obstaculo[:, 6] = 1
+    grade.obstaculo[3, 6] = 0
+    grade.recalcular_movimentos()
+    conferir_campo(grade, campo)
+    campo.desconectar()
+
+
+def test_cache_descarta_o_menos_recente():
+    grade = Grade(6)
+    campos = CacheCampos(grade, capacidade=2)
+    primeiro = campos.campo((0, 0))
+    campos.campo((5, 5))
+    campos.campo((0, 0))
+    campos.campo((3, 3))
+    assert campos.campo((0, 0)) is primeiro
+    assert len(grade.ao_alterar) == 2
+    campos.limpar()
+    assert grade.ao_alterar == []
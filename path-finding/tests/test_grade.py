@@ -0,0 +1,131 @@
+import random
+
+import numpy as np
+import pytest
+
+from busca import busca_A_estrela
+from grade import FECHADO, INFINITO, OBSTACULO, SEM_PAI, VAZIO, Grade
+
+import referencia
+
+
+def conferir_vizinhos(grade):
+    for linha, coluna in referencia.pontos_livres(grade):
+        indice = grade.indice(linha, coluna)
+        obtidos = sorted(grade.posicao(v) for v in grade.vizinhos(indice))
+        esperados = sorted(referencia.vizinhos(grade, (linha, coluna)))
+        assert obtidos == esperados, (linha, coluna)
+
+
+@pytest.mark.parametrize('formato', referencia.FORMATOS)
+@pytest.mark.parametrize('diagonais', [False, True])
+def test_vizinhos_apos_edicoes(formato, diagonais):
+    for semente in range(4):
+        grade = referencia.grade_aleatoria(*formato, semente, diagonais)
+        conferir_vizinhos(grade)
+        for rodada in range(4):
+            referencia.editar(grade, 100 * semente + rodada)
+            conferir_vizinhos(grade)
+
+
+def test_visoes_numpy_compartilham_os_buffers():
+    grade = Grade(4, 6)
+    grade.set_obstaculo(2, 5)
+    assert grade.obstaculo[2, 5] == 1
+    assert grade.obstaculo_plano[grade.indice(2, 5)] == 1
+    assert grade.estado[2, 5] == OBSTACULO
+    grade.set_custo(1, 3, 4)
+    assert grade.custo[1, 3] == 4
+    assert grade.posicao(grade.indice(3, 2)) == (3, 2)
+
+    grade.obstaculo[2, 5] = 0
+    assert not grade.is_obstaculo(2, 5)
+
+
+def test_estado_da_busca_fica_na_grade():
+    grade = Grade(3, 5)
+    grade.set_obstaculo(1, 1)
+    grade.set_estado(grade.indice(1, 1), VAZIO)
+    assert not grade.is_obstaculo(1, 1)
+
+    grade.g[0, :] = [0, 1, 2, 3, 4]
+    for coluna in range(1, 5):
+        grade.pai[0, coluna] = grade.indice(0, coluna - 1)
+    assert grade.get_g(grade.indice(0, 4)) == 4
+    assert grade.reconstruir_caminho(grade.indice(0, 3)) \
+        == [(0, 0), (0, 1), (0, 2), (0, 3)]
+    grade.limpar_busca()
+    assert grade.reconstruir_caminho(grade.indice(0, 3)) == [(0, 3)]
+
+
+def test_ao_alterar_so_avisa_mudancas():
+    grade = Grade(3, 4)
+    avisos = []
+    grade.ao_alterar.append(avisos.append)
+    grade.set_obstaculo(1, 2)
+    grade.set_obstaculo(1, 2)
+    grade.set_estado(grade.indice(0, 0), FECHADO)
+    grade.set_custo(2, 3, 4)
+    grade.set_custo(2, 3, 4)
+    grade.set_vazio(1, 2)
+    assert avisos == [grade.indice(1, 2), grade.indice(2, 3),
+                      grade.indice(1, 2)]
+
+    # Escrita direta e troca de diagonais: a grade inteira pode mudar.
+    avisos.clear()
+    grade.obstaculo[0] = 1
+    grade.recalcular_movimentos()
+    grade.diagonais = True
+    assert avisos == [None, None]
+
+
+@pytest.mark.parametrize('formato', referencia.FORMATOS)
+@pytest.mark.parametrize('diagonais', [False, True])
+def test_edicoes_locais_igual_a_recalcular(formato, diagonais):
+    # As máscaras e as contagens atualizadas a cada setter são as mesmas
+    # que um recálculo completo daria.
+    for semente in range(3):
+        grade = referencia.grade_aleatoria(*formato, semente, diagonais)
+        aleatorio = random.Random(semente)
+        for _ in range(40):
+            linha = aleatorio.randrange(grade.qtd_linhas)
+            coluna = aleatorio.randrange(grade.qtd_colunas)
+            sorteio = aleatorio.random()
+            if sorteio < 0.4:
+                grade.set_obstaculo(linha, coluna)
+            elif sorteio < 0.8:
+                grade.set_vazio(linha, coluna)
+            else:
+                grade.set_custo(linha, coluna, aleatorio.randint(1, 5))
+            assert np.array_equal(grade.obstaculo_transposto,
+                                  grade.obstaculo.T)
+            movimentos = grade.movimentos.copy()
+            qtd_obstaculos = grade.qtd_obstaculos
+            qtd_custos_especiais = grade.qtd_custos_especiais
+            grade.recalcular_movimentos()
+            assert np.array_equal(movimentos, grade.movimentos)
+            assert qtd_obstaculos == grade.qtd_obstaculos
+            assert qtd_custos_especiais == grade.qtd_custos_especiais
+            assert grade.custo_uniforme() == (qtd_custos_especiais == 0)
+
+
+@pytest.mark.parametrize('diagonais', [False, True])
+def test_escrita_direta_com_recalcular(diagonais):
+    grade = Grade(9, 5, diagonais)
+    aleatorio = np.random.default_rng(7)
+    grade.obstaculo[:] = aleatorio.random((9, 5)) < 0.3
+    grade.recalcular_movimentos()
+    conferir_vizinhos(grade)
+    assert grade.qtd_obstaculos == int(grade.obstaculo.sum())
+
+    grade.diagonais = not diagonais
+    conferir_vizinhos(grade)
+
+
+def test_limpeza_local_restaura_a_grade():
+    grade = referencia.grade_aleatoria(40, 40, 2)
+    for pos_inicio, pos_fim in referencia.consultas(grade, 2):
+        busca_A_estrela(grade, pos_inicio, pos_fim)
+        grade.limpar_busca()
+        assert (grade.g == INFINITO).all()
+        assert (grade.pai == SEM_PAI).all()
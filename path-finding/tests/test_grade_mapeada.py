@@ -0,0 +1,105 @@
+import os
+import random
+import subprocess
+import sys
+
+import pytest
+
+from busca import busca_A_estrela
+import grade_mapeada
+from grade_mapeada import GradeMapeada
+from movingai import salvar_mapa
+
+import referencia
+
+
+def test_importa_sem_os_motores():
+    codigo = 'import sys, grade_mapeada; ' \
+        'assert not {"movingai", "benchmark", "jps"} & set(sys.modules)'
+    subprocess.run([sys.executable, '-c', codigo], check=True,
+                   cwd=os.path.dirname(grade_mapeada.__file__))
+
+
+def conferir_buscas(grade, mapeada, semente):
+    for pos_inicio, pos_fim in referencia.consultas(grade, semente):
+        resultado = busca_A_estrela(mapeada, pos_inicio, pos_fim)
+        referencia.conferir(grade, resultado, pos_inicio, pos_fim)
+
+
+@pytest.mark.parametrize('formato', referencia.FORMATOS + [(20, 9)])
+@pytest.mark.parametrize('diagonais', [False, True])
+def test_mapeada_igual_a_referencia_apos_edicoes(tmp_path, formato,
+                                                 diagonais):
+    # Ladrilhos de lado 8: os formatos maiores ocupam vários ladrilhos, e
+    # os pontos da beirada de cada um usam o caminho sem máscara.
+    for semente in range(3):
+        grade = referencia.grade_aleatoria(*formato, semente, diagonais)
+        mapeada = GradeMapeada.de_grade(grade, tmp_path / f'{semente}.grdm',
+                                        lado=8)
+        conferir_buscas(grade, mapeada, semente)
+
+        aleatorio = random.Random(semente)
+        for rodada in range(3):
+            for _ in range(4):
+                linha = aleatorio.randrange(grade.qtd_linhas)
+                coluna = aleatorio.randrange(grade.qtd_colunas)
+                if aleatorio.random() < 0.5:
+                    grade.set_obstaculo(linha, coluna)
+                    mapeada.set_obstaculo(linha, coluna)
+                else:
+                    grade.set_vazio(linha, coluna)
+                    mapeada.set_vazio(linha, coluna)
+            conferir_buscas(grade, mapeada, 100 * semente + rodada)
+
+
+def test_criar_e_de_mapa(tmp_path):
+    grade = referencia.grade_aleatoria(13, 6, 4, diagonais=True)
+    mapa = tmp_path / 'mapa.map'
+    salvar_mapa(grade, mapa)
+    mapeada = GradeMapeada.de_mapa(mapa, tmp_path / 'mapa.grdm', lado=8)
+    conferir_buscas(grade, mapeada, 4)
+
+    # Reaberta somente para leitura, com espaço para um só ladrilho:
+    mapeada = GradeMapeada(tmp_path / 'mapa.grdm', capacidade=1)
+    conferir_buscas(grade, mapeada, 5)
+    assert mapeada.ladrilhos_em_memoria() == 1
+
+    vazia = GradeMapeada.criar(tmp_path / 'vazia.grdm', 9, 2, lado=8)
+    livre = referencia.grade_aleatoria(9, 2, 0, densidade=0)
+    conferir_buscas(livre, vazia, 6)
+
+
+def test_arquivo_com_um_bit_por_ponto(tmp_path):
+    arquivo = tmp_path / 'grande.grdm'
+    mapeada = GradeMapeada.criar(arquivo, 40, 20, lado=16)
+    # 3 x 2 ladrilhos de 16 x 16 bits, depois do cabeçalho de 64 bytes:
+    assert arquivo.stat().st_size == 64 + 6 * 16 * 16 // 8
+    mapeada.set_obstaculo(17, 3)
+    mapeada.salvar()
+
+    # A busca só desempacota os ladrilhos por onde passa e guarda o estado
+    # apenas dos pontos alcançados:
+    reaberta = GradeMapeada(arquivo)
+    resultado = busca_A_estrela(reaberta, (0, 0), (5, 5))
+    assert resultado.custo == 10
+    assert reaberta.ladrilhos_em_memoria() == 1
+    assert len(reaberta.g_plano) < 40 * 20 // 4
+    assert reaberta.is_obstaculo(17, 3)
+    assert not reaberta.is_obstaculo(17, 4)
+
+
+def test_arquivos_invalidos(tmp_path):
+    with pytest.raises(ValueError):
+        GradeMapeada.criar(tmp_path / 'lado.grdm', 10, lado=12)
+    outro = tmp_path / 'outro.grdm'
+    outro.write_bytes(b'\0' * 128)
+    with pytest.raises(ValueError):
+        GradeMapeada(outro)
+
+    # Cabeçalho malformado: o mesmo erro que movingai.ler_mapa dá.
+    mapa = tmp_path / 'ruim.map'
+    for cabecalho in (b'type octile\nwidth 4\n', b'type\nheight 1\nwidth 4\n',
+                      b'type octile\nheight um\nwidth 4\n'):
+        mapa.write_bytes(cabecalho + b'map\n....\n')
+        with pytest.raises(ValueError, match='cabeçalho'):
+            GradeMapeada.de_mapa(mapa, tmp_path / 'ruim.grdm')
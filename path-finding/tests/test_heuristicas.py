@@ -0,0 +1,82 @@
+import numpy as np
+import pytest
+
+from heuristicas import VERSOES_LOTE, campo_heuristico, \
+    heuristica_admissivel, heuristica_inteira, heuristica_mais_proxima, \
+    heuristica_por_indice, manhattan
+
+import referencia
+
+
+@pytest.mark.parametrize('formato', referencia.FORMATOS)
+@pytest.mark.parametrize('heuristica', list(VERSOES_LOTE))
+def test_campo_igual_a_heuristica_escalar(formato, heuristica):
+    qtd_linhas, qtd_colunas = formato
+    pontos = [(linha, coluna) for linha in range(qtd_linhas)
+              for coluna in range(qtd_colunas)]
+    for pos_fim in pontos[::3]:
+        campo = heuristica_por_indice(heuristica, pos_fim, qtd_linhas,
+                                      qtd_colunas, campo=True)
+        sob_demanda = heuristica_por_indice(heuristica, pos_fim, qtd_linhas,
+                                            qtd_colunas)
+        for indice, pos in enumerate(pontos):
+            assert campo(indice) == heuristica(pos, pos_fim)
+            assert sob_demanda(indice) == heuristica(pos, pos_fim)
+
+
+@pytest.mark.parametrize('heuristica', list(VERSOES_LOTE))
+def test_versao_em_lote(heuristica):
+    linhas = np.array([0, 3, 7, 2])
+    colunas = np.array([5, 0, 7, 2])
+    obtidos = VERSOES_LOTE[heuristica](linhas, colunas, (2, 4))
+    assert obtidos.tolist() == [heuristica((linha, coluna), (2, 4))
+                                for linha, coluna in zip(linhas, colunas)]
+
+
+def test_campo_fica_em_cache_por_objetivo():
+    campo_heuristico.cache_clear()
+    primeiro = campo_heuristico(manhattan, (1, 2), 5, 6)
+    assert campo_heuristico(manhattan, (1, 2), 5, 6) is primeiro
+    assert campo_heuristico(manhattan, (1, 3), 5, 6) is not primeiro
+    assert campo_heuristico.cache_info().hits == 1
+
+    # Sem versão em lote, a heurística é sempre calculada sob demanda:
+    def propria(p1, p2):
+        return 0
+
+    h = heuristica_por_indice(propria, (1, 2), 5, 6, campo=True)
+    assert h(7) == 0
+    assert campo_heuristico.cache_info().currsize == 2
+
+
+@pytest.mark.parametrize('formato', referencia.FORMATOS)
+@pytest.mark.parametrize('diagonais', [False, True])
+def test_heuristicas_admissiveis(formato, diagonais):
+    heuristica = heuristica_admissivel(diagonais)
+    for grade, pares in referencia.cenarios(formato, diagonais, custos=True):
+        for _, pos_fim in pares:
+            distancias = referencia.distancias(grade, pos_fim, reverso=True)
+            for pos, distancia in distancias.items():
+                assert heuristica(pos, pos_fim) <= distancia
+
+
+def test_heuristica_inteira():
+    assert all(heuristica_inteira(h) for h in VERSOES_LOTE)
+
+    def propria(p1, p2):
+        return manhattan(p1, p2) / 2
+
+    assert not heuristica_inteira(propria)
+    propria.inteira = True
+    assert heuristica_inteira(propria)
+
+
+@pytest.mark.parametrize('campo', [False, True])
+def test_mais_proxima_e_o_minimo(campo):
+    qtd_linhas, qtd_colunas = 6, 2
+    fins = [(0, 1), (5, 0), (3, 1)]
+    h = heuristica_mais_proxima(manhattan, fins, qtd_linhas, qtd_colunas,
+                                campo)
+    for indice in range(qtd_linhas * qtd_colunas):
+        pos = divmod(indice, qtd_colunas)
+        assert h(indice) == min(manhattan(pos, fim) for fim in fins)
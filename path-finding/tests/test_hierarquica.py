@@ -0,0 +1,95 @@
+import pytest
+
+from hierarquica import BuscaHierarquica
+
+import referencia
+
+
+@pytest.mark.parametrize('formato', referencia.FORMATOS)
+@pytest.mark.parametrize('diagonais', [False, True])
+@pytest.mark.parametrize('custos', [False, True])
+@pytest.mark.parametrize('tamanho_cluster', [4, 8])
+def test_hierarquica_perto_da_referencia(formato, diagonais, custos,
+                                         tamanho_cluster):
+    # O HPA* é quase ótimo: cada caminho precisa ser válido e encontrado
+    # sempre que existir, e o custo total fica perto do ótimo.
+    soma_custos = soma_otimos = 0
+    for semente in range(3):
+        grade = referencia.grade_aleatoria(*formato, semente, diagonais,
+                                           custos=custos)
+        busca = BuscaHierarquica(grade, tamanho_cluster)
+        for rodada in range(3):
+            for pos_inicio, pos_fim in referencia.consultas(
+                    grade, 100 * semente + rodada):
+                otimo = referencia.custo_otimo(grade, pos_inicio, pos_fim)
+                resultado = busca.buscar(pos_inicio, pos_fim)
+                referencia.conferir(grade, resultado, pos_inicio, pos_fim,
+                                    otimo, fator=referencia.INF)
+                if resultado:
+                    soma_custos += resultado.custo
+                    soma_otimos += otimo
+            referencia.editar(grade, 100 * semente + rodada, custos=custos)
+    assert soma_custos <= 1.25 * soma_otimos
+
+
+@pytest.mark.parametrize('formato', [(6, 2), (2, 6), (17, 23)])
+@pytest.mark.parametrize('diagonais', [False, True])
+def test_reconstrucao_igual_a_abstracao_nova(formato, diagonais):
+    # Os clusters reconstruídos após as edições dão os mesmos custos que
+    # uma abstração construída do zero sobre a grade editada.
+    for semente in range(3):
+        grade = referencia.grade_aleatoria(*formato, semente, diagonais,
+                                           custos=True)
+        busca = BuscaHierarquica(grade, 4)
+        for rodada in range(3):
+            referencia.editar(grade, 100 * semente + rodada)
+            nova = BuscaHierarquica(grade, 4)
+            nova.desconectar()
+            for pos_inicio, pos_fim in referencia.consultas(
+                    grade, 100 * semente + rodada):
+                assert busca.buscar(pos_inicio, pos_fim).custo \
+                    == nova.buscar(pos_inicio, pos_fim).custo
+
+
+def test_edicao_reconstroi_so_os_clusters_vizinhos(monkeypatch):
+    grade = referencia.grade_aleatoria(16, 16, 0, densidade=0.1)
+    busca = BuscaHierarquica(grade, 4)
+    recalculados = []
+    calcular = busca._calcular_cluster
+
+    def registrar(cluster):
+        recalculados.append(cluster)
+        calcular(cluster)
+
+    monkeypatch.setattr(busca, '_calcular_cluster', registrar)
+    grade.set_obstaculo(5, 6)
+    grade.set_custo(6, 5, 3)
+    assert recalculados == []
+    busca.buscar((0, 0), (0, 0))
+    assert sorted(recalculados) == [(0, 1), (1, 0), (1, 1), (1, 2), (2, 1)]
+
+    recalculados.clear()
+    busca.buscar((0, 0), (0, 0))
+    assert recalculados == []
+
+
+def test_escrita_direta_reconstroi_tudo():
+    grade = referencia.grade_aleatoria(17, 23, 1, custos=True)
+    busca = BuscaHierarquica(grade, 4)
+    grade.obstaculo[:, 11] = 1
+    grade.obstaculo[8, 11] = 0
+    grade.recalcular_movimentos()
+    nova = BuscaHierarquica(grade, 4)
+    nova.desconectar()
+    for pos_inicio, pos_fim in referencia.consultas(grade, 1):
+        assert busca.buscar(pos_inicio, pos_fim).custo \
+            == nova.buscar(pos_inicio, pos_fim).custo
+    busca.desconectar()
+
+
+def test_desconectar():
+    grade = referencia.grade_aleatoria(8, 8, 0)
+    busca = BuscaHierarquica(grade, 4)
+    assert grade.ao_alterar == [busca.marcar_alteracao]
+    busca.desconectar()
+    assert grade.ao_alterar == []
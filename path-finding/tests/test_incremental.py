@@ -0,0 +1,77 @@
+import random
+
+import pytest
+
+from incremental import BuscaIncremental
+
+import referencia
+
+
+@pytest.mark.parametrize('formato', referencia.FORMATOS)
+@pytest.mark.parametrize('diagonais', [False, True])
+@pytest.mark.parametrize('custos', [False, True])
+def test_replanejamento_igual_a_referencia(formato, diagonais, custos):
+    for semente in range(4):
+        grade = referencia.grade_aleatoria(*formato, semente, diagonais,
+                                           custos=custos)
+        pares = referencia.consultas(grade, semente, quantidade=2)
+        if not pares:
+            continue
+        aleatorio = random.Random(semente)
+        for pos_inicio, pos_fim in pares:
+            planejador = BuscaIncremental(grade, pos_inicio, pos_fim)
+            referencia.conferir(grade, planejador.buscar(), pos_inicio,
+                                pos_fim)
+            for rodada in range(6):
+                referencia.editar(grade, 100 * semente + rodada,
+                                  quantidade=3, custos=custos)
+                # Às vezes o agente anda pelo caminho antes de replanejar:
+                resultado = planejador.buscar()
+                if resultado and aleatorio.random() < 0.5:
+                    pos_inicio = resultado.caminho[
+                        len(resultado.caminho) // 2]
+                    planejador.mover_inicio(pos_inicio)
+                referencia.conferir(grade, planejador.buscar(), pos_inicio,
+                                    pos_fim)
+            planejador.desconectar()
+        assert grade.ao_alterar == []
+
+
+@pytest.mark.parametrize('diagonais', [False, True])
+def test_replanejamento_apos_escrita_direta(diagonais):
+    grade = referencia.grade_aleatoria(17, 23, 1, diagonais, custos=True)
+    for pos_inicio, pos_fim in referencia.consultas(grade, 1, quantidade=3):
+        planejador = BuscaIncremental(grade, pos_inicio, pos_fim)
+        planejador.buscar()
+        grade.obstaculo[:, 11] ^= 1
+        grade.recalcular_movimentos()
+        referencia.conferir(grade, planejador.buscar(), pos_inicio, pos_fim)
+        planejador.desconectar()
+
+
+def test_reparo_expande_menos_que_a_busca_inicial():
+    grade = referencia.grade_aleatoria(30, 30, 1, densidade=0.1)
+    planejador = BuscaIncremental(grade, (0, 0), (29, 29))
+    grade.set_vazio(0, 0)
+    grade.set_vazio(29, 29)
+    inicial = planejador.buscar()
+    grade.set_obstaculo(*inicial.caminho[len(inicial.caminho) // 2])
+    reparo = planejador.buscar()
+    referencia.conferir(grade, reparo, (0, 0), (29, 29))
+    assert reparo.iteracoes < inicial.iteracoes
+
+
+def test_callbacks_veem_a_fila():
+    grade = referencia.grade_aleatoria(12, 12, 3)
+    pos_inicio, pos_fim = referencia.consultas(grade, 3, quantidade=1)[0]
+    planejador = BuscaIncremental(grade, pos_inicio, pos_fim)
+    vistos = []
+
+    def ao_iterar(iterador, lista_abertos, lista_fechados):
+        vistos.append((iterador, set(lista_abertos)))
+
+    resultado = planejador.buscar(ao_iterar=ao_iterar)
+    assert [iterador for iterador, _ in vistos] == \
+        list(range(1, resultado.iteracoes + 1))
+    assert vistos[-1][1] == resultado.lista_abertos
+    planejador.desconectar()
@@ -0,0 +1,109 @@
+import io
+import json
+
+import pytest
+
+from anytime import busca_ara
+from bidirecional import busca_bidirecional
+from busca import busca_A_estrela
+from incremental import BuscaIncremental
+from instrumentacao import Instrumentos, SinkConsole, SinkJSONL, \
+    SinkMemoria
+from jps import busca_jps
+from memoria_limitada import busca_sma
+
+import referencia
+
+
+@pytest.mark.parametrize('algoritmo', [busca_A_estrela, busca_jps,
+                                       busca_bidirecional, busca_ara,
+                                       busca_sma])
+@pytest.mark.parametrize('formato', [(6, 2), (17, 23)])
+def test_instrumentos_nao_mudam_o_resultado(algoritmo, formato):
+    for grade, pares in referencia.cenarios(formato, diagonais=True):
+        for pos_inicio, pos_fim in pares:
+            sink = SinkMemoria()
+            instrumentos = Instrumentos([sink], amostragem=1)
+            resultado = algoritmo(grade, pos_inicio, pos_fim,
+                                  instrumentos=instrumentos)
+            referencia.conferir(grade, resultado, pos_inicio, pos_fim)
+
+            simples = algoritmo(grade, pos_inicio, pos_fim)
+            assert (simples.custo, simples.caminho) \
+                == (resultado.custo, resultado.caminho)
+
+            assert sink.eventos[-1][0] == 'busca'
+            assert instrumentos.contadores['expansoes'] == resultado.iteracoes
+
+
+def test_sink_jsonl():
+    grade = referencia.grade_aleatoria(12, 12, 0)
+    pos_inicio, pos_fim = referencia.consultas(grade, 0)[0]
+    arquivo = io.StringIO()
+    instrumentos = Instrumentos([SinkJSONL(arquivo)], amostragem=2)
+    resultado = busca_A_estrela(grade, pos_inicio, pos_fim,
+                                instrumentos=instrumentos)
+    eventos = [json.loads(linha) for linha in arquivo.getvalue().splitlines()]
+    assert eventos[-1]['evento'] == 'busca'
+    assert eventos[-1]['expansoes'] == resultado.iteracoes
+    iteracoes = [e for e in eventos if e['evento'] == 'iteracao']
+    assert iteracoes
+    assert all(e['iteracao'] % 2 == 0 for e in iteracoes)
+    assert iteracoes[-1]['iteracao'] <= resultado.iteracoes
+
+
+def test_sinks_com_d_estrela_lite():
+    grade = referencia.grade_aleatoria(12, 12, 3)
+    pos_inicio, pos_fim = referencia.consultas(grade, 3)[0]
+    arquivo = io.StringIO()
+    memoria = SinkMemoria()
+    instrumentos = Instrumentos([SinkJSONL(arquivo), memoria], amostragem=1)
+    planejador = BuscaIncremental(grade, pos_inicio, pos_fim)
+    vistos = []
+
+    def ao_iterar(iterador, lista_abertos, lista_fechados):
+        vistos.append(set(lista_abertos))
+
+    planejador.buscar(ao_iterar=ao_iterar, instrumentos=instrumentos)
+    planejador.desconectar()
+
+    # Cada evento guardado tem a fila daquela iteração, não a do fim:
+    iteracoes = [dados for evento, dados in memoria.eventos
+                 if evento == 'iteracao']
+    assert [dados['lista_abertos'] for dados in iteracoes] == vistos
+    linhas = [json.loads(linha) for linha in arquivo.getvalue().splitlines()]
+    assert [linha['lista_abertos'] for linha in linhas
+            if linha['evento'] == 'iteracao'] == [len(v) for v in vistos]
+
+
+def test_sinks_aceitam_qualquer_conjunto():
+    arquivo = io.StringIO()
+    memoria = SinkMemoria()
+    fila = {3: 0, 5: 1}
+    fechados = frozenset({1, 2})
+    for sink in (SinkJSONL(arquivo), memoria):
+        sink('iteracao', {'iteracao': 1, 'lista_abertos': fila.keys(),
+                          'lista_fechados': fechados})
+    fila[7] = 2
+    assert json.loads(arquivo.getvalue()) == {
+        'evento': 'iteracao', 'iteracao': 1, 'lista_abertos': 2,
+        'lista_fechados': 2}
+    assert memoria.eventos == [('iteracao', {
+        'iteracao': 1, 'lista_abertos': {3, 5}, 'lista_fechados': {1, 2}})]
+
+
+def test_contadores_acumulam_entre_buscas(capsys):
+    grade = referencia.grade_aleatoria(12, 12, 1, custos=True)
+    pares = referencia.consultas(grade, 1, quantidade=4)
+    instrumentos = Instrumentos([SinkConsole()])
+    expansoes = 0
+    for pos_inicio, pos_fim in pares:
+        expansoes += busca_A_estrela(grade, pos_inicio, pos_fim,
+                                     instrumentos=instrumentos).iteracoes
+    resumo = instrumentos.resumo()
+    assert resumo['contadores']['expansoes'] == expansoes
+    assert all(tempo >= 0 for tempo in resumo['tempos'].values())
+    # Sem amostragem, o console só recebe o resumo de cada busca:
+    linhas = capsys.readouterr().out.splitlines()
+    assert len(linhas) == len(pares)
+    assert all('expansoes=' in linha for linha in linhas)
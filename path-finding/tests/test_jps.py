@@ -0,0 +1,58 @@
+import pytest
+
+from grade import Grade
+from jps import busca_jps
+
+import referencia
+
+
+@pytest.mark.parametrize('formato', referencia.FORMATOS)
+@pytest.mark.parametrize('diagonais', [False, True])
+@pytest.mark.parametrize('densidade', [0.1, 0.35])
+def test_jps_igual_a_referencia(formato, diagonais, densidade):
+    for semente in range(4):
+        grade = referencia.grade_aleatoria(*formato, semente, diagonais,
+                                           densidade)
+        for rodada in range(3):
+            for pos_inicio, pos_fim in referencia.consultas(
+                    grade, 100 * semente + rodada):
+                for campo in (False, True):
+                    resultado = busca_jps(grade, pos_inicio, pos_fim,
+                                          campo=campo)
+                    referencia.conferir(grade, resultado, pos_inicio,
+                                        pos_fim)
+            referencia.editar(grade, 100 * semente + rodada, custos=False)
+
+
+def test_jps_recusa_custos():
+    grade = Grade(4)
+    grade.set_custo(1, 1, 3)
+    with pytest.raises(ValueError):
+        busca_jps(grade, (0, 0), (3, 3))
+    grade.set_custo(1, 1, 1)
+    assert busca_jps(grade, (0, 0), (3, 3)).custo == 6
+
+
+@pytest.mark.parametrize('diagonais', [False, True])
+def test_jps_expande_so_pontos_de_salto(diagonais):
+    # Em campo aberto com uma parede, o JPS só enfileira os pontos de salto
+    # e mesmo assim devolve o caminho completo, passo a passo.
+    grade = Grade(60, 60, diagonais)
+    for linha in range(10, 50):
+        grade.set_obstaculo(linha, 30)
+    jps = busca_jps(grade, (30, 5), (30, 55))
+    referencia.conferir(grade, jps, (30, 5), (30, 55))
+    assert jps.iteracoes * 5 < len(jps.caminho)
+
+
+@pytest.mark.parametrize('diagonais', [False, True])
+def test_jps_apos_escrita_direta(diagonais):
+    # O JPS lê a cópia transposta dos obstáculos, refeita por
+    # recalcular_movimentos:
+    grade = referencia.grade_aleatoria(17, 23, 5, diagonais)
+    grade.obstaculo[:, 11] = 1
+    grade.obstaculo[8, 11] = 0
+    grade.recalcular_movimentos()
+    for pos_inicio, pos_fim in referencia.consultas(grade, 5):
+        resultado = busca_jps(grade, pos_inicio, pos_fim)
+        referencia.conferir(grade, resultado, pos_inicio, pos_fim)
@@ -0,0 +1,71 @@
+import pytest
+
+from anytime import ResultadoAnytime, busca_ara
+from bidirecional import busca_bidirecional
+from busca import busca_A_estrela
+from jps import busca_jps
+from lote import buscar_lote
+
+import referencia
+
+
+@pytest.mark.parametrize('formato', [(1, 7), (6, 2), (17, 23)])
+@pytest.mark.parametrize('diagonais', [False, True])
+@pytest.mark.parametrize('processos', [1, 2])
+def test_lote_igual_a_referencia(formato, diagonais, processos):
+    for grade, pares in referencia.cenarios(formato, diagonais, custos=True,
+                                            sementes=2, rodadas=1):
+        vistos = set()
+        for numero, resultado in buscar_lote(grade, pares,
+                                             processos=processos):
+            vistos.add(numero)
+            pos_inicio, pos_fim = pares[numero]
+            referencia.conferir(grade, resultado, pos_inicio, pos_fim)
+            assert resultado.lista_abertos == set()
+            assert resultado.lista_fechados == set()
+        assert vistos == set(range(len(pares)))
+
+
+@pytest.mark.parametrize('processos', [1, 2])
+def test_lote_mantem_os_campos_do_resultado(processos):
+    # Sem as listas, o resultado continua sendo o que a busca devolveu:
+    grade = referencia.grade_aleatoria(12, 12, 2, custos=True)
+    pares = referencia.consultas(grade, 2, quantidade=4)
+    for algoritmo in (busca_A_estrela, busca_bidirecional, busca_ara):
+        for numero, resultado in buscar_lote(grade, pares,
+                                             algoritmo=algoritmo,
+                                             processos=processos):
+            pos_inicio, pos_fim = pares[numero]
+            referencia.conferir(grade, resultado, pos_inicio, pos_fim)
+            assert resultado.lista_abertos == set()
+            if resultado.iteracoes:
+                assert resultado.operacoes_fila > 0
+            if algoritmo is busca_ara:
+                assert isinstance(resultado, ResultadoAnytime)
+
+
+@pytest.mark.parametrize('algoritmo', [busca_jps, busca_bidirecional])
+def test_lote_com_outros_algoritmos(algoritmo):
+    grade = referencia.grade_aleatoria(17, 23, 5, diagonais=True)
+    pares = referencia.consultas(grade, 5)
+    for numero, resultado in buscar_lote(grade, pares, algoritmo=algoritmo,
+                                         processos=2, tamanho_bloco=3,
+                                         listas=True):
+        pos_inicio, pos_fim = pares[numero]
+        referencia.conferir(grade, resultado, pos_inicio, pos_fim)
+        if resultado.iteracoes:
+            assert resultado.lista_fechados
+
+
+def test_lote_usa_a_grade_do_inicio():
+    # Os processos copiam a grade ao iniciar; edições feitas enquanto o
+    # lote roda não mudam as respostas.
+    grade = referencia.grade_aleatoria(12, 12, 3, densidade=0)
+    pares = [((0, 0), (11, 11))] * 6
+    custos = set()
+    for _, resultado in buscar_lote(grade, pares, processos=2,
+                                    tamanho_bloco=1):
+        custos.add(resultado.custo)
+        grade.set_obstaculo(0, 1)
+        grade.set_obstaculo(1, 0)
+    assert custos == {22}
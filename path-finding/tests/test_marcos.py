@@ -0,0 +1,76 @@
+import pytest
+
+from bidirecional import busca_bidirecional
+from busca import busca_A_estrela
+from marcos import HeuristicaMarcos
+
+import referencia
+
+
+def conferir_admissivel(grade, alt, fins):
+    for pos_fim in fins:
+        distancias = referencia.distancias(grade, pos_fim, reverso=True)
+        for pos, distancia in distancias.items():
+            assert alt(pos, pos_fim) <= distancia, (pos, pos_fim)
+
+
+@pytest.mark.parametrize('formato', referencia.FORMATOS)
+@pytest.mark.parametrize('diagonais', [False, True])
+@pytest.mark.parametrize('custos', [False, True])
+def test_marcos_igual_a_referencia(formato, diagonais, custos):
+    for grade, pares in referencia.cenarios(formato, diagonais, custos):
+        if not referencia.pontos_livres(grade):
+            continue
+        # As tabelas são recalculadas após cada rodada de edições:
+        alt = HeuristicaMarcos.calcular(grade, qtd_marcos=4)
+        conferir_admissivel(grade, alt, [fim for _, fim in pares[:4]])
+        for pos_inicio, pos_fim in pares:
+            otimo = referencia.custo_otimo(grade, pos_inicio, pos_fim)
+            for campo in (False, True):
+                for algoritmo in (busca_A_estrela, busca_bidirecional):
+                    resultado = algoritmo(grade, pos_inicio, pos_fim,
+                                          heuristica=alt, campo=campo)
+                    referencia.conferir(grade, resultado, pos_inicio,
+                                        pos_fim, otimo)
+
+
+@pytest.mark.parametrize('diagonais', [False, True])
+def test_marcos_continuam_admissiveis_com_obstaculos_novos(diagonais):
+    grade = referencia.grade_aleatoria(17, 23, 2, diagonais, custos=True)
+    alt = HeuristicaMarcos.calcular(grade, qtd_marcos=6)
+    for pos in referencia.pontos_livres(grade)[::7]:
+        grade.set_obstaculo(*pos)
+    conferir_admissivel(grade, alt, referencia.pontos_livres(grade)[::5])
+
+
+def test_salvar_e_carregar(tmp_path):
+    grade = referencia.grade_aleatoria(12, 12, 1, custos=True)
+    alt = HeuristicaMarcos.calcular(grade, qtd_marcos=3)
+    arquivo = tmp_path / 'marcos.npz'
+    alt.salvar(arquivo)
+    carregada = HeuristicaMarcos.carregar(arquivo, grade)
+    for pos_inicio, pos_fim in referencia.consultas(grade, 1):
+        assert carregada(pos_inicio, pos_fim) == alt(pos_inicio, pos_fim)
+
+    grade.set_obstaculo(*referencia.pontos_livres(grade)[0])
+    with pytest.raises(ValueError):
+        HeuristicaMarcos.carregar(arquivo, grade)
+
+
+def test_grade_sem_pontos_livres():
+    grade = referencia.grade_aleatoria(3, 4, 0, densidade=1)
+    with pytest.raises(ValueError):
+        HeuristicaMarcos.calcular(grade)
+
+
+def test_marcos_expandem_menos_que_manhattan():
+    # Pontas dos dois lados de uma parede com uma só passagem, lá embaixo:
+    # a distância de Manhattan subestima muito, os marcos não.
+    grade = referencia.grade_aleatoria(30, 30, 0, densidade=0)
+    for linha in range(29):
+        grade.set_obstaculo(linha, 15)
+    alt = HeuristicaMarcos.calcular(grade, qtd_marcos=8)
+    simples = busca_A_estrela(grade, (0, 14), (0, 16))
+    com_marcos = busca_A_estrela(grade, (0, 14), (0, 16), heuristica=alt)
+    assert com_marcos.custo == simples.custo
+    assert 2 * com_marcos.iteracoes < simples.iteracoes
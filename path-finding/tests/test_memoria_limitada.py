@@ -0,0 +1,69 @@
+import pytest
+
+from grade_mapeada import GradeMapeada
+from memoria_limitada import busca_sma
+
+import referencia
+
+
+@pytest.mark.parametrize('formato', referencia.FORMATOS)
+@pytest.mark.parametrize('diagonais', [False, True])
+@pytest.mark.parametrize('custos', [False, True])
+def test_sma_igual_a_referencia(formato, diagonais, custos):
+    for grade, pares in referencia.cenarios(formato, diagonais, custos):
+        for pos_inicio, pos_fim in pares:
+            resultado = busca_sma(grade, pos_inicio, pos_fim)
+            referencia.conferir(grade, resultado, pos_inicio, pos_fim)
+            assert resultado.descartes == 0
+            assert resultado.pico_nos >= 1
+            assert resultado.memoria_estimada > 0
+            assert resultado.otimo == resultado.encontrado
+
+
+@pytest.mark.parametrize('formato', [(6, 2), (12, 12), (17, 23)])
+@pytest.mark.parametrize('diagonais', [False, True])
+def test_sma_com_pouca_memoria(formato, diagonais):
+    # Com metade dos nós que a busca completa usou, a busca descarta nós
+    # mas continua ótima; o pico nunca passa do limite.
+    descartou = False
+    for grade, pares in referencia.cenarios(formato, diagonais, True,
+                                            sementes=2, rodadas=1):
+        for pos_inicio, pos_fim in pares:
+            otimo = referencia.custo_otimo(grade, pos_inicio, pos_fim)
+            if otimo == referencia.INF:
+                continue
+            completo = busca_sma(grade, pos_inicio, pos_fim)
+            limite = max(len(completo.caminho) + 4, completo.pico_nos // 2)
+            resultado = busca_sma(grade, pos_inicio, pos_fim,
+                                  limite_nos=limite, prazo=5)
+            assert not resultado.interrompida
+            referencia.conferir(grade, resultado, pos_inicio, pos_fim,
+                                otimo)
+            assert resultado.pico_nos <= limite
+            descartou = descartou or resultado.descartes > 0
+    assert descartou
+
+
+def test_caminho_otimo_maior_que_o_limite():
+    # O caminho ótimo não cabe em 25 nós: a busca devolve o melhor entre os
+    # que cabem e avisa que ele pode não ser o ótimo.
+    grade = referencia.grade_aleatoria(8, 27, 56, custos=True)
+    otimo = referencia.custo_otimo(grade, (6, 8), (6, 25))
+    resultado = busca_sma(grade, (6, 8), (6, 25), limite_nos=25, prazo=5)
+    assert resultado and resultado.descartes > 0
+    assert len(resultado.caminho) <= 25
+    assert resultado.custo > otimo
+    assert referencia.custo_caminho(grade, resultado.caminho) \
+        == resultado.custo
+    assert not resultado.otimo
+
+
+def test_sma_em_grade_mapeada(tmp_path):
+    # Só usa g e pai da grade: funciona também com o estado esparso.
+    grade = referencia.grade_aleatoria(17, 23, 3, diagonais=True)
+    mapeada = GradeMapeada.de_grade(grade, tmp_path / 'sma.grdm', lado=8)
+    for pos_inicio, pos_fim in referencia.consultas(grade, 3):
+        resultado = busca_sma(mapeada, pos_inicio, pos_fim, limite_nos=60,
+                              prazo=5)
+        assert not resultado.interrompida
+        referencia.conferir(grade, resultado, pos_inicio, pos_fim)
@@ -0,0 +1,75 @@
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+from motores import MOTORES
+import movingai
+from movingai import Consulta, executar_cenarios, ler_cenarios, ler_mapa, \
+    salvar_cenarios, salvar_mapa
+
+import referencia
+
+
+def test_importa_sem_o_benchmark():
+    codigo = 'import sys, movingai; assert "benchmark" not in sys.modules'
+    subprocess.run([sys.executable, '-c', codigo], check=True,
+                   cwd=os.path.dirname(movingai.__file__))
+
+
+@pytest.mark.parametrize('formato', referencia.FORMATOS)
+@pytest.mark.parametrize('diagonais', [False, True])
+def test_mapa_e_cenarios_igual_a_referencia(tmp_path, formato, diagonais):
+    grade = referencia.grade_aleatoria(*formato, 3, diagonais)
+    mapa = tmp_path / 'aleatorio.map'
+    salvar_mapa(grade, mapa)
+    lida = ler_mapa(mapa, diagonais)
+    assert np.array_equal(lida.obstaculo, grade.obstaculo)
+    assert lida.qtd_obstaculos == grade.qtd_obstaculos
+
+    consultas = [Consulta(0, 'aleatorio.map', *formato, pos_inicio, pos_fim,
+                          0.0)
+                 for pos_inicio, pos_fim in referencia.consultas(grade, 3)]
+    cenario = tmp_path / 'aleatorio.map.scen'
+    salvar_cenarios(consultas, cenario)
+    assert [(c.pos_inicio, c.pos_fim) for c in ler_cenarios(cenario)] \
+        == [(c.pos_inicio, c.pos_fim) for c in consultas]
+
+    for algoritmo in MOTORES.values():
+        registros = list(executar_cenarios([cenario], algoritmo,
+                                           diagonais=diagonais))
+        assert len(registros) == len(consultas)
+        for registro in registros:
+            otimo = referencia.custo_otimo(grade, registro['inicio'],
+                                           registro['fim'])
+            assert registro['encontrado'] == (otimo != referencia.INF)
+            if registro['encontrado']:
+                assert registro['custo'] == otimo
+
+
+def test_terrenos_e_cabecalho(tmp_path):
+    mapa = tmp_path / 'terrenos.map'
+    mapa.write_bytes(b'type octile\r\nwidth 4\nheight 3\nmap\n'
+                     b'.GS@\nTW..\nO...\n')
+    grade = ler_mapa(mapa)
+    assert grade.obstaculo.tolist() == [[0, 0, 0, 1], [1, 1, 0, 0],
+                                        [1, 0, 0, 0]]
+    assert grade.diagonais
+
+    for cabecalho in (b'type octile\nwidth 4\n', b'type\nheight 1\nwidth 4\n'):
+        mapa.write_bytes(cabecalho + b'map\n....\n')
+        with pytest.raises(ValueError, match='cabeçalho'):
+            ler_mapa(mapa)
+
+
+def test_cenarios_invalidos(tmp_path):
+    cenario = tmp_path / 'x.map.scen'
+    cenario.write_text('version 1\n0\tx.map\t4\t3\t0\t0\t1\n')
+    with pytest.raises(ValueError):
+        list(ler_cenarios(cenario))
+
+    cenario.write_text('version 1\n0\tx.map\t4\t3\t0\t0\t1\t1\t1.0\n')
+    with pytest.raises(FileNotFoundError):
+        list(executar_cenarios([cenario]))
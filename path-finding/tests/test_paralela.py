@@ -0,0 +1,67 @@
+import pytest
+
+from grade import Grade
+from paralela import BuscaParalela, _donos, busca_paralela
+
+import referencia
+
+
+@pytest.mark.parametrize('formato', [(1, 7), (7, 1), (6, 2), (17, 23)])
+@pytest.mark.parametrize('diagonais', [False, True])
+@pytest.mark.parametrize('processos', [1, 3])
+def test_paralela_igual_a_referencia(formato, diagonais, processos):
+    # A grade é copiada ao criar a busca: depois de cada edição, os
+    # processos são recriados. Blocos pequenos espalham os pontos.
+    for grade, pares in referencia.cenarios(formato, diagonais, custos=True,
+                                            sementes=2, rodadas=1):
+        with BuscaParalela(grade, processos, lado_bloco=2) as busca:
+            for pos_inicio, pos_fim in pares:
+                resultado = busca.buscar(pos_inicio, pos_fim)
+                referencia.conferir(grade, resultado, pos_inicio, pos_fim)
+
+
+def test_paralela_nao_ve_edicoes_posteriores():
+    grade = referencia.grade_aleatoria(12, 12, 3, custos=True)
+    livres = referencia.pontos_livres(grade)
+    pos_inicio, pos_fim = livres[0], livres[-1]
+    with BuscaParalela(grade, 2, lado_bloco=4) as busca:
+        antes = busca.buscar(pos_inicio, pos_fim)
+        referencia.conferir(grade, antes, pos_inicio, pos_fim)
+        assert len(antes.caminho) > 2
+        for linha, coluna in antes.caminho[1:-1]:
+            grade.set_obstaculo(linha, coluna)
+        depois = busca.buscar(pos_inicio, pos_fim)
+        assert depois.custo == antes.custo
+        assert depois.caminho == antes.caminho
+
+
+def test_busca_paralela_unica():
+    grade = referencia.grade_aleatoria(17, 23, 4, diagonais=True)
+    for pos_inicio, pos_fim in referencia.consultas(grade, 4, quantidade=3):
+        resultado = busca_paralela(grade, pos_inicio, pos_fim, processos=2)
+        referencia.conferir(grade, resultado, pos_inicio, pos_fim)
+
+
+def test_heuristica_que_nao_serializa():
+    grade = Grade(20, 20, True)
+    with BuscaParalela(grade, 2) as busca:
+        with pytest.raises(ValueError):
+            busca.buscar((0, 0), (19, 19), heuristica=lambda a, c: 0)
+        # Os processos continuam prontos para a busca seguinte:
+        referencia.conferir(grade, busca.buscar((0, 0), (19, 19)),
+                            (0, 0), (19, 19))
+
+
+def test_donos_por_bloco():
+    qtd_linhas, qtd_colunas, lado_bloco = 40, 36, 4
+    donos = _donos(qtd_linhas, qtd_colunas, lado_bloco, 3)
+    assert len(donos) == qtd_linhas * qtd_colunas
+    # Todos os pontos de um bloco têm o mesmo dono, e todos os processos
+    # recebem uma parte parecida dos blocos:
+    por_bloco = {}
+    for indice, dono in enumerate(donos):
+        linha, coluna = divmod(indice, qtd_colunas)
+        bloco = (linha // lado_bloco, coluna // lado_bloco)
+        assert por_bloco.setdefault(bloco, dono) == dono
+    contagem = [list(por_bloco.values()).count(dono) for dono in range(3)]
+    assert min(contagem) > len(por_bloco) / 6
@@ -0,0 +1,73 @@
+import asyncio
+
+import pytest
+
+from servico import ClienteCaminhos, ServicoCaminhos
+
+import referencia
+
+
+async def consultar_todas(grade, pares, **opcoes):
+    async with ServicoCaminhos(grade, **opcoes) as servico:
+        cliente = ClienteCaminhos()
+        await cliente.conectar(porta=servico.porta)
+        try:
+            # Todas as consultas (cada uma duas vezes) ficam pendentes
+            # ao mesmo tempo na mesma conexão:
+            respostas = await asyncio.gather(*[
+                cliente.consultar(pos_inicio, pos_fim)
+                for pos_inicio, pos_fim in pares + pares])
+            estatisticas = await cliente.estatisticas()
+        finally:
+            await cliente.fechar()
+    return respostas, estatisticas
+
+
+@pytest.mark.parametrize('formato', [(1, 7), (6, 2), (17, 23)])
+@pytest.mark.parametrize('diagonais', [False, True])
+@pytest.mark.parametrize('processos', [1, 2])
+def test_servico_igual_a_referencia(formato, diagonais, processos):
+    grade = referencia.grade_aleatoria(*formato, 6, diagonais, custos=True)
+    pares = referencia.consultas(grade, 6)
+    respostas, estatisticas = asyncio.run(
+        consultar_todas(grade, pares, processos=processos,
+                        limite_pendentes=64))
+
+    for (pos_inicio, pos_fim), resposta in zip(pares + pares, respostas):
+        otimo = referencia.custo_otimo(grade, pos_inicio, pos_fim)
+        assert resposta['encontrado'] == (otimo != referencia.INF)
+        if resposta['encontrado']:
+            assert resposta['custo'] == otimo
+            caminho = [tuple(p) for p in resposta['caminho']]
+            assert caminho[0] == pos_inicio and caminho[-1] == pos_fim
+            assert referencia.custo_caminho(grade, caminho) == otimo
+
+    # Cada par distinto gera uma só busca; as repetições são
+    # compartilhadas ou saem da cache:
+    distintos = len(set(pares))
+    assert estatisticas['buscas'] == distintos
+    assert estatisticas['consultas'] == 2 * len(pares)
+    assert estatisticas['compartilhadas'] + estatisticas['acertos_cache'] \
+        == 2 * len(pares) - distintos
+
+
+def test_servico_recusa_posicao_fora_da_grade():
+    grade = referencia.grade_aleatoria(6, 2, 0)
+    respostas, _ = asyncio.run(
+        consultar_todas(grade, [((0, 0), (6, 0))], processos=1))
+    assert all('erro' in resposta for resposta in respostas)
+
+
+def test_servico_recusa_acima_do_limite():
+    grade = referencia.grade_aleatoria(17, 23, 1)
+    pares = referencia.consultas(grade, 1)
+    respostas, estatisticas = asyncio.run(
+        consultar_todas(grade, pares, processos=1, limite_pendentes=2,
+                        capacidade_cache=0))
+    recusadas = [r for r in respostas if 'erro' in r]
+    assert len(recusadas) == estatisticas['recusadas'] > 0
+    assert all(r['erro'].startswith('OverflowError') for r in recusadas)
+    for (pos_inicio, pos_fim), resposta in zip(pares + pares, respostas):
+        if 'erro' not in resposta and resposta['encontrado']:
+            assert resposta['custo'] == referencia.custo_otimo(
+                grade, pos_inicio, pos_fim)